@@ -0,0 +1,182 @@
+import json
+import numpy as np
+import pandas as pd
+from database.connection import connect
+from database.writer import get_writer
+from utils.typed_frame import amounts_as_float
+from analyzers.vendor_profiles import normalize_vendor, normalize_category
+
+# Engineered features, in column order. Weekdays are frequency-encoded per
+# category as surprisal, -log(share of the category's payments on that
+# weekday): on a numeric or cyclic scale a busy Monday at the edge of the
+# working week looks as unusual as a rare Saturday
+FEATURES = ['log_amount', 'weekday_rarity', 'day_of_month', 'vendor_frequency', 'vendor_share']
+WEEKDAY_COLUMN = FEATURES.index('weekday_rarity')
+# Fraction of rows the robust (MCD) estimate is computed from, and C-steps run at most
+SUPPORT_FRACTION = 0.9
+MAX_C_STEPS = 20
+# Added to the diagonal (in robust-standardized units) so constant features stay invertible
+RIDGE = 1e-3
+
+def engineer_features(df, profiles, pairs):
+    """
+    Feature matrix (rows x FEATURES) and normalized categories of a typed
+    frame. Vendor frequency is log(1 + the vendor's transaction count);
+    vendor share is the vendor's fraction of its category's transactions,
+    both looked up in the vendor profile store. The weekday_rarity column
+    holds the weekday (0 = Monday) until encode_weekdays() encodes it.
+    """
+    amounts = amounts_as_float(df['amount']).to_numpy()
+    dates = df['transaction_date']
+    weekdays = (df['weekday'] if 'weekday' in df.columns else dates.dt.weekday).to_numpy(dtype='float64', na_value=np.nan)
+    vendor_keys = normalize_vendor(df['vendor_name'])
+    categories = normalize_category(df['transaction_type'])
+
+    vendor_counts = profiles['transaction_count'].reindex(vendor_keys).fillna(0).to_numpy(dtype='float64')
+    pair_counts = pairs.set_index(['vendor_key', 'category'])['transaction_count']
+    pair_totals = pair_counts.reindex(pd.MultiIndex.from_arrays([vendor_keys, categories])).fillna(0).to_numpy(dtype='float64')
+    category_totals = pairs.groupby('category')['transaction_count'].sum().reindex(categories).to_numpy(dtype='float64')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features = np.column_stack([
+            np.log1p(np.abs(amounts)),
+            weekdays,
+            dates.dt.day.to_numpy(dtype='float64', na_value=np.nan),
+            np.log1p(vendor_counts),
+            np.where(category_totals > 0, pair_totals / category_totals, 0.0),
+        ])
+    return features, categories.to_numpy(dtype=object)
+
+def weekday_distribution(features):
+    """
+    Share of rows on each weekday (Monday first) from unencoded features,
+    smoothed with half a count per day so unseen days stay finite.
+    """
+    counts = np.bincount(features[:, WEEKDAY_COLUMN].astype('int64'), minlength=7) + 0.5
+    return counts / counts.sum()
+
+def encode_weekdays(features, distribution):
+    """Copy of features with the weekday column replaced by -log(its share in distribution)."""
+    encoded = features.copy()
+    encoded[:, WEEKDAY_COLUMN] = -np.log(distribution[features[:, WEEKDAY_COLUMN].astype('int64')])
+    return encoded
+
+def robust_fit(features):
+    """
+    Robust location and covariance of a feature matrix: minimum covariance
+    determinant via C-steps from a deterministic median/MAD start, with a
+    consistency correction and one reweighting step. Returns (mean, Cholesky
+    factor of the covariance).
+    """
+    from scipy import stats
+
+    n, p = features.shape
+    center = np.median(features, axis=0)
+    scale = 1.4826 * np.median(np.abs(features - center), axis=0)
+    # Features with no spread in half the rows fall back to their std dev, then to 1
+    scale = np.where(scale > 0, scale, features.std(axis=0))
+    scale = np.where(scale > 0, scale, 1.0)
+    standardized = (features - center) / scale
+
+    h = max(int(SUPPORT_FRACTION * n), p + 1)
+    subset = np.argsort((standardized ** 2).sum(axis=1), kind='stable')[:h]
+    for _ in range(MAX_C_STEPS):
+        mean, cov = _moments(standardized[subset])
+        distances = _squared_distances(standardized, mean, np.linalg.cholesky(cov))
+        next_subset = np.sort(np.argsort(distances, kind='stable')[:h])
+        if np.array_equal(next_subset, np.sort(subset)):
+            break
+        subset = next_subset
+
+    # Scale the h-subset covariance to be consistent at the normal model
+    cov *= np.median(distances) / stats.chi2.ppf(0.5, p)
+    distances = _squared_distances(standardized, mean, np.linalg.cholesky(cov))
+    mean, cov = _moments(standardized[distances <= stats.chi2.ppf(0.975, p)])
+
+    # Back to the original feature units
+    return center + scale * mean, scale[:, None] * np.linalg.cholesky(cov)
+
+def _moments(rows):
+    mean = rows.mean(axis=0)
+    cov = np.cov(rows, rowvar=False) if len(rows) > 1 else np.zeros((rows.shape[1], rows.shape[1]))
+    return mean, cov + RIDGE * np.eye(rows.shape[1])
+
+def _squared_distances(rows, mean, chol):
+    from scipy.linalg import solve_triangular
+    whitened = solve_triangular(chol, (rows - mean).T, lower=True)
+    return (whitened ** 2).sum(axis=0)
+
+def score(features, mean, chol):
+    """Squared Mahalanobis distances of a batch, in O(rows x features^2)."""
+    return _squared_distances(features, mean, chol)
+
+def feature_contributions(features, mean, chol):
+    """
+    How much of each row's squared distance every feature explains beyond
+    the others: d^2 minus the squared distance over the remaining features
+    (marginal covariance), so contributions are never negative.
+    Returns a rows x FEATURES matrix.
+    """
+    cov = chol @ chol.T
+    total = _squared_distances(features, mean, chol)
+    columns = []
+    for dropped in range(len(FEATURES)):
+        keep = [i for i in range(len(FEATURES)) if i != dropped]
+        sub_chol = np.linalg.cholesky(cov[np.ix_(keep, keep)])
+        columns.append(total - _squared_distances(features[:, keep], mean[keep], sub_chol))
+    return np.column_stack(columns)
+
+class CovarianceModelStore:
+    """
+    Per-source and category weekday distribution and robust location and
+    covariance (Cholesky factor) of the engineered features, kept in the
+    covariance_models table with the category's transaction count at fit
+    time, so batches are scored against stored factors and categories are
+    refitted only as they grow.
+    """
+
+    def __init__(self, db_path='anomalyguard.db'):
+        self.db_path = db_path
+
+    def load(self, source):
+        """A source's models by category: {'weekdays', 'mean', 'chol', 'fitted_rows'}."""
+        conn = connect(self.db_path)
+        rows = conn.execute("""
+            SELECT category, features, weekdays_json, mean_json, chol_json, fitted_rows FROM covariance_models
+            WHERE source = ?
+        """, (source,)).fetchall()
+        conn.close()
+        models = {}
+        for category, features, weekdays_json, mean_json, chol_json, fitted_rows in rows:
+            if json.loads(features) != FEATURES:
+                # Fitted on another feature set; refit
+                continue
+            models[category] = {
+                'weekdays': np.array(json.loads(weekdays_json)),
+                'mean': np.array(json.loads(mean_json)),
+                'chol': np.array(json.loads(chol_json)),
+                'fitted_rows': fitted_rows,
+            }
+        return models
+
+    def save(self, source, models):
+        """Stores a source's fitted models ({category: {'weekdays', 'mean', 'chol', 'fitted_rows'}})."""
+        if models:
+            get_writer(self.db_path).run(self._write, source, models)
+
+    def _write(self, conn, source, models):
+        conn.executemany("""
+            INSERT INTO covariance_models (source, category, features, weekdays_json, mean_json, chol_json, fitted_rows)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source, category) DO UPDATE SET
+                features = excluded.features,
+                weekdays_json = excluded.weekdays_json,
+                mean_json = excluded.mean_json,
+                chol_json = excluded.chol_json,
+                fitted_rows = excluded.fitted_rows,
+                updated_at = CURRENT_TIMESTAMP
+        """, [
+            (source, category, json.dumps(FEATURES), json.dumps(model['weekdays'].tolist()), json.dumps(model['mean'].tolist()),
+             json.dumps(model['chol'].tolist()), int(model['fitted_rows']))
+            for category, model in models.items()
+        ])
@@ -0,0 +1,134 @@
+import argparse
+import numpy as np
+import pandas as pd
+from database.connection import connect
+from database.writer import get_writer
+from analyzers.vendor_profiles import normalize_vendor, normalize_category
+from utils.partitions import source_partitions, DEFAULT_SOURCE
+
+# Amounts below this carry too few significant digits for Benford analysis
+MIN_AMOUNT = 10.0
+OVERALL_KEY = '*'
+# Histogram cells: 1-9 first digit, 10-99 first two digits, and
+# MAGNITUDE_BASE + e for amounts in [10^e, 10^(e+1)), e = 1..MAX_EXPONENT
+MAGNITUDE_BASE = 100
+MAX_EXPONENT = 15
+CELLS = list(range(1, MAGNITUDE_BASE)) + list(range(MAGNITUDE_BASE + 1, MAGNITUDE_BASE + MAX_EXPONENT + 1))
+
+def leading_digits(amounts):
+    """
+    First digit, first two digits and decimal exponent of each amount (all 0
+    where the amount is missing or below MIN_AMOUNT), without string formatting.
+    """
+    values = np.abs(np.asarray(amounts, dtype='float64'))
+    usable = np.isfinite(values) & (values >= MIN_AMOUNT)
+    first_two = np.zeros(len(values), dtype='int64')
+    exponents = np.zeros(len(values), dtype='int64')
+    kept = values[usable]
+    exponent = np.floor(np.log10(kept))
+    # log10 can land on the wrong side of an exact power of ten
+    exponent -= kept < 10.0 ** exponent
+    exponent += kept >= 10.0 ** (exponent + 1)
+    # Rounding absorbs float error such as 44.99999999 for 4.5 * 10
+    scaled = np.floor(np.round(kept / 10.0 ** (exponent - 1), 6)).astype('int64')
+    first_two[usable] = np.where(scaled >= 100, scaled // 10, scaled)
+    exponents[usable] = np.minimum(exponent + (scaled >= 100), MAX_EXPONENT)
+    return first_two // 10, first_two, exponents
+
+class DigitHistogramStore:
+    """
+    Leading-digit counts per source and group ('overall', 'vendor',
+    'category'), kept in the benford_digit_counts table (see CELLS for the digit codes; the
+    order-of-magnitude counts tell whether Benford's law applies at all).
+    update() adds each ingested batch's counts, so histograms never need a
+    rescan.
+    """
+
+    def __init__(self, db_path='anomalyguard.db'):
+        self.db_path = db_path
+
+    def group_digits(self, batch):
+        """Long frame of (group_type, group_key, digit, row) for every usable amount in the batch."""
+        first, first_two, exponents = leading_digits(pd.to_numeric(batch['amount'], errors='coerce'))
+        rows = np.flatnonzero(first > 0)
+        groups = {'overall': pd.Series(OVERALL_KEY, index=batch.index, dtype=object)}
+        if 'vendor_name' in batch.columns:
+            groups['vendor'] = normalize_vendor(batch['vendor_name'])
+        if 'transaction_type' in batch.columns:
+            groups['category'] = normalize_category(batch['transaction_type'])
+
+        frames = []
+        for group_type, keys in groups.items():
+            keys = keys.to_numpy(dtype=object)[rows]
+            for digits in (first[rows], first_two[rows], MAGNITUDE_BASE + exponents[rows]):
+                frames.append(pd.DataFrame({
+                    'group_type': group_type,
+                    'group_key': keys,
+                    'digit': digits,
+                    'row': rows,
+                }))
+        long = pd.concat(frames, ignore_index=True)
+        return long[long['group_key'].notna()]
+
+    def update(self, batch, source_name=DEFAULT_SOURCE):
+        """
+        Adds a batch's digit counts to the histograms of its source (the
+        batch's `source` column, else source_name). Returns the number of
+        histogram cells touched.
+        """
+        frames = []
+        for source, rows in source_partitions(batch, source_name):
+            long = self.group_digits(rows)
+            if not long.empty:
+                frames.append(long.groupby(['group_type', 'group_key', 'digit'], sort=False).size()
+                              .reset_index(name='count').assign(source=source))
+        if not frames:
+            return 0
+        counts = pd.concat(frames, ignore_index=True)
+        get_writer(self.db_path).run(self._write, counts)
+        return len(counts)
+
+    def _write(self, conn, counts):
+        conn.executemany("""
+            INSERT INTO benford_digit_counts (source, group_type, group_key, digit, count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source, group_type, group_key, digit) DO UPDATE SET
+                count = count + excluded.count
+        """, [(source, t, k, int(d), int(c))
+              for source, t, k, d, c in counts[['source', 'group_type', 'group_key', 'digit', 'count']]
+              .itertuples(index=False, name=None)])
+
+    def load(self, source=None):
+        """Returns counts as a (group_type, group_key) x CELLS matrix, of one source or summed over all."""
+        query = "SELECT group_type, group_key, digit, count FROM benford_digit_counts"
+        params = []
+        if source is not None:
+            query += " WHERE source = ?"
+            params.append(source)
+        conn = connect(self.db_path)
+        counts = pd.read_sql_query(query, conn, params=params)
+        conn.close()
+        matrix = counts.pivot_table(index=['group_type', 'group_key'], columns='digit',
+                                    values='count', aggfunc='sum', fill_value=0)
+        return matrix.reindex(columns=CELLS, fill_value=0)
+
+    def rebuild(self, chunk_size=100_000):
+        """Recomputes every histogram from monitored_transactions."""
+        conn = connect(self.db_path)
+        conn.execute("DELETE FROM benford_digit_counts")
+        conn.commit()
+
+        rows = 0
+        query = "SELECT source, amount, vendor_name, transaction_type FROM monitored_transactions ORDER BY id"
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size):
+            self.update(chunk)
+            rows += len(chunk)
+        conn.close()
+        print(f"Rebuilt digit histograms from {rows} transactions.")
+        return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild Benford digit histograms from stored transactions.")
+    parser.add_argument('--db', default='anomalyguard.db', help="Path to the SQLite database")
+    args = parser.parse_args()
+    DigitHistogramStore(args.db).rebuild()
@@ -1,14 +1,14 @@
 import os
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
-
-load_dotenv()
 
 class LLMAnalyzer:
     def __init__(self, api_key=None):
+        # Imported here so pages that never call the LLM don't pay for the openai package
+        from dotenv import load_dotenv
+        load_dotenv()
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if self.api_key:
+            from openai import OpenAI
             self.client = OpenAI(api_key=self.api_key)
         else:
             self.client = None
@@ -1,26 +1,53 @@
-import sqlite3
-import json
+from database.connection import connect
+from database.engine import bulk_writer
+from database.writer import get_writer
+import argparse
+import numpy as np
+import pandas as pd
+import os
+
+SEVERITY_WEIGHTS = {
+    'info': 0.1,
+    'warning': 0.4,
+    'error': 0.8,
+    'critical': 1.0
+}
+# Weight for severities missing from SEVERITY_WEIGHTS
+DEFAULT_SEVERITY_WEIGHT = 0.5
+AGGREGATIONS = ('noisy_or', 'max')
+RISK_LEVELS = ['low', 'medium', 'high', 'critical']
 
 class RiskScorer:
-    def __init__(self, db_path='anomalyguard.db'):
+    """
+    Scores detections and fuses them into one risk score and level per
+    transaction. With 'noisy_or' aggregation each detector is treated as
+    independent evidence, so the fused score is 1 - prod(1 - score) over the
+    strongest detection of every detector; 'max' keeps the strongest single
+    detection. A transaction's fused level is never below the risk level its
+    detectors declared when they flagged it.
+    """
+
+    def __init__(self, db_path='anomalyguard.db', aggregation=None, severity_weights=None):
         self.db_path = db_path
+        self.aggregation = aggregation or os.getenv('ANOMALYGUARD_RISK_AGGREGATION', 'noisy_or')
+        if self.aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown risk aggregation {self.aggregation!r}; expected one of {', '.join(AGGREGATIONS)}")
+        self.severity_weights = {**SEVERITY_WEIGHTS, **(severity_weights or {})}
 
     def calculate_score(self, statistical_confidence, detector_severity, llm_modifier=0):
         """
         Calculates a combined risk score between 0 and 1.
         """
-        severity_map = {
-            'info': 0.1,
-            'warning': 0.4,
-            'error': 0.8,
-            'critical': 1.0
-        }
-        
-        base_score = severity_map.get(detector_severity, 0.5) * statistical_confidence
-        combined_score = base_score + llm_modifier
-        
-        # Clamp between 0 and 1
-        return max(0.0, min(1.0, combined_score))
+        return float(self.calculate_scores([statistical_confidence], [detector_severity], [llm_modifier])[0])
+
+    def calculate_scores(self, confidences, severities, llm_modifiers=None):
+        """Vectorized calculate_score over aligned sequences; missing modifiers count as 0."""
+        weights = pd.Series(severities, dtype=object).map(self.severity_weights)
+        weights = weights.fillna(DEFAULT_SEVERITY_WEIGHT).to_numpy(dtype='float64')
+        scores = weights * np.nan_to_num(np.asarray(confidences, dtype='float64'))
+        if llm_modifiers is not None:
+            scores = scores + np.nan_to_num(np.asarray(llm_modifiers, dtype='float64'))
+        return np.clip(scores, 0.0, 1.0)
 
     def get_risk_level(self, score):
         if score >= 0.9: return 'critical'
@@ -28,48 +55,122 @@ class RiskScorer:
         if score >= 0.4: return 'medium'
         return 'low'
 
+    def get_risk_levels(self, scores):
+        """Vectorized get_risk_level."""
+        scores = np.asarray(scores, dtype='float64')
+        return np.select([scores >= 0.9, scores >= 0.7, scores >= 0.4],
+                         ['critical', 'high', 'medium'], default='low')
+
+    def fuse(self, transaction_ids=None):
+        """
+        Recomputes every detection's combined_risk_score and each transaction's
+        risk_score and risk_level from all of its detections, for the given
+        transactions (or all that have detections). Returns the number of
+        transactions updated.
+        """
+        conn = connect(self.db_path)
+        query = """
+            SELECT id, transaction_id, detector_name, confidence, severity, llm_risk_modifier, risk_level
+            FROM anomaly_detections
+        """
+        if transaction_ids is not None:
+            _load_temp_ids(conn, transaction_ids, bulk_writer(self.db_path))
+            query += " WHERE transaction_id IN (SELECT transaction_id FROM fusion_ids)"
+        detections = pd.read_sql_query(query, conn)
+        conn.close()
+        if detections.empty:
+            return 0
+
+        detections['score'] = self.calculate_scores(
+            detections['confidence'], detections['severity'], detections['llm_risk_modifier'])
+        # One piece of evidence per detector: repeated or overlapping detections
+        # of the same detector never compound
+        per_detector = detections.groupby(
+            [detections['transaction_id'], detections['detector_name'].fillna('')], sort=False)['score'].max()
+        by_transaction = per_detector.index.get_level_values(0)
+        if self.aggregation == 'noisy_or':
+            fused = 1.0 - (1.0 - per_detector).groupby(by_transaction, sort=False).prod()
+        else:
+            fused = per_detector.groupby(by_transaction, sort=False).max()
+        # Score-only levels would demote a single medium detection (say a
+        # 0.3 weekend payment) to 'low' while it stays flagged
+        ranks = {level: rank for rank, level in enumerate(RISK_LEVELS)}
+        fused_ranks = pd.Series(self.get_risk_levels(fused.to_numpy()), index=fused.index).map(ranks)
+        declared = detections['risk_level'].map(ranks).groupby(detections['transaction_id'], sort=False).max()
+        floor = declared.reindex(fused.index).fillna(0).astype(int)
+        levels = np.array(RISK_LEVELS)[np.maximum(fused_ranks.to_numpy(), floor.to_numpy())]
+        get_writer(self.db_path).run(self._write_fused, detections, fused, levels)
+        return len(fused)
+
+    def _write_fused(self, conn, detections, fused, levels):
+        # Bulk write-back: stage the results, then one UPDATE ... FROM per table
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS fusion_detections (id INTEGER PRIMARY KEY, score REAL)")
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS fusion_transactions (transaction_id TEXT PRIMARY KEY, score REAL, level TEXT)")
+        conn.execute("DELETE FROM fusion_detections")
+        conn.execute("DELETE FROM fusion_transactions")
+        bulk = bulk_writer(self.db_path)
+        bulk.insert(conn, 'fusion_detections', ['id', 'score'],
+                      zip(detections['id'].tolist(), detections['score'].tolist()))
+        bulk.insert(conn, 'fusion_transactions', ['transaction_id', 'score', 'level'],
+                      zip(fused.index.tolist(), fused.tolist(), levels.tolist()))
+        conn.execute("""
+            UPDATE anomaly_detections SET combined_risk_score = f.score
+            FROM fusion_detections f WHERE anomaly_detections.id = f.id
+        """)
+        conn.execute("""
+            UPDATE monitored_transactions SET risk_score = f.score, risk_level = f.level
+            FROM fusion_transactions f WHERE monitored_transactions.transaction_id = f.transaction_id
+        """)
+
     def update_anomaly_risk(self, detection_id, llm_results):
-        """Updates an anomaly detection with LLM results and a combined score."""
-        conn = sqlite3.connect(self.db_path)
+        """
+        Stores LLM results on a detection and returns its combined score. The
+        transaction's risk level is left to fuse().
+        """
+        return get_writer(self.db_path).run(self._write_llm_results, detection_id, llm_results)
+
+    def _write_llm_results(self, conn, detection_id, llm_results):
         cursor = conn.cursor()
-        
+
         # Get original detection data
-        cursor.execute("SELECT confidence, severity, transaction_id FROM anomaly_detections WHERE id = ?", (detection_id,))
+        cursor.execute("SELECT confidence, severity FROM anomaly_detections WHERE id = ?", (detection_id,))
         row = cursor.fetchone()
         if not row:
-            conn.close()
             return
-            
-        confidence, severity, transaction_id = row
-        
+
+        confidence, severity = row
+
         # Calculate new score
         llm_modifier = llm_results.get('risk_score_modifier', 0)
         combined_score = self.calculate_score(confidence, severity, llm_modifier)
-        risk_level = self.get_risk_level(combined_score)
-        
+
         # Update detection record
         cursor.execute("""
             UPDATE anomaly_detections
             SET llm_context_analysis = ?,
                 llm_risk_assessment = ?,
+                llm_risk_modifier = ?,
                 combined_risk_score = ?,
                 suggested_action = ?
             WHERE id = ?
         """, (
             llm_results.get('context_analysis'),
             llm_results.get('risk_assessment'),
+            llm_modifier,
             combined_score,
             llm_results.get('suggested_action'),
             detection_id
         ))
-        
-        # Update transaction risk level
-        cursor.execute("""
-            UPDATE monitored_transactions
-            SET risk_level = ?
-            WHERE transaction_id = ?
-        """, (risk_level, transaction_id))
-        
-        conn.commit()
-        conn.close()
         return combined_score
+
+def _load_temp_ids(conn, transaction_ids, writer):
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS fusion_ids (transaction_id TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM fusion_ids")
+    writer.insert(conn, 'fusion_ids', ['transaction_id'],
+                  ((t,) for t in dict.fromkeys(str(t) for t in transaction_ids)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-fuse every transaction's risk level from its stored detections.")
+    parser.add_argument('--db', default='anomalyguard.db', help="Path to the SQLite database")
+    args = parser.parse_args()
+    print(f"Fused risk for {RiskScorer(args.db).fuse()} transactions.")
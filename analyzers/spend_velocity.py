@@ -0,0 +1,132 @@
+import argparse
+import pandas as pd
+from database.connection import connect
+from database.writer import get_writer
+from analyzers.vendor_profiles import normalize_vendor, normalize_category
+from utils.partitions import source_partitions, DEFAULT_SOURCE
+
+# Group keys per IN (...) lookup when loading a subset of groups
+LOAD_CHUNK_KEYS = 500
+
+class SpendVelocityStore:
+    """
+    Daily payment count, amount total and sum of squared amounts per source
+    and vendor and per source and category, kept in the daily_spend table. update() adds each
+    ingested batch's days with additive upserts, so rolling windows over any
+    span are cumulative-sum differences of these rows and never need a
+    rescan of transactions.
+    """
+
+    def __init__(self, db_path='anomalyguard.db'):
+        self.db_path = db_path
+
+    def group_days(self, batch):
+        """Long frame of (group_type, group_key, day, amount) for every dated row of the batch."""
+        days = pd.to_datetime(batch['transaction_date'], errors='coerce', format='ISO8601').dt.strftime('%Y-%m-%d')
+        amounts = pd.to_numeric(batch['amount'], errors='coerce')
+        groups = {}
+        if 'vendor_name' in batch.columns:
+            groups['vendor'] = normalize_vendor(batch['vendor_name'])
+        if 'transaction_type' in batch.columns:
+            groups['category'] = normalize_category(batch['transaction_type'])
+
+        frames = [
+            pd.DataFrame({'group_type': group_type, 'group_key': keys, 'day': days, 'amount': amounts})
+            for group_type, keys in groups.items()
+        ]
+        if not frames:
+            return pd.DataFrame(columns=['group_type', 'group_key', 'day', 'amount'])
+        long = pd.concat(frames, ignore_index=True)
+        return long[long['group_key'].notna() & long['day'].notna()]
+
+    def update(self, batch, source_name=DEFAULT_SOURCE):
+        """
+        Adds a batch's payments to the daily totals of its source (the
+        batch's `source` column, else source_name). Returns the number of
+        group-days touched.
+        """
+        frames = []
+        for source, rows in source_partitions(batch, source_name):
+            long = self.group_days(rows)
+            if long.empty:
+                continue
+            long = long.assign(amount_sq=long['amount'] ** 2)
+            frames.append(long.groupby(['group_type', 'group_key', 'day'], sort=False).agg(
+                transaction_count=('day', 'size'),
+                amount_sum=('amount', 'sum'),
+                amount_sum_sq=('amount_sq', 'sum'),
+            ).reset_index().assign(source=source))
+        if not frames:
+            return 0
+        daily = pd.concat(frames, ignore_index=True)
+        get_writer(self.db_path).run(self._write, daily)
+        return len(daily)
+
+    def _write(self, conn, daily):
+        conn.executemany("""
+            INSERT INTO daily_spend (source, group_type, group_key, day, transaction_count, amount_sum, amount_sum_sq)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source, group_type, group_key, day) DO UPDATE SET
+                transaction_count = transaction_count + excluded.transaction_count,
+                amount_sum = amount_sum + excluded.amount_sum,
+                amount_sum_sq = amount_sum_sq + excluded.amount_sum_sq
+        """, [
+            (source, t, k, d, int(c), float(s), float(sq))
+            for source, t, k, d, c, s, sq in daily[[
+                'source', 'group_type', 'group_key', 'day', 'transaction_count', 'amount_sum', 'amount_sum_sq'
+            ]].itertuples(index=False, name=None)
+        ])
+
+    def load(self, group_type=None, keys=None, source=None):
+        """
+        Daily rows, optionally only of one group type and of the given group
+        keys, and of one source (else summed over all sources).
+        """
+        columns = ['group_type', 'group_key', 'day', 'transaction_count', 'amount_sum', 'amount_sum_sq']
+        query = f"SELECT {', '.join(columns)} FROM daily_spend"
+        conditions, params = [], []
+        if source is not None:
+            conditions.append("source = ?")
+            params.append(source)
+        if group_type is not None:
+            conditions.append("group_type = ?")
+            params.append(group_type)
+        conn = connect(self.db_path)
+        if keys is None:
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            frames = [pd.read_sql_query(query + where, conn, params=params)]
+        else:
+            keys = list(dict.fromkeys(keys))
+            frames = [pd.DataFrame(columns=columns)]
+            for start in range(0, len(keys), LOAD_CHUNK_KEYS):
+                chunk = keys[start:start + LOAD_CHUNK_KEYS]
+                chunk_conditions = conditions + [f"group_key IN ({', '.join('?' for _ in chunk)})"]
+                frames.append(pd.read_sql_query(
+                    query + f" WHERE {' AND '.join(chunk_conditions)}", conn, params=[*params, *chunk]))
+        conn.close()
+        daily = pd.concat(frames, ignore_index=True)
+        if source is None:
+            # Several sources may hold the same group-day
+            daily = daily.groupby(columns[:3], as_index=False, sort=False)[columns[3:]].sum()
+        return daily
+
+    def rebuild(self, chunk_size=100_000):
+        """Recomputes every daily total from monitored_transactions."""
+        conn = connect(self.db_path)
+        conn.execute("DELETE FROM daily_spend")
+        conn.commit()
+
+        rows = 0
+        query = "SELECT source, transaction_date, amount, vendor_name, transaction_type FROM monitored_transactions ORDER BY id"
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size):
+            self.update(chunk)
+            rows += len(chunk)
+        conn.close()
+        print(f"Rebuilt daily spend totals from {rows} transactions.")
+        return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild daily spend totals from stored transactions.")
+    parser.add_argument('--db', default='anomalyguard.db', help="Path to the SQLite database")
+    args = parser.parse_args()
+    SpendVelocityStore(args.db).rebuild()
@@ -0,0 +1,148 @@
+import argparse
+import numpy as np
+import pandas as pd
+from database.connection import connect
+from database.writer import get_writer
+from utils.partitions import source_labels, DEFAULT_SOURCE
+
+# Legal-form words dropped from vendor keys, so "Acme Inc." and "ACME" share a profile
+_LEGAL_SUFFIXES = r'\b(?:inc|incorporated|llc|ltd|limited|corp|corporation|co|company|plc|gmbh)\b'
+
+def _map_categories(series, transform):
+    """Applies a str -> str transform once per distinct value; missing/empty results become None."""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype('category')
+    mapped = transform(series.cat.categories.astype(str).to_series()).to_numpy(dtype=object)
+    mapped = np.append(np.where(mapped == '', None, mapped), None)
+    return pd.Series(mapped[series.cat.codes.to_numpy()], index=series.index, dtype=object)
+
+def normalize_vendor(names):
+    """Vendor keys: lower case, '&' as 'and', punctuation and legal suffixes removed."""
+    return _map_categories(names, lambda s: (
+        s.str.lower()
+        .str.replace('&', ' and ', regex=False)
+        .str.replace(r'[^a-z0-9 ]+', ' ', regex=True)
+        .str.replace(_LEGAL_SUFFIXES, ' ', regex=True)
+        .str.split().str.join(' ')
+    ))
+
+def normalize_category(categories):
+    """Transaction types compared case- and whitespace-insensitively."""
+    return _map_categories(categories, lambda s: s.str.strip().str.lower())
+
+class VendorProfileStore:
+    """
+    Per-source, per-vendor category mix, amount range and first-seen date,
+    kept in the vendor_profiles / vendor_category_stats tables. update()
+    folds each ingested batch in with additive upserts, so profiles never
+    need a full rescan; rebuild() recomputes them from monitored_transactions.
+    """
+
+    def __init__(self, db_path='anomalyguard.db'):
+        self.db_path = db_path
+
+    def _prepare(self, batch, source_name):
+        frame = pd.DataFrame({
+            'source': source_labels(batch, source_name),
+            'vendor_key': normalize_vendor(batch['vendor_name']),
+            'display_name': batch['vendor_name'].astype(object),
+            'category': normalize_category(batch['transaction_type']) if 'transaction_type' in batch.columns else None,
+            'amount': pd.to_numeric(batch['amount'], errors='coerce'),
+            'date': pd.to_datetime(batch['transaction_date'], errors='coerce', format='ISO8601').dt.strftime('%Y-%m-%d'),
+        })
+        frame = frame[frame['vendor_key'].notna()]
+        return frame.assign(amount_sq=frame['amount'] ** 2)
+
+    def update(self, batch, source_name=DEFAULT_SOURCE):
+        """
+        Adds a batch of ingested transactions to the profiles of their source
+        (the batch's `source` column, else source_name). Returns the number
+        of vendor profiles touched.
+        """
+        frame = self._prepare(batch, source_name)
+        if frame.empty:
+            return 0
+
+        vendors = frame.groupby(['source', 'vendor_key'], sort=False).agg(
+            display_name=('display_name', 'last'),
+            transaction_count=('vendor_key', 'size'),
+            amount_count=('amount', 'count'),
+            amount_sum=('amount', 'sum'),
+            amount_sum_sq=('amount_sq', 'sum'),
+            amount_min=('amount', 'min'),
+            amount_max=('amount', 'max'),
+            first_seen_date=('date', 'min'),
+            last_seen_date=('date', 'max'),
+        ).reset_index()
+        pairs = frame[frame['category'].notna()].groupby(['source', 'vendor_key', 'category'], sort=False).agg(
+            transaction_count=('vendor_key', 'size'),
+            amount_count=('amount', 'count'),
+            amount_sum=('amount', 'sum'),
+            amount_sum_sq=('amount_sq', 'sum'),
+        ).reset_index()
+        get_writer(self.db_path).run(self._write, vendors, pairs)
+        return len(vendors)
+
+    def _write(self, conn, vendors, pairs):
+        conn.executemany("""
+            INSERT INTO vendor_profiles
+            (source, vendor_key, display_name, transaction_count, amount_count, amount_sum, amount_sum_sq,
+             amount_min, amount_max, first_seen_date, last_seen_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source, vendor_key) DO UPDATE SET
+                display_name = excluded.display_name,
+                transaction_count = transaction_count + excluded.transaction_count,
+                amount_count = amount_count + excluded.amount_count,
+                amount_sum = amount_sum + excluded.amount_sum,
+                amount_sum_sq = amount_sum_sq + excluded.amount_sum_sq,
+                amount_min = MIN(COALESCE(amount_min, excluded.amount_min), COALESCE(excluded.amount_min, amount_min)),
+                amount_max = MAX(COALESCE(amount_max, excluded.amount_max), COALESCE(excluded.amount_max, amount_max)),
+                first_seen_date = MIN(COALESCE(first_seen_date, excluded.first_seen_date), COALESCE(excluded.first_seen_date, first_seen_date)),
+                last_seen_date = MAX(COALESCE(last_seen_date, excluded.last_seen_date), COALESCE(excluded.last_seen_date, last_seen_date)),
+                updated_at = CURRENT_TIMESTAMP
+        """, _records(vendors))
+        conn.executemany("""
+            INSERT INTO vendor_category_stats
+            (source, vendor_key, category, transaction_count, amount_count, amount_sum, amount_sum_sq)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source, vendor_key, category) DO UPDATE SET
+                transaction_count = transaction_count + excluded.transaction_count,
+                amount_count = amount_count + excluded.amount_count,
+                amount_sum = amount_sum + excluded.amount_sum,
+                amount_sum_sq = amount_sum_sq + excluded.amount_sum_sq
+        """, _records(pairs))
+
+    def load(self, source=None):
+        """Returns (profiles indexed by vendor_key, vendor/category pair stats), of one source if given."""
+        where, params = (" WHERE source = ?", [source]) if source is not None else ("", [])
+        conn = connect(self.db_path)
+        profiles = pd.read_sql_query("SELECT * FROM vendor_profiles" + where, conn, params=params, index_col='vendor_key')
+        pairs = pd.read_sql_query("SELECT * FROM vendor_category_stats" + where, conn, params=params)
+        conn.close()
+        return profiles, pairs
+
+    def rebuild(self, chunk_size=100_000):
+        """Recomputes every profile from monitored_transactions."""
+        conn = connect(self.db_path)
+        conn.execute("DELETE FROM vendor_profiles")
+        conn.execute("DELETE FROM vendor_category_stats")
+        conn.commit()
+
+        rows = 0
+        query = "SELECT source, transaction_date, amount, vendor_name, transaction_type FROM monitored_transactions ORDER BY id"
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size):
+            self.update(chunk)
+            rows += len(chunk)
+        conn.close()
+        print(f"Rebuilt vendor profiles from {rows} transactions.")
+        return rows
+
+def _records(frame):
+    """Rows as tuples of plain Python values with None for NA."""
+    return list(frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild vendor profiles from stored transactions.")
+    parser.add_argument('--db', default='anomalyguard.db', help="Path to the SQLite database")
+    args = parser.parse_args()
+    VendorProfileStore(args.db).rebuild()
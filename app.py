@@ -1,18 +1,12 @@
-import streamlit as st
-import pandas as pd
+import time
+_RUN_START = time.perf_counter()
+
 import os
-from utils.data_loader import DataLoader
-from detectors import DetectionPipeline
-from ui.dashboard_page import show_dashboard
-from ui.review_page import show_review
+import streamlit as st
 from database.init_db import init_db
 
-# Initialize DB if needed - Critical for Cloud Deployment
-if not os.path.exists('anomalyguard.db'):
-    init_db()
-else:
-    # Ensure tables exist even if file exists
-    init_db()
+# SQLite file path or SQLAlchemy URL (see database/engine.py)
+DB_PATH = os.getenv('ANOMALYGUARD_DB_URL', 'anomalyguard.db')
 
 # Page configuration
 st.set_page_config(
@@ -21,13 +15,43 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize modules
-loader = DataLoader()
-pipeline = DetectionPipeline()
+@st.cache_resource
+def get_database():
+    """Applies the schema once per process - Critical for Cloud Deployment."""
+    init_db(DB_PATH)
+    return DB_PATH
+
+@st.cache_resource
+def get_llm_analyzer():
+    """One OpenAI client (and one .env read) shared by every session."""
+    from analyzers.llm_analyzer import LLMAnalyzer
+    return LLMAnalyzer()
+
+@st.cache_resource
+def get_process_timings():
+    """Process-wide timings; cold_start is filled in by the first completed run."""
+    return {'cold_start': None}
+
+def get_session_modules():
+    """
+    Pipeline and loader live in session state: built once per browser session
+    rather than on every rerun, but not shared across sessions because the
+    metrics collector they carry tracks one run at a time.
+    """
+    if 'pipeline' not in st.session_state:
+        from detectors import DetectionPipeline
+        from utils.data_loader import DataLoader
+        pipeline = DetectionPipeline(get_database(), llm_analyzer=get_llm_analyzer())
+        st.session_state.pipeline = pipeline
+        st.session_state.loader = DataLoader(get_database(), metrics=pipeline.metrics)
+    return st.session_state.pipeline, st.session_state.loader
+
+get_database()
 
 # Sidebar
 st.sidebar.title("🛡️ AnomalyGuard")
-selection = st.sidebar.radio("Go to", ["Upload Data", "Dashboard", "Review Alerts"])
+selection = st.sidebar.radio("Go to", ["Upload Data", "Dashboard", "Review Alerts", "Pipeline Metrics"])
+timing_slot = st.sidebar.empty()
 
 # Header
 # Header is handled within split pages now or as a common header
@@ -44,76 +68,31 @@ Instead of manual sampling, get **100% coverage** of your transaction data.
 """)
 
 if selection == "Upload Data":
-    st.subheader("Step 1: Ingest Data")
-    
-    # 1. Option to use sample data
-    use_sample = st.checkbox("Use sample data (Demo Mode)")
-    
-    uploaded_file = None
-    if use_sample:
-        sample_path = "samples/demo_transactions_extended.csv"
-        if os.path.exists(sample_path):
-            uploaded_file = sample_path
-            st.info(f"Loaded extended sample file: `{sample_path}` (200+ rows)")
-        else:
-            st.error("Sample file not found!")
-    else:
-        uploaded_file = st.file_uploader("Choose a CSV transaction file", type="csv")
-    
-    if uploaded_file is not None:
-        try:
-            df = pd.read_csv(uploaded_file)
-            
-            # Normalize columns
-            rename_map = {}
-            if 'vendor' in df.columns: rename_map['vendor'] = 'vendor_name'
-            if 'date' in df.columns: rename_map['date'] = 'transaction_date' 
-            if 'type' in df.columns: rename_map['type'] = 'transaction_type'
-            
-            if rename_map:
-                df = df.rename(columns=rename_map)
-                
-            with st.expander("🔎 Preview Raw Data", expanded=True):
-                st.dataframe(df.head())
-            
-            if st.button("🚀 Ingest and Analyze", type="primary"):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                # 1. Ingestion
-                status_text.markdown("### 📥 Ingesting data...")
-                count = loader.ingest_dataframe(df)
-                progress_bar.progress(30)
-                st.success(f"✅ Ingested {count} new transactions into database.")
-                
-                # 2. Detection
-                status_text.markdown("### 🕵️ Running detection pipeline...")
-                findings = pipeline.run_all(df)
-                progress_bar.progress(60)
-                
-                # Show statistical findings immediately
-                if findings:
-                    with st.expander(f"Found {len(findings)} Statistical Anomalies", expanded=True):
-                        st.json([f['finding_summary'] for f in findings[:5]])
-                        if len(findings) > 5: st.caption(f"...and {len(findings)-5} more")
-                
-                # 3. AI Enrichment
-                status_text.markdown("### 🧠 Analyzing context with AI...")
-                enriched_count = pipeline.enrich_with_ai()
-                progress_bar.progress(90)
-                st.success(f"✅ AI analyzed {enriched_count} anomalies.")
-                
-                progress_bar.progress(100)
-                status_text.markdown("### 🎉 Analysis Complete!")
-                
-                st.balloons()
-                st.info("👉 Check the **Dashboard** for trends or **Review Alerts** to take action.")
-
-        except Exception as e:
-            st.error(f"Error processing file: {e}")
+    from ui.upload_page import show_upload
+    show_upload(get_session_modules)
 
 elif selection == "Dashboard":
-    show_dashboard()
+    from ui.dashboard_page import show_dashboard
+    show_dashboard(DB_PATH)
 
 elif selection == "Review Alerts":
-    show_review()
+    from ui.review_page import show_review
+    show_review(DB_PATH)
+
+elif selection == "Pipeline Metrics":
+    from ui.metrics_page import show_metrics
+    show_metrics(DB_PATH)
+
+# Startup and interaction latency, measured from the top of this script
+elapsed = time.perf_counter() - _RUN_START
+timings = get_process_timings()
+if timings['cold_start'] is None:
+    timings['cold_start'] = elapsed
+recent = st.session_state.setdefault('rerun_latencies', [])
+recent.append(elapsed)
+del recent[:-20]
+median = sorted(recent)[len(recent) // 2]
+timing_slot.caption(
+    f"⏱️ Cold start {timings['cold_start']:.2f}s · "
+    f"this run {elapsed * 1000:.0f} ms · median {median * 1000:.0f} ms (last {len(recent)})"
+)
@@ -0,0 +1,295 @@
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import pandas as pd
+from database.init_db import init_db
+from detectors import DetectionPipeline
+from utils.data_loader import DataLoader
+from utils.metrics import PipelineMetrics
+from utils.streaming import InboxSource, TailSource, StreamingPipeline
+from utils.typed_frame import normalize_columns
+
+SUPPORTED_EXTENSIONS = ('.csv', '.parquet')
+
+def discover_files(paths, recursive=False):
+    """Expands files, directories and glob patterns into a sorted list of input files."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            pattern = os.path.join(path, '**', '*') if recursive else os.path.join(path, '*')
+            candidates = glob.glob(pattern, recursive=recursive)
+        elif any(ch in path for ch in '*?['):
+            candidates = glob.glob(path, recursive=recursive)
+        else:
+            candidates = [path]
+        found.extend(
+            os.path.abspath(c) for c in candidates
+            if os.path.isfile(c) and c.lower().endswith(SUPPORTED_EXTENSIONS)
+        )
+    return sorted(set(found))
+
+def read_input(path):
+    """Reads a CSV or Parquet transaction file with canonical column names."""
+    if path.lower().endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    return normalize_columns(df)
+
+# Worker processes parse files and run detection, which never writes to the
+# database. All writes happen in the parent process, one file at a time, so
+# concurrent workers can never contend for the SQLite write lock. Detectors
+# that read state built at ingest (needs_history) run in the parent after
+# the file is ingested.
+_worker_pipeline = None
+
+def _init_worker(db_path):
+    global _worker_pipeline
+    # Files are already spread over processes; their source partitions run in-process
+    _worker_pipeline = DetectionPipeline(db_path, metrics=PipelineMetrics(db_path, enabled=False), partition_workers=1)
+
+def _analyze_file(path):
+    start = time.perf_counter()
+    df = read_input(path)
+    read_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = _worker_pipeline.detect_batch(df, needs_history=False)
+    return {
+        'df': df,
+        'results': results,
+        'read_seconds': read_seconds,
+        'detect_seconds': time.perf_counter() - start,
+    }
+
+def _only_transactions(results, rows):
+    if 'transaction_id' not in rows.columns:
+        return results
+    keep = set(rows['transaction_id'].astype(str))
+    return {name: [f for f in findings if str(f['transaction_id']) in keep] for name, findings in results.items()}
+
+def _process_result(path, outcome, loader, pipeline, source_name):
+    df, results = outcome['df'], dict(outcome['results'])
+
+    with pipeline.metrics.run(source=source_name) as run_id:
+        pipeline.metrics.add_stage('worker.read', outcome['read_seconds'], rows_out=len(df))
+        pipeline.metrics.add_stage('worker.detect', outcome['detect_seconds'], rows_in=len(df),
+                                   findings=sum(len(f) for f in results.values()))
+        new_rows = loader.ingest_new(df, source_name=source_name)
+        ingested = len(new_rows)
+        if ingested < len(df):
+            # Rows already stored were analyzed when they first arrived
+            results = _only_transactions(results, new_rows)
+        if ingested:
+            results.update(pipeline.detect_batch(new_rows, needs_history=True))
+            pipeline.save_batch(results)
+    findings_count = sum(len(f) for f in results.values())
+
+    return {
+        'path': path,
+        'status': 'completed',
+        'run_id': run_id,
+        'rows': len(df),
+        'ingested': ingested,
+        'findings': findings_count,
+        'findings_by_detector': {name: len(f) for name, f in results.items()},
+        'read_seconds': round(outcome['read_seconds'], 4),
+        'detect_seconds': round(outcome['detect_seconds'], 4),
+    }
+
+def run_batch(paths, db_path='anomalyguard.db', workers=None, enrich=False,
+              source_name='cli_batch', recursive=False, partition_workers=None):
+    """
+    Ingests and analyzes every input file, returning a machine-readable summary.
+    Files are parsed and analyzed in parallel; ingestion and findings are
+    written by this process in completion order. partition_workers
+    parallelizes the post-ingest detectors over each file's sources.
+    """
+    started_at = datetime.now()
+    start = time.perf_counter()
+    init_db(db_path)
+    pipeline = DetectionPipeline(db_path, partition_workers=partition_workers)
+    loader = DataLoader(db_path, metrics=pipeline.metrics)
+
+    files = discover_files(paths, recursive=recursive)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files) or 1))
+    file_summaries = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path,)) as pool:
+        futures = {pool.submit(_analyze_file, path): path for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                summary = _process_result(path, future.result(), loader, pipeline, source_name)
+            except Exception as e:
+                summary = {'path': path, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+            print(f"[{summary['status']}] {path}", file=sys.stderr)
+            file_summaries.append(summary)
+
+    enriched = None
+    if enrich:
+        enriched = pipeline.enrich_with_ai()
+
+    completed = [s for s in file_summaries if s['status'] == 'completed']
+    return {
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'seconds': round(time.perf_counter() - start, 3),
+        'db_path': db_path,
+        'workers': workers,
+        'files_total': len(files),
+        'files_completed': len(completed),
+        'files_failed': len(file_summaries) - len(completed),
+        'rows': sum(s['rows'] for s in completed),
+        'ingested': sum(s['ingested'] for s in completed),
+        'findings': sum(s['findings'] for s in completed),
+        'enriched': enriched,
+        'files': sorted(file_summaries, key=lambda s: s['path']),
+    }
+
+def _write_summary(summary, output):
+    text = json.dumps(summary, indent=2, default=str)
+    if output in (None, '-'):
+        print(text)
+    else:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+
+def _cmd_run(args):
+    summary = run_batch(
+        args.paths,
+        db_path=args.db,
+        workers=args.workers,
+        enrich=args.enrich,
+        source_name=args.source,
+        recursive=args.recursive,
+        partition_workers=args.partition_workers,
+    )
+    _write_summary(summary, args.summary)
+    if summary['files_total'] == 0:
+        print("No CSV or Parquet files found.", file=sys.stderr)
+        return 2
+    return 1 if summary['files_failed'] else 0
+
+def _cmd_stream(args):
+    init_db(args.db)
+    if args.command == 'watch':
+        os.makedirs(args.inbox, exist_ok=True)
+        source = InboxSource(args.db, args.inbox, chunk_rows=args.batch_size)
+    else:
+        source = TailSource(args.db, args.file, chunk_rows=args.batch_size)
+
+    StreamingPipeline(
+        args.db,
+        source,
+        source_name=args.source,
+        batch_rows=args.batch_size,
+        max_wait=args.max_wait,
+        poll_interval=args.poll_interval,
+        queue_size=args.queue_size,
+        enrich=args.enrich,
+    ).run(until_idle=args.once)
+    return 0
+
+def _split_names(values):
+    return [name.strip() for value in values or () for name in value.split(',') if name.strip()] or None
+
+def _cmd_export(args):
+    from utils.export import write_export
+    fmt = args.format or ('parquet' if args.output.lower().endswith('.parquet') else 'csv')
+    if args.output == '-' and fmt != 'csv':
+        print("Parquet exports need an output file.", file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    rows = write_export(
+        sys.stdout.buffer if args.output == '-' else args.output,
+        db_path=args.db,
+        kind=args.kind,
+        fmt=fmt,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        risk_levels=_split_names(args.risk_level),
+        detectors=_split_names(args.detector),
+        sources=_split_names(args.source),
+    )
+    print(f"Exported {rows} {args.kind} rows to {args.output} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+def _cmd_retention(args):
+    from database.retention import RetentionManager
+    init_db(args.db)
+    manager = RetentionManager(args.db, max_age_days=args.days, archive_path=args.archive)
+    report = manager.run(dry_run=args.dry_run, vacuum_pages=args.vacuum_pages)
+    print(json.dumps(report, indent=2))
+    return 0
+
+def _add_stream_options(parser):
+    parser.add_argument('--batch-size', type=int, default=5000, help="Rows per micro-batch")
+    parser.add_argument('--max-wait', type=float, default=10.0, help="Seconds before a partial micro-batch is processed")
+    parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds between checks for new data")
+    parser.add_argument('--queue-size', type=int, default=4, help="Bound of each queue between stages")
+    parser.add_argument('--enrich', action='store_true', help="Run LLM enrichment after each micro-batch")
+    parser.add_argument('--source', default='stream', help="Source name recorded on ingested rows")
+    parser.add_argument('--once', action='store_true', help="Exit once all available data is processed")
+    parser.set_defaults(func=_cmd_stream)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='anomalyguard', description="Headless AnomalyGuard runner.")
+    parser.add_argument('--db', default=os.getenv('ANOMALYGUARD_DB_URL', 'anomalyguard.db'),
+                        help="SQLite database path or SQLAlchemy URL (default: $ANOMALYGUARD_DB_URL or anomalyguard.db)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help="Ingest and analyze CSV/Parquet files")
+    run.add_argument('paths', nargs='+', help="Files, directories or glob patterns")
+    run.add_argument('--workers', type=int, default=None, help="Parallel worker processes (default: CPU count)")
+    run.add_argument('--enrich', action='store_true', help="Run LLM enrichment after detection")
+    run.add_argument('--source', default='cli_batch',
+                     help="Source name recorded on ingested rows without their own source/business_unit column")
+    run.add_argument('--partition-workers', type=int, default=None,
+                     help="Processes analyzing a file's sources in parallel (default: $ANOMALYGUARD_PARTITION_WORKERS or 1)")
+    run.add_argument('--recursive', action='store_true', help="Search directories recursively")
+    run.add_argument('--summary', default='-', help="Where to write the JSON run summary (default: stdout)")
+    run.set_defaults(func=_cmd_run)
+
+    watch = subparsers.add_parser('watch', help="Process files dropped into an inbox directory as they arrive")
+    watch.add_argument('inbox', help="Directory to watch for CSV/Parquet files")
+    _add_stream_options(watch)
+
+    tail = subparsers.add_parser('tail', help="Process rows appended to a CSV file as they arrive")
+    tail.add_argument('file', help="Append-only CSV file to follow")
+    _add_stream_options(tail)
+
+    export = subparsers.add_parser('export', help="Stream flagged findings or the review audit trail to CSV/Parquet")
+    export.add_argument('output', help="Output file (.csv or .parquet), or - for CSV on stdout")
+    export.add_argument('--kind', choices=['findings', 'audit'], default='findings',
+                        help="Detections with their transactions and LLM analysis, or review actions")
+    export.add_argument('--format', choices=['csv', 'parquet'], default=None, help="Default: from the output extension")
+    export.add_argument('--start-date', default=None, help="Earliest transaction date (inclusive)")
+    export.add_argument('--end-date', default=None, help="Latest transaction date (inclusive)")
+    export.add_argument('--risk-level', action='append', help="Only these risk levels (repeatable or comma-separated)")
+    export.add_argument('--detector', action='append', help="Only these detector names (repeatable or comma-separated)")
+    export.add_argument('--source', action='append', help="Only these sources (repeatable or comma-separated)")
+    export.set_defaults(func=_cmd_export)
+
+    retention = subparsers.add_parser('retention', help="Archive old resolved transactions and compact the database")
+    retention.add_argument('--days', type=int, default=None,
+                           help="Archive transactions older than this (default: $ANOMALYGUARD_RETENTION_DAYS or 365)")
+    retention.add_argument('--archive', default=None,
+                           help="Archive SQLite file (.db) or Parquet directory (default: $ANOMALYGUARD_ARCHIVE or <db>_archive.db)")
+    retention.add_argument('--dry-run', action='store_true', help="Only count the transactions that would be archived")
+    retention.add_argument('--vacuum-pages', type=int, default=None, help="Free at most this many pages (default: all)")
+    retention.set_defaults(func=_cmd_retention)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import threading
+from database.engine import PooledSQLiteConnection, get_engine
+
+_local = threading.local()
+
+def set_statement_listener(listener):
+    """
+    Registers a callback invoked for every SQL statement run on connections
+    opened by this thread. Pass None to stop listening.
+    """
+    _local.listener = listener
+
+def statement_listener():
+    """The callback registered by this thread, if any."""
+    return getattr(_local, 'listener', None)
+
+def _trace(statement):
+    # Looked up per statement, so a connection checked out before a stage
+    # began (or by the writer thread) reports to the listener active now
+    listener = getattr(_local, 'listener', None)
+    if listener is not None:
+        listener(statement)
+
+def connect(db_path='anomalyguard.db'):
+    """
+    Checks a connection to the AnomalyGuard database out of its pooled
+    engine (see database/engine.py); close() returns it to the pool.
+    SQLite databases run in WAL mode so readers never block the writer, and
+    writers wait up to engine.BUSY_TIMEOUT seconds for each other.
+    """
+    pooled = get_engine(db_path).raw_connection()
+    conn = pooled.driver_connection
+    if not isinstance(conn, PooledSQLiteConnection):
+        # Server backends: the pool's proxy returns the connection on close()
+        return pooled
+    conn._release = pooled.close
+    conn.set_trace_callback(_trace)
+    return conn
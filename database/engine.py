@@ -0,0 +1,149 @@
+import io
+import os
+import csv
+import sqlite3
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+
+# Seconds a connection waits on another writer's lock before raising
+BUSY_TIMEOUT = 30
+# Idle connections kept per database; more are opened on demand and closed on return
+POOL_SIZE = 5
+
+_engines = {}
+_bulk_writers = {}
+_lock = threading.Lock()
+
+def database_url(db_path='anomalyguard.db'):
+    """
+    SQLAlchemy URL for a database. db_path is either a SQLite file path or a
+    full URL (e.g. postgresql+psycopg://user@host/anomalyguard).
+    """
+    if '://' in str(db_path):
+        return str(db_path)
+    return f"sqlite:///{db_path}"
+
+def sqlite_path(db_path='anomalyguard.db'):
+    """File path of a SQLite database (':memory:' for in-memory ones), or None for other backends."""
+    url = make_url(database_url(db_path))
+    if url.get_backend_name() != 'sqlite':
+        return None
+    return url.database or ':memory:'
+
+class PooledSQLiteConnection(sqlite3.Connection):
+    """
+    sqlite3 connection whose close() hands it back to the engine's pool.
+    Being a real sqlite3.Connection, it works everywhere a plain connection
+    did (pandas, executescript, trace callbacks).
+    """
+    _release = None
+    _closing = False
+
+    def close(self):
+        if self._closing:
+            super().close()
+        elif self._release is not None:
+            release, self._release = self._release, None
+            release()
+
+def _sqlite_engine(url, path):
+    def create():
+        return sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                               factory=PooledSQLiteConnection)
+
+    if path == ':memory:':
+        # Every connection to :memory: would be a separate empty database
+        engine = create_engine(url, creator=create, poolclass=StaticPool)
+    else:
+        # Overflow is unbounded so nested connections in one thread never wait on the pool
+        engine = create_engine(url, creator=create, poolclass=QueuePool,
+                               pool_size=POOL_SIZE, max_overflow=-1)
+
+        @event.listens_for(engine, 'connect')
+        def enable_wal(dbapi_connection, connection_record):
+            # Readers never block the writer; the setting persists in the file
+            dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    @event.listens_for(engine, 'close')
+    def mark_closing(dbapi_connection, connection_record):
+        dbapi_connection._closing = True
+
+    return engine
+
+def get_engine(db_path='anomalyguard.db'):
+    """The pooled engine for a database, created once per process."""
+    url = database_url(db_path)
+    engine = _engines.get(url)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(url)
+            if engine is None:
+                path = sqlite_path(db_path)
+                if path is not None:
+                    engine = _sqlite_engine(url, path)
+                else:
+                    engine = create_engine(url, pool_size=POOL_SIZE, pool_pre_ping=True)
+                _engines[url] = engine
+    return engine
+
+def dispose_engines():
+    """Closes every pooled connection; engines are recreated on next use."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+def _forget_engines_in_child():
+    # A forked child must not share the parent's pooled connections
+    for engine in _engines.values():
+        engine.dispose(close=False)
+    _engines.clear()
+
+os.register_at_fork(after_in_child=_forget_engines_in_child)
+
+class BulkWriter:
+    """Bulk inserts through DB-API executemany; works on every backend."""
+
+    def __init__(self, placeholder='?'):
+        self.placeholder = placeholder
+
+    def insert(self, conn, table, columns, rows):
+        """Inserts rows (an iterable of tuples) into table. Does not commit."""
+        placeholders = ', '.join(self.placeholder for _ in columns)
+        cursor = conn.cursor()
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+class PostgresBulkWriter(BulkWriter):
+    """Bulk inserts through COPY ... FROM STDIN (psycopg 3 or psycopg2)."""
+
+    def __init__(self):
+        super().__init__('%s')
+
+    def insert(self, conn, table, columns, rows):
+        statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        cursor = conn.cursor()
+        if hasattr(cursor, 'copy'):
+            with cursor.copy(statement) as copy:
+                for row in rows:
+                    copy.write_row(row)
+            return
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+
+def bulk_writer(db_path='anomalyguard.db'):
+    """The bulk insert path for a database's backend."""
+    url = database_url(db_path)
+    writer = _bulk_writers.get(url)
+    if writer is None:
+        dialect = get_engine(db_path).dialect
+        if dialect.name == 'postgresql':
+            writer = PostgresBulkWriter()
+        else:
+            writer = BulkWriter('?' if dialect.paramstyle == 'qmark' else '%s')
+        _bulk_writers[url] = writer
+    return writer
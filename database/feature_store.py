@@ -0,0 +1,287 @@
+import os
+import json
+import uuid
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from database.connection import connect
+from database.engine import sqlite_path
+from utils.typed_frame import to_typed_frame, amounts_as_float, RAW_SUFFIX
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Raw columns parsed into features; weekday is derived from transaction_date
+SOURCE_COLUMNS = ['id', 'transaction_id', 'source', 'transaction_date', 'amount', 'vendor_name', 'transaction_type']
+FEATURE_COLUMNS = SOURCE_COLUMNS + ['weekday', 'transaction_date' + RAW_SUFFIX, 'amount' + RAW_SUFFIX]
+# Segments are merged into one file once there are more than this many
+MAX_SEGMENTS = 16
+REBUILD_CHUNK_ROWS = 100_000
+MANIFEST = 'manifest.json'
+LOCK_FILE = 'manifest.lock'
+
+# Threads of one process share the file lock's descriptor, so they also queue here
+_lock = threading.Lock()
+
+@contextmanager
+def _locked(root):
+    """
+    Exclusive access to the cache under root, across threads and processes
+    (e.g. a CLI ingest while the app or a stream is running), through an
+    OS lock on a lockfile next to the manifest.
+    """
+    with _lock:
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, LOCK_FILE), 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        # LK_LOCK gives up after about 10 seconds; keep waiting
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def default_feature_root(db_path):
+    """Places the feature cache next to the database, e.g. anomalyguard_features/."""
+    base, _ = os.path.splitext(os.path.abspath(sqlite_path(db_path) or 'anomalyguard'))
+    return f"{base}_features"
+
+class FeatureStore:
+    """
+    Parsed transaction features cached as uncompressed Arrow IPC files.
+
+    update() runs as an ingest hook: rows added to monitored_transactions
+    since the last update (by row id) are parsed once into a new segment.
+    read() memory-maps the segments and hands detectors a typed frame, so
+    repeated runs and re-scoring never parse dates, amounts or categories
+    again. The manifest records how many rows and which highest row id the
+    segments cover; when rows were removed from the database (retention),
+    the cache is rebuilt on the next update or read. Updates and reads hold
+    a lock on manifest.lock, so processes sharing the cache never append
+    the same rows twice or read a manifest mid-rebuild.
+
+    Requires pyarrow; disable with ANOMALYGUARD_FEATURES=0.
+    """
+
+    def __init__(self, db_path='anomalyguard.db', root=None):
+        self.db_path = db_path
+        self.root = root or os.getenv('ANOMALYGUARD_FEATURE_DIR') or default_feature_root(db_path)
+        self.enabled = pa is not None and os.getenv('ANOMALYGUARD_FEATURES', '1') != '0'
+
+    def _manifest(self):
+        try:
+            with open(os.path.join(self.root, MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'segments': [], 'rows': 0, 'max_id': 0, 'last_transaction_id': None}
+
+    def _save_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        # Readers see either the old or the new segment list, never a partial one
+        os.replace(temp_path, path)
+
+    def _database_state(self, conn, manifest):
+        """(row count, highest row id, transaction id now stored at the manifest's highest row id)."""
+        rows, max_id = conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM monitored_transactions").fetchone()
+        last = conn.execute("SELECT transaction_id FROM monitored_transactions WHERE id = ?",
+                            (manifest['max_id'],)).fetchone()
+        return rows, max_id, last[0] if last else None
+
+    def update(self, batch=None, source_name=None):
+        """Parses rows ingested since the last update into a new segment. Returns the rows added."""
+        if not self.enabled:
+            return 0
+        with _locked(self.root):
+            # The manifest is re-read under the lock, so another process's segments are seen
+            return self._refresh()
+
+    def _refresh(self):
+        manifest = self._manifest()
+        conn = connect(self.db_path)
+        try:
+            rows, max_id, last = self._database_state(conn, manifest)
+            unchanged = last == manifest.get('last_transaction_id')
+            if unchanged and manifest['rows'] == rows and manifest['max_id'] == max_id:
+                return 0
+            query = f"SELECT {', '.join(SOURCE_COLUMNS)} FROM monitored_transactions WHERE id > ? ORDER BY id"
+            new_rows = pd.read_sql_query(query, conn, params=[manifest['max_id']])
+        finally:
+            conn.close()
+
+        if not unchanged or manifest['rows'] + len(new_rows) != rows:
+            # Rows were removed, or the path now holds another database: start over
+            return self._rebuild()
+        if new_rows.empty:
+            return 0
+        manifest['segments'].append(self._write_segment(self._features(new_rows)))
+        manifest['rows'] += len(new_rows)
+        manifest['max_id'] = int(new_rows['id'].iloc[-1])
+        manifest['last_transaction_id'] = str(new_rows['transaction_id'].iloc[-1])
+        if len(manifest['segments']) > MAX_SEGMENTS:
+            self._compact(manifest)
+        self._save_manifest(manifest)
+        return len(new_rows)
+
+    def rebuild(self):
+        """Re-parses every row of monitored_transactions into fresh segments."""
+        if not self.enabled:
+            print("Feature cache is disabled (pyarrow missing or ANOMALYGUARD_FEATURES=0).")
+            return 0
+        with _locked(self.root):
+            rows = self._rebuild()
+        print(f"Rebuilt feature cache for {rows} transactions in {self.root}.")
+        return rows
+
+    def _rebuild(self):
+        old = self._manifest()['segments']
+        manifest = {'segments': [], 'rows': 0, 'max_id': 0, 'last_transaction_id': None}
+        conn = connect(self.db_path)
+        try:
+            query = f"SELECT {', '.join(SOURCE_COLUMNS)} FROM monitored_transactions ORDER BY id"
+            for chunk in pd.read_sql_query(query, conn, chunksize=REBUILD_CHUNK_ROWS):
+                manifest['segments'].append(self._write_segment(self._features(chunk)))
+                manifest['rows'] += len(chunk)
+                manifest['max_id'] = int(chunk['id'].iloc[-1])
+                manifest['last_transaction_id'] = str(chunk['transaction_id'].iloc[-1])
+        finally:
+            conn.close()
+        self._save_manifest(manifest)
+        self._remove_segments(old)
+        return manifest['rows']
+
+    def _features(self, chunk):
+        """Arrow table of typed features for rows read from monitored_transactions."""
+        typed = to_typed_frame(chunk)
+        dates = typed['transaction_date']
+        columns = {
+            'id': pa.array(chunk['id'].to_numpy(dtype='int64')),
+            'transaction_id': pa.array(chunk['transaction_id'].astype(str).to_numpy(dtype=object), pa.string()),
+            'source': pa.array(chunk['source'].astype(object).to_numpy(), pa.string()).dictionary_encode(),
+            'transaction_date': pa.array(dates.to_numpy(dtype='datetime64[us]'), pa.timestamp('us')),
+            'amount': pa.array(amounts_as_float(typed['amount']).to_numpy(), pa.float64()),
+            'vendor_name': pa.array(chunk['vendor_name'].astype(object).to_numpy(), pa.string()).dictionary_encode(),
+            'transaction_type': pa.array(chunk['transaction_type'].astype(object).to_numpy(), pa.string()).dictionary_encode(),
+            'weekday': pa.array(dates.dt.weekday.astype('Int8'), pa.int8()),
+        }
+        for column in ('transaction_date', 'amount'):
+            raw_column = column + RAW_SUFFIX
+            raw = typed[raw_column].astype(object) if raw_column in typed.columns else pd.Series(None, index=typed.index, dtype=object)
+            columns[raw_column] = pa.array(raw.where(raw.notna(), None).to_numpy(), pa.string())
+        return pa.table(columns)
+
+    def _write_segment(self, table):
+        os.makedirs(self.root, exist_ok=True)
+        name = f"segment-{uuid.uuid4().hex}.arrow"
+        with pa.OSFile(os.path.join(self.root, name), 'wb') as sink:
+            # Uncompressed, so reads map the file instead of decoding it
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        return name
+
+    def _compact(self, manifest):
+        tables = [self._open_segment(name) for name in manifest['segments']]
+        merged = pa.concat_tables(tables, promote_options='permissive').unify_dictionaries().combine_chunks()
+        old, manifest['segments'] = manifest['segments'], [self._write_segment(merged)]
+        self._save_manifest(manifest)
+        self._remove_segments(old)
+
+    def _remove_segments(self, names):
+        for name in names:
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                # Still mapped by a reader on a platform that forbids removing it
+                pass
+
+    def _open_segment(self, name):
+        return pa.ipc.open_file(pa.memory_map(os.path.join(self.root, name))).read_all()
+
+    def read(self, columns=None, start_date=None, end_date=None, sources=None):
+        """
+        Typed frame of the cached features, refreshed first if the database
+        changed, optionally only of the given sources. Date bounds are
+        inclusive; rows without a parsable date are only returned by
+        unbounded reads.
+        """
+        with _locked(self.root):
+            self._refresh()
+            manifest = self._manifest()
+            tables = [self._open_segment(name) for name in manifest['segments']]
+
+        wanted = [c for c in (columns or FEATURE_COLUMNS) if c in FEATURE_COLUMNS]
+        for column in ('transaction_date', 'amount'):
+            # Unparsable originals travel with their column, as in to_typed_frame()
+            if column in wanted:
+                wanted.append(column + RAW_SUFFIX)
+        if 'transaction_date' in wanted and 'weekday' not in wanted:
+            wanted.append('weekday')
+        if not tables:
+            return self._empty(wanted)
+        bounded = start_date is not None or end_date is not None
+        filtered = (['transaction_date'] if bounded else []) + (['source'] if sources else [])
+        selected = wanted + [c for c in filtered if c not in wanted]
+        table = pa.concat_tables([t.select(selected) for t in tables], promote_options='permissive')
+
+        masks = []
+        dates = table.column('transaction_date') if bounded else None
+        if start_date is not None:
+            masks.append(pc.greater_equal(dates, pa.scalar(pd.Timestamp(start_date).normalize(), pa.timestamp('us'))))
+        if end_date is not None:
+            masks.append(pc.less(dates, pa.scalar(pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1), pa.timestamp('us'))))
+        if sources:
+            masks.append(pc.is_in(table.column('source'), value_set=pa.array([str(s) for s in sources], pa.string())))
+        if masks:
+            mask = masks[0]
+            for other in masks[1:]:
+                mask = pc.and_(mask, other)
+            table = table.filter(mask).select(wanted)
+
+        df = table.to_pandas()
+        for column in (c + RAW_SUFFIX for c in ('transaction_date', 'amount')):
+            if column in df.columns and df[column].isna().all():
+                df = df.drop(columns=column)
+            elif column in df.columns:
+                df[column] = df[column].astype('category')
+        df.attrs['typed'] = True
+        return df
+
+    @staticmethod
+    def _empty(columns):
+        df = pd.DataFrame(columns=[c for c in columns if not c.endswith(RAW_SUFFIX)])
+        df.attrs['typed'] = True
+        return df
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Rebuild the parsed feature cache from stored transactions.")
+    parser.add_argument('--db', default='anomalyguard.db', help="Path to the SQLite database")
+    args = parser.parse_args()
+    FeatureStore(args.db).rebuild()
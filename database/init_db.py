@@ -1,20 +1,71 @@
-import sqlite3
 import os
+import importlib
+from database.connection import connect
+from database.engine import sqlite_path
 
-def init_db(db_path='anomalyguard.db', schema_path='database/schema.sql'):
-    """Initializes the database using the schema file."""
-    # Check if tables exist
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='monitored_transactions'")
-        if cursor.fetchone():
-            return
-
-    print(f"Initializing database at {db_path}...")
-    with sqlite3.connect(db_path) as conn:
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+# Columns added to existing tables after their first release. CREATE TABLE IF
+# NOT EXISTS leaves old tables alone, so these are added with ALTER TABLE.
+ADDED_COLUMNS = [
+    ('monitored_transactions', 'risk_score', 'REAL'),
+    ('anomaly_detections', 'llm_risk_modifier', 'REAL'),
+    ('anomaly_detections', 'finding_key', 'TEXT'),
+    ('anomaly_detections', 'risk_level', 'TEXT'),
+]
+
+# Aggregate tables rebuilt from monitored_transactions whose key gained a
+# column: an older table lacking it is dropped, recreated by the schema and
+# refilled by its store's rebuild()
+REKEYED_TABLES = {
+    'vendor_profiles': ('source', 'analyzers.vendor_profiles', 'VendorProfileStore'),
+    'vendor_category_stats': ('source', 'analyzers.vendor_profiles', 'VendorProfileStore'),
+    'benford_digit_counts': ('source', 'analyzers.digit_histograms', 'DigitHistogramStore'),
+    'daily_spend': ('source', 'analyzers.spend_velocity', 'SpendVelocityStore'),
+    # Covariance models are refitted on demand, so dropping them is enough
+    'covariance_models': ('source', None, None),
+}
+
+def init_db(db_path='anomalyguard.db', schema_path=SCHEMA_PATH):
+    """Initializes the database using the schema file.
+
+    The schema only uses CREATE ... IF NOT EXISTS, so running it against an
+    existing database adds any tables introduced since it was created;
+    columns added to existing tables are listed in ADDED_COLUMNS, and
+    aggregate tables whose key changed in REKEYED_TABLES.
+    """
+    path = sqlite_path(db_path)
+    is_new = path is not None and not os.path.exists(path)
+    if is_new:
+        print(f"Initializing database at {db_path}...")
+
+    conn = connect(db_path)
+    if is_new:
+        # Lets retention hand freed pages back with PRAGMA incremental_vacuum;
+        # the (still empty) file has to be vacuumed for the mode to apply
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    stale_stores = set()
+    with conn:
+        for table, (column, module, store) in REKEYED_TABLES.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if existing and column not in existing:
+                conn.execute(f"DROP TABLE {table}")
+                if module is not None:
+                    stale_stores.add((module, store))
         with open(schema_path, 'r') as f:
             conn.executescript(f.read())
-    print("Database initialization complete.")
+        for table, column, column_type in ADDED_COLUMNS:
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    conn.close()
+
+    for module, store in sorted(stale_stores):
+        getattr(importlib.import_module(module), store)(db_path).rebuild()
+
+    if is_new:
+        print("Database initialization complete.")
 
 if __name__ == "__main__":
     # Ensure we are in the project root
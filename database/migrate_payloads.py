@@ -0,0 +1,61 @@
+import os
+import json
+import argparse
+from database.connection import connect
+from utils.payload import PayloadCodec
+
+def migrate_payloads(db_path='anomalyguard.db', batch_size=5000, vacuum=True):
+    """
+    Rewrites legacy JSON data_json payloads in the compact format.
+    Rows are converted in batches, grouped by source and column layout, so the
+    tool can be interrupted and re-run; already-compact rows are skipped.
+    """
+    size_before = os.path.getsize(db_path)
+    codec = PayloadCodec()
+    conn = connect(db_path)
+    converted = 0
+    last_id = 0
+
+    while True:
+        rows = conn.execute("""
+            SELECT id, source, data_json FROM monitored_transactions
+            WHERE id > ? AND typeof(data_json) = 'text'
+            ORDER BY id LIMIT ?
+        """, (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        groups = {}
+        for row_id, source_name, data_json in rows:
+            record = json.loads(data_json)
+            key = (source_name, tuple(record.keys()))
+            groups.setdefault(key, []).append((row_id, list(record.values())))
+
+        updates = []
+        for (source_name, columns), members in groups.items():
+            payloads = codec.encode_rows(conn, source_name, list(columns), [values for _, values in members])
+            updates.extend((payload, row_id) for payload, (row_id, _) in zip(payloads, members))
+
+        conn.executemany("UPDATE monitored_transactions SET data_json = ? WHERE id = ?", updates)
+        conn.commit()
+        converted += len(updates)
+        print(f"Converted {converted} payloads...")
+
+    if vacuum and converted:
+        print("Reclaiming free pages (VACUUM)...")
+        conn.execute("VACUUM")
+    conn.close()
+
+    size_after = os.path.getsize(db_path)
+    print(f"Done. {converted} payloads converted; database size "
+          f"{size_before / 1_048_576:.1f} MB -> {size_after / 1_048_576:.1f} MB.")
+    return converted
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert data_json payloads to the compact format.")
+    parser.add_argument('--db', default='anomalyguard.db', help="Path to the SQLite database")
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--no-vacuum', action='store_true', help="Skip VACUUM after converting")
+    args = parser.parse_args()
+    migrate_payloads(args.db, args.batch_size, vacuum=not args.no_vacuum)
@@ -0,0 +1,191 @@
+import os
+import re
+import uuid
+import pandas as pd
+from database.connection import connect
+from database.engine import sqlite_path
+from database.feature_store import FeatureStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Columns kept in the columnar tier; source and month are Hive partition keys
+HISTORY_COLUMNS = ['transaction_id', 'transaction_date', 'amount', 'vendor_name', 'transaction_type']
+PARTITION_COLUMNS = ['source', 'month']
+
+def default_history_root(db_path):
+    """Places the Parquet history next to the database, e.g. anomalyguard_history/."""
+    base, _ = os.path.splitext(os.path.abspath(sqlite_path(db_path) or 'anomalyguard'))
+    return f"{base}_history"
+
+def _partition_value(value):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(value)) or 'unknown'
+
+class ParquetStore:
+    """
+    Columnar storage tier for transaction history.
+
+    Ingested batches are written as Parquet files partitioned by source and
+    month (root/source=<src>/month=<YYYY-MM>/part-*.parquet). SQLite remains
+    the home of workflow state; this tier serves analytics-style scans, which
+    read only the requested columns through memory-mapped Arrow with the
+    date range pushed down to partition pruning and row-group statistics.
+
+    The parsed feature cache (database/feature_store.py) serves the same
+    scans already typed, so the tier is only written and read while that
+    cache is disabled. Requires pyarrow; disable with ANOMALYGUARD_COLUMNAR=0.
+    """
+
+    def __init__(self, db_path='anomalyguard.db', root=None):
+        self.db_path = db_path
+        self.root = root or os.getenv('ANOMALYGUARD_HISTORY_DIR') or default_history_root(db_path)
+        self.enabled = (pa is not None and os.getenv('ANOMALYGUARD_COLUMNAR', '1') != '0'
+                        and not FeatureStore(db_path).enabled)
+        self._schema = pa.schema([
+            ('transaction_id', pa.string()),
+            ('transaction_date', pa.string()),
+            ('amount', pa.float64()),
+            ('vendor_name', pa.string()),
+            ('transaction_type', pa.string()),
+        ]) if pa is not None else None
+
+    def write_batch(self, df, source_name='csv_upload'):
+        """Appends a batch of already-ingested rows, one file per month partition."""
+        if not self.enabled or df.empty:
+            return 0
+
+        batch = pd.DataFrame({
+            'transaction_id': df['transaction_id'].astype(str),
+            'transaction_date': df['transaction_date'].astype('string'),
+            'amount': pd.to_numeric(df['amount'], errors='coerce'),
+            'vendor_name': df['vendor_name'].astype('string'),
+            'transaction_type': df['transaction_type'].astype('string'),
+        })
+        months = pd.to_datetime(batch['transaction_date'], errors='coerce').dt.strftime('%Y-%m')
+        months = months.fillna('unknown')
+
+        source_dir = os.path.join(self.root, f"source={_partition_value(source_name)}")
+        part_name = f"part-{uuid.uuid4().hex}.parquet"
+        for month, group in batch.groupby(months, sort=False):
+            month_dir = os.path.join(source_dir, f"month={month}")
+            os.makedirs(month_dir, exist_ok=True)
+            # Sorting by date keeps row-group min/max statistics tight for pushdown
+            table = pa.Table.from_pandas(
+                group.sort_values('transaction_date'), schema=self._schema, preserve_index=False
+            )
+            pq.write_table(table, os.path.join(month_dir, part_name))
+        return len(batch)
+
+    def has_data(self):
+        if not self.enabled or not os.path.isdir(self.root):
+            return False
+        for _, _, files in os.walk(self.root):
+            if any(f.endswith('.parquet') for f in files):
+                return True
+        return False
+
+    def _dataset(self):
+        return ds.dataset(
+            self.root,
+            format='parquet',
+            partitioning=ds.partitioning(
+                pa.schema([('source', pa.string()), ('month', pa.string())]), flavor='hive'
+            ),
+            filesystem=pafs.LocalFileSystem(use_mmap=True),
+        )
+
+    def count_rows(self):
+        """Row count from Parquet footers, without reading any column data."""
+        if not self.has_data():
+            return 0
+        return self._dataset().count_rows()
+
+    def read(self, columns=None, start_date=None, end_date=None, sources=None):
+        """
+        Reads history as a DataFrame.
+        Date bounds are inclusive; None leaves the bound open. Rows whose date
+        could not be parsed are only returned by unbounded reads.
+        """
+        dataset = self._dataset()
+        columns = [c for c in (columns or HISTORY_COLUMNS + PARTITION_COLUMNS) if c in dataset.schema.names]
+
+        expr = None
+        def _and(left, right):
+            return right if left is None else left & right
+
+        if start_date is not None:
+            start_date = pd.Timestamp(start_date)
+            expr = _and(expr, ds.field('month') >= start_date.strftime('%Y-%m'))
+            expr = _and(expr, ds.field('transaction_date') >= start_date.strftime('%Y-%m-%d'))
+        if end_date is not None:
+            end_date = pd.Timestamp(end_date)
+            next_day = end_date + pd.Timedelta(days=1)
+            expr = _and(expr, ds.field('month') <= end_date.strftime('%Y-%m'))
+            # Dates may carry a time part, so compare against the following day
+            expr = _and(expr, ds.field('transaction_date') < next_day.strftime('%Y-%m-%d'))
+        if sources:
+            expr = _and(expr, ds.field('source').isin([_partition_value(s) for s in sources]))
+
+        table = dataset.to_table(columns=columns, filter=expr)
+        return table.to_pandas()
+
+    def remove(self, transaction_ids, months=None):
+        """
+        Drops rows of the given transactions (e.g. once retention archived
+        them), rewriting the part files that hold them. `months` limits the
+        scan to those month partitions plus 'unknown'. Returns rows removed.
+        """
+        if not transaction_ids or not self.has_data():
+            return 0
+        value_set = pa.array(sorted({str(t) for t in transaction_ids}), pa.string())
+        wanted = None if months is None else {f"month={m}" for m in months} | {"month=unknown"}
+        removed = 0
+        for dirpath, _, files in os.walk(self.root):
+            if wanted is not None and os.path.basename(dirpath) not in wanted:
+                continue
+            for name in files:
+                if not name.endswith('.parquet'):
+                    continue
+                path = os.path.join(dirpath, name)
+                table = pq.read_table(path)
+                kept = table.filter(pc.invert(pc.is_in(table.column('transaction_id'), value_set=value_set)))
+                if kept.num_rows == table.num_rows:
+                    continue
+                removed += table.num_rows - kept.num_rows
+                if kept.num_rows == 0:
+                    os.remove(path)
+                    continue
+                # Replaced in one rename so readers never see a partial file
+                temp_path = os.path.join(dirpath, f".{name}.tmp")
+                pq.write_table(kept, temp_path)
+                os.replace(temp_path, path)
+        return removed
+
+    def backfill(self):
+        """Copies rows already in SQLite into the columnar tier (run once when enabling it)."""
+        if not self.enabled:
+            print("Columnar storage is disabled (pyarrow missing, ANOMALYGUARD_COLUMNAR=0, "
+                  "or the feature cache is enabled).")
+            return 0
+        if self.has_data():
+            print(f"{self.root} already contains data; skipping backfill.")
+            return 0
+
+        conn = connect(self.db_path)
+        written = 0
+        query = "SELECT source, " + ", ".join(HISTORY_COLUMNS) + " FROM monitored_transactions"
+        for chunk in pd.read_sql_query(query, conn, chunksize=100_000):
+            for source_name, group in chunk.groupby(chunk['source'].fillna('unknown'), sort=False):
+                written += self.write_batch(group, source_name)
+        conn.close()
+        print(f"Backfilled {written} transactions into {self.root}.")
+        return written
+
+if __name__ == "__main__":
+    ParquetStore().backfill()
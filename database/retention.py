@@ -0,0 +1,306 @@
+import os
+import json
+import uuid
+import pandas as pd
+from datetime import datetime, timedelta
+from database.connection import connect
+from database.engine import sqlite_path
+from database.parquet_store import ParquetStore
+from database.writer import get_writer
+from utils.payload import get_codec
+
+# Transactions older than this many days are archived once nothing is pending on them
+DEFAULT_MAX_AGE_DAYS = 365
+# Transactions moved per transaction; other writers get the lock in between
+RETENTION_CHUNK_ROWS = 5000
+# Statuses that mean no detection on the transaction awaits review
+RESOLVED_STATUSES = ('clean', 'reviewed')
+# Tables moved with their transaction, oldest dependency last
+ARCHIVED_TABLES = ('review_actions', 'anomaly_detections', 'monitored_transactions')
+
+def default_archive_path(db_path):
+    """Places the archive next to the database, e.g. anomalyguard_archive.db."""
+    base, _ = os.path.splitext(os.path.abspath(sqlite_path(db_path) or 'anomalyguard'))
+    return f"{base}_archive.db"
+
+class RetentionManager:
+    """
+    Moves old, resolved transactions with their detections and review
+    actions out of the working database, into an archive SQLite database
+    (path ending in .db/.sqlite) or a directory of Parquet files.
+
+    Before rows leave, their per-month amounts are added to
+    transaction_summaries; vendor profiles and digit histograms are
+    cumulative and keep counting archived rows, so baselines survive.
+    Archived rows also leave the Parquet history tier, which mirrors the
+    working database. read_archive() reads them back on demand.
+    """
+
+    def __init__(self, db_path='anomalyguard.db', max_age_days=None, archive_path=None,
+                 chunk_rows=RETENTION_CHUNK_ROWS):
+        self.db_path = db_path
+        self.max_age_days = int(max_age_days if max_age_days is not None
+                                else os.getenv('ANOMALYGUARD_RETENTION_DAYS', DEFAULT_MAX_AGE_DAYS))
+        self.archive_path = archive_path or os.getenv('ANOMALYGUARD_ARCHIVE') or default_archive_path(db_path)
+        self.chunk_rows = chunk_rows
+
+    @property
+    def archive_is_sqlite(self):
+        return self.archive_path.lower().endswith(('.db', '.sqlite', '.sqlite3'))
+
+    def cutoff(self):
+        return (datetime.now() - timedelta(days=self.max_age_days)).strftime('%Y-%m-%d')
+
+    def _eligible_query(self):
+        placeholders = ', '.join('?' for _ in RESOLVED_STATUSES)
+        return f"""
+            SELECT transaction_id FROM main.monitored_transactions
+            WHERE COALESCE(transaction_date, ingestion_timestamp) < ?
+              AND status IN ({placeholders})
+        """, [self.cutoff(), *RESOLVED_STATUSES]
+
+    def count_eligible(self):
+        query, params = self._eligible_query()
+        conn = connect(self.db_path)
+        count = conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+        conn.close()
+        return count
+
+    def run(self, dry_run=False, vacuum_pages=None):
+        """
+        Archives every eligible transaction in chunks, then returns freed
+        pages to the file system. Returns a report dict.
+        """
+        report = {
+            'cutoff': self.cutoff(),
+            'archive': self.archive_path,
+            'eligible': self.count_eligible(),
+            'archived': 0,
+            'detections_archived': 0,
+            'review_actions_archived': 0,
+        }
+        if dry_run or report['eligible'] == 0:
+            return report
+
+        if self.archive_is_sqlite:
+            self._sync_archive()
+        else:
+            os.makedirs(self.archive_path, exist_ok=True)
+
+        writer = get_writer(self.db_path)
+        archived_ids, months = [], set()
+        while True:
+            # Each chunk is one writer transaction; other writers get the lock in between
+            moved, chunk_ids, chunk_months = writer.run(self._move_chunk)
+            if moved['monitored_transactions'] == 0:
+                break
+            archived_ids.extend(chunk_ids)
+            months.update(chunk_months)
+            report['archived'] += moved['monitored_transactions']
+            report['detections_archived'] += moved['anomaly_detections']
+            report['review_actions_archived'] += moved['review_actions']
+
+        # The Parquet history tier mirrors live rows only; archived rows are read via read_archive()
+        ParquetStore(self.db_path).remove(archived_ids, months=months)
+        report['pages_freed'] = self.compact(vacuum_pages)
+        return report
+
+    def _move_chunk(self, conn):
+        """Writer job: archives and deletes the next chunk of eligible transactions."""
+        query, params = self._eligible_query()
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS retention_ids (transaction_id TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM retention_ids")
+        conn.execute(f"INSERT INTO retention_ids {query} LIMIT ?", [*params, self.chunk_rows])
+        ids = [row[0] for row in conn.execute("SELECT transaction_id FROM retention_ids")]
+        if not ids:
+            return dict.fromkeys(ARCHIVED_TABLES, 0), [], set()
+        months = {row[0] for row in conn.execute(
+            "SELECT DISTINCT substr(transaction_date, 1, 7) FROM main.monitored_transactions "
+            "WHERE transaction_id IN (SELECT transaction_id FROM retention_ids)"
+        ) if row[0]}
+
+        self._summarize(conn)
+        moved = {}
+        where = "transaction_id IN (SELECT transaction_id FROM retention_ids)"
+        for table in ARCHIVED_TABLES:
+            if self.archive_is_sqlite:
+                self._write_sqlite_archive(conn, table, where)
+            else:
+                self._write_parquet(conn, table, where)
+            moved[table] = conn.execute(f"DELETE FROM main.{table} WHERE {where}").rowcount
+        return moved, ids, months
+
+    def _summarize(self, conn):
+        conn.execute("""
+            INSERT INTO transaction_summaries
+            (month, source, vendor_name, transaction_type, transaction_count, amount_count,
+             amount_sum, amount_sum_sq, amount_min, amount_max, detection_count)
+            SELECT COALESCE(substr(mt.transaction_date, 1, 7), 'unknown'), COALESCE(mt.source, ''),
+                   COALESCE(mt.vendor_name, ''), COALESCE(mt.transaction_type, ''),
+                   COUNT(*), COUNT(mt.amount), COALESCE(SUM(mt.amount), 0),
+                   COALESCE(SUM(mt.amount * mt.amount), 0), MIN(mt.amount), MAX(mt.amount),
+                   COALESCE(SUM(d.detections), 0)
+            FROM main.monitored_transactions mt
+            LEFT JOIN (
+                SELECT transaction_id, COUNT(*) AS detections FROM main.anomaly_detections
+                WHERE transaction_id IN (SELECT transaction_id FROM retention_ids)
+                GROUP BY transaction_id
+            ) d ON d.transaction_id = mt.transaction_id
+            WHERE mt.transaction_id IN (SELECT transaction_id FROM retention_ids)
+            GROUP BY 1, 2, 3, 4
+            ON CONFLICT(month, source, vendor_name, transaction_type) DO UPDATE SET
+                transaction_count = transaction_count + excluded.transaction_count,
+                amount_count = amount_count + excluded.amount_count,
+                amount_sum = amount_sum + excluded.amount_sum,
+                amount_sum_sq = amount_sum_sq + excluded.amount_sum_sq,
+                amount_min = MIN(COALESCE(amount_min, excluded.amount_min), COALESCE(excluded.amount_min, amount_min)),
+                amount_max = MAX(COALESCE(amount_max, excluded.amount_max), COALESCE(excluded.amount_max, amount_max)),
+                detection_count = detection_count + excluded.detection_count,
+                updated_at = CURRENT_TIMESTAMP
+        """)
+
+    def _sync_archive(self):
+        """Creates the archive tables, adding columns the working tables have gained since."""
+        conn = connect(self.db_path)
+        archive = connect(self.archive_path)
+        try:
+            for table in ARCHIVED_TABLES:
+                columns = conn.execute(f"SELECT name, type FROM pragma_table_info('{table}', 'main')").fetchall()
+                definition = ', '.join(f"{column} {column_type}" for column, column_type in columns)
+                archive.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definition})")
+                existing = set(_columns(archive, 'main', table))
+                for column, column_type in columns:
+                    if column not in existing:
+                        archive.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                archive.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_transaction ON {table}(transaction_id)")
+                # Lets a chunk whose working-database transaction rolled back be copied again
+                archive.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_id ON {table}(id)")
+            archive.commit()
+        finally:
+            archive.close()
+            conn.close()
+
+    def _write_sqlite_archive(self, conn, table, where):
+        # The writer connection is inside a transaction, where SQLite cannot ATTACH, so
+        # rows are copied over a connection of the archive's own. The archive commits
+        # first: a rollback here leaves copies that the next run replaces by id.
+        cursor = conn.execute(f"SELECT * FROM main.{table} WHERE {where}")
+        columns = [d[0] for d in cursor.description]
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        archive = connect(self.archive_path)
+        try:
+            archive.executemany(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})", rows
+            )
+            archive.commit()
+        finally:
+            archive.close()
+
+    def _write_parquet(self, conn, table, where):
+        frame = pd.read_sql_query(f"SELECT * FROM main.{table} WHERE {where}", conn)
+        if frame.empty:
+            return
+        if 'data_json' in frame.columns:
+            # Stored as JSON text so the archive does not depend on payload_schemas
+            codec = get_codec(self.db_path)
+            frame['data_json'] = [json.dumps(codec.decode(conn, raw), default=str) for raw in frame['data_json']]
+        table_dir = os.path.join(self.archive_path, table)
+        os.makedirs(table_dir, exist_ok=True)
+        frame.to_parquet(os.path.join(table_dir, f"part-{uuid.uuid4().hex}.parquet"), index=False)
+
+    def compact(self, pages=None):
+        """
+        Returns free pages to the file system with PRAGMA incremental_vacuum
+        (all of them, or at most `pages`). Databases created before
+        incremental auto-vacuum was enabled are converted with one full VACUUM.
+        Returns the number of pages freed.
+        """
+        path = sqlite_path(self.db_path)
+        if path is None or path == ':memory:':
+            return 0
+        conn = connect(self.db_path)
+        try:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # VACUUM cannot run inside the writer's transaction; it takes the lock itself
+                before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        finally:
+            conn.close()
+        return get_writer(self.db_path).run(_incremental_vacuum, int(pages) if pages else None)
+
+    def read_archive(self, table='monitored_transactions', transaction_ids=None, start_date=None, end_date=None):
+        """
+        Reads archived rows of a table, optionally restricted to transactions
+        and an inclusive transaction-date range (monitored_transactions only).
+        """
+        if table not in ARCHIVED_TABLES:
+            raise ValueError(f"Unknown archived table {table!r}")
+        if self.archive_is_sqlite:
+            return self._read_sqlite_archive(table, transaction_ids, start_date, end_date)
+
+        table_dir = os.path.join(self.archive_path, table)
+        if not os.path.isdir(table_dir):
+            return pd.DataFrame()
+        parts = [pd.read_parquet(os.path.join(table_dir, name))
+                 for name in sorted(os.listdir(table_dir)) if name.endswith('.parquet')]
+        frame = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        if frame.empty:
+            return frame
+        # A run interrupted between writing a file and committing leaves rows in both places
+        frame = frame.drop_duplicates('id', keep='last')
+        if transaction_ids is not None:
+            frame = frame[frame['transaction_id'].isin([str(t) for t in transaction_ids])]
+        if start_date is not None:
+            frame = frame[frame['transaction_date'] >= pd.Timestamp(start_date).strftime('%Y-%m-%d')]
+        if end_date is not None:
+            next_day = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+            frame = frame[frame['transaction_date'] < next_day]
+        return frame.reset_index(drop=True)
+
+    def _read_sqlite_archive(self, table, transaction_ids, start_date, end_date):
+        if not os.path.exists(self.archive_path):
+            return pd.DataFrame()
+        conn = connect(self.archive_path)
+        try:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (table,)).fetchone():
+                return pd.DataFrame()
+            query = f"SELECT * FROM {table}"
+            conditions, params = [], []
+            if transaction_ids is not None:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (transaction_id TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM archive_ids")
+                conn.executemany("INSERT OR IGNORE INTO archive_ids VALUES (?)", ((str(t),) for t in transaction_ids))
+                conditions.append("transaction_id IN (SELECT transaction_id FROM archive_ids)")
+            if start_date is not None:
+                conditions.append("transaction_date >= ?")
+                params.append(pd.Timestamp(start_date).strftime('%Y-%m-%d'))
+            if end_date is not None:
+                conditions.append("transaction_date < ?")
+                params.append((pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            frame = pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+        if 'data_json' in frame.columns:
+            # Compact payloads reference the working database's payload_schemas
+            conn = connect(self.db_path)
+            codec = get_codec(self.db_path)
+            frame['data_json'] = [json.dumps(codec.decode(conn, raw), default=str) for raw in frame['data_json']]
+            conn.close()
+        return frame
+
+def _incremental_vacuum(conn, pages):
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    pragma = f"PRAGMA incremental_vacuum({pages})" if pages else "PRAGMA incremental_vacuum"
+    # Each step frees one page; the pragma only runs as far as its rows are read
+    conn.execute(pragma).fetchall()
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+def _columns(conn, schema, table):
+    return [row[0] for row in conn.execute(f"SELECT name FROM pragma_table_info('{table}', '{schema}')")]
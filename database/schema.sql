@@ -1,5 +1,5 @@
 -- Main transaction monitoring table
-CREATE TABLE monitored_transactions (
+CREATE TABLE IF NOT EXISTS monitored_transactions (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     transaction_id TEXT UNIQUE NOT NULL,
     source TEXT,
@@ -10,11 +10,12 @@ CREATE TABLE monitored_transactions (
     vendor_name TEXT,
     transaction_type TEXT,
     status TEXT CHECK(status IN ('clean', 'flagged', 'reviewed', 'escalated')),
-    risk_level TEXT CHECK(risk_level IN ('low', 'medium', 'high', 'critical'))
+    risk_level TEXT CHECK(risk_level IN ('low', 'medium', 'high', 'critical')),
+    risk_score REAL
 );
 
 -- Anomaly detections
-CREATE TABLE anomaly_detections (
+CREATE TABLE IF NOT EXISTS anomaly_detections (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     transaction_id TEXT REFERENCES monitored_transactions(transaction_id),
     detection_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -24,14 +25,17 @@ CREATE TABLE anomaly_detections (
     severity TEXT CHECK(severity IN ('info', 'warning', 'error', 'critical')),
     finding_summary TEXT,
     finding_details_json TEXT,
+    finding_key TEXT,
+    risk_level TEXT,
     suggested_action TEXT,
     llm_context_analysis TEXT,
     llm_risk_assessment TEXT,
+    llm_risk_modifier REAL,
     combined_risk_score REAL
 );
 
 -- Business rules configuration
-CREATE TABLE business_rules (
+CREATE TABLE IF NOT EXISTS business_rules (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     rule_name TEXT UNIQUE NOT NULL,
     rule_type TEXT,
@@ -42,7 +46,7 @@ CREATE TABLE business_rules (
 );
 
 -- Review actions (audit trail)
-CREATE TABLE review_actions (
+CREATE TABLE IF NOT EXISTS review_actions (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     transaction_id TEXT REFERENCES monitored_transactions(transaction_id),
     detection_id INTEGER REFERENCES anomaly_detections(id),
@@ -53,3 +57,150 @@ CREATE TABLE review_actions (
     resolution TEXT,
     corrected_data_json TEXT
 );
+
+-- Pipeline runs (one row per upload / batch run)
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    run_id TEXT PRIMARY KEY,
+    source TEXT,
+    started_at DATETIME,
+    finished_at DATETIME,
+    status TEXT CHECK(status IN ('running', 'completed', 'failed')),
+    total_seconds REAL,
+    error TEXT
+);
+
+-- Per-stage timing and resource usage for each run
+CREATE TABLE IF NOT EXISTS stage_metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT REFERENCES pipeline_runs(run_id),
+    stage_name TEXT,
+    stage_order INTEGER,
+    calls INTEGER,
+    wall_time_seconds REAL,
+    rows_in INTEGER,
+    rows_out INTEGER,
+    findings_count INTEGER,
+    sql_statements INTEGER,
+    peak_memory_bytes INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_stage_metrics_run ON stage_metrics(run_id);
+
+-- Column layouts for compact data_json payloads (see utils/payload.py)
+CREATE TABLE IF NOT EXISTS payload_schemas (
+    schema_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT,
+    columns_json TEXT NOT NULL,
+    dictionary BLOB,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(source, columns_json)
+);
+
+-- Streaming bookkeeping: inbox files by content hash, tailed files by byte offset
+CREATE TABLE IF NOT EXISTS stream_files (
+    file_key TEXT PRIMARY KEY,
+    path TEXT,
+    size INTEGER,
+    status TEXT CHECK(status IN ('in_progress', 'done', 'failed')),
+    rows INTEGER,
+    error TEXT,
+    first_seen_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    completed_at DATETIME
+);
+
+CREATE TABLE IF NOT EXISTS stream_offsets (
+    path TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    header TEXT,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Vendor profiles, keyed by source and normalized vendor name and updated at ingest
+CREATE TABLE IF NOT EXISTS vendor_profiles (
+    source TEXT NOT NULL,
+    vendor_key TEXT NOT NULL,
+    display_name TEXT,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    amount_count INTEGER NOT NULL DEFAULT 0,
+    amount_sum REAL NOT NULL DEFAULT 0,
+    amount_sum_sq REAL NOT NULL DEFAULT 0,
+    amount_min REAL,
+    amount_max REAL,
+    first_seen_date DATE,
+    last_seen_date DATE,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, vendor_key)
+);
+
+CREATE TABLE IF NOT EXISTS vendor_category_stats (
+    source TEXT NOT NULL,
+    vendor_key TEXT NOT NULL,
+    category TEXT NOT NULL,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    amount_count INTEGER NOT NULL DEFAULT 0,
+    amount_sum REAL NOT NULL DEFAULT 0,
+    amount_sum_sq REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, vendor_key, category)
+);
+
+-- Benford leading-digit histograms per source (digits 1-9: first digit, 10-99: first two digits)
+CREATE TABLE IF NOT EXISTS benford_digit_counts (
+    source TEXT NOT NULL,
+    group_type TEXT NOT NULL CHECK(group_type IN ('overall', 'vendor', 'category')),
+    group_key TEXT NOT NULL,
+    digit INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, group_type, group_key, digit)
+);
+
+-- Daily payment counts, totals and sums of squares per source and vendor / category, updated
+-- at ingest; the velocity detector derives its rolling windows from these
+CREATE TABLE IF NOT EXISTS daily_spend (
+    source TEXT NOT NULL,
+    group_type TEXT NOT NULL CHECK(group_type IN ('vendor', 'category')),
+    group_key TEXT NOT NULL,
+    day DATE NOT NULL,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    amount_sum REAL NOT NULL DEFAULT 0,
+    amount_sum_sq REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, group_type, group_key, day)
+);
+
+-- Per-source and category weekday distribution and robust mean and covariance
+-- (Cholesky factor) of the features MahalanobisDetector scores against,
+-- refitted as categories grow
+CREATE TABLE IF NOT EXISTS covariance_models (
+    source TEXT NOT NULL,
+    category TEXT NOT NULL,
+    features TEXT NOT NULL,
+    weekdays_json TEXT NOT NULL,
+    mean_json TEXT NOT NULL,
+    chol_json TEXT NOT NULL,
+    fitted_rows INTEGER NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, category)
+);
+
+-- Lookups by transaction and date (review queue, risk fusion, retention)
+CREATE INDEX IF NOT EXISTS idx_anomaly_detections_transaction ON anomaly_detections(transaction_id);
+CREATE INDEX IF NOT EXISTS idx_review_actions_transaction ON review_actions(transaction_id);
+CREATE INDEX IF NOT EXISTS idx_monitored_transactions_date ON monitored_transactions(transaction_date);
+-- Per-source dashboard, review queue and history reads
+CREATE INDEX IF NOT EXISTS idx_monitored_transactions_source ON monitored_transactions(source, status);
+
+-- Per-month aggregates of transactions moved out by retention (see database/retention.py)
+CREATE TABLE IF NOT EXISTS transaction_summaries (
+    month TEXT NOT NULL,
+    source TEXT NOT NULL,
+    vendor_name TEXT NOT NULL,
+    transaction_type TEXT NOT NULL,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    amount_count INTEGER NOT NULL DEFAULT 0,
+    amount_sum REAL NOT NULL DEFAULT 0,
+    amount_sum_sq REAL NOT NULL DEFAULT 0,
+    amount_min REAL,
+    amount_max REAL,
+    detection_count INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (month, source, vendor_name, transaction_type)
+);
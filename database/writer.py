@@ -0,0 +1,159 @@
+import os
+import queue
+import atexit
+import sqlite3
+import threading
+from concurrent.futures import Future
+from database.connection import connect, set_statement_listener, statement_listener
+
+# Most queued jobs committed together in one transaction
+MAX_BATCH_JOBS = 64
+
+_writers = {}
+_lock = threading.Lock()
+
+class _Job:
+    def __init__(self, fn, args, kwargs, listener):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        # The submitting thread's statement listener, so metrics still count the SQL
+        self.listener = listener
+        self.future = Future()
+
+class DatabaseWriter:
+    """
+    Owns the single write connection to a database for this process.
+
+    Write jobs are functions fn(conn, *args) queued with submit(); a
+    dedicated thread runs them in order, grouping whatever is queued into
+    one transaction with a savepoint per job, so a failing job rolls back
+    alone. Jobs must not commit themselves; their futures resolve after the
+    commit. Readers keep using connect() and see WAL snapshots, so they are
+    never blocked by the writer.
+    """
+
+    def __init__(self, db_path='anomalyguard.db', max_batch_jobs=MAX_BATCH_JOBS):
+        self.db_path = db_path
+        self.max_batch_jobs = max_batch_jobs
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=f"db-writer:{db_path}", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues fn(conn, *args, **kwargs); returns a Future of its return value."""
+        job = _Job(fn, args, kwargs, statement_listener())
+        if threading.current_thread() is self._thread:
+            # A job submitting more work joins the running transaction
+            ok, value = self._run_job(self._conn, job)
+            if ok:
+                job.future.set_result(value)
+            else:
+                job.future.set_exception(value)
+            return job.future
+        self._queue.put(job)
+        return job.future
+
+    def run(self, fn, *args, **kwargs):
+        """submit() and wait for the result, re-raising the job's exception."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def close(self):
+        """Finishes queued jobs and stops the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _loop(self):
+        self._conn = connect(self.db_path)
+        if isinstance(self._conn, sqlite3.Connection):
+            # Transactions are begun and committed explicitly below
+            self._conn.isolation_level = None
+        stopping = False
+        while not stopping:
+            job = self._queue.get()
+            if job is None:
+                break
+            batch = [job]
+            while len(batch) < self.max_batch_jobs:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._run_batch(batch)
+        if isinstance(self._conn, sqlite3.Connection):
+            self._conn.isolation_level = ''
+        self._conn.close()
+
+    def _run_batch(self, batch):
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        conn = self._conn
+        cursor = conn.cursor()
+        outcomes = []
+        try:
+            if isinstance(conn, sqlite3.Connection):
+                # Take the write lock up front instead of failing on upgrade
+                cursor.execute("BEGIN IMMEDIATE")
+            for job in batch:
+                outcomes.append(self._run_job(conn, job))
+            conn.commit()
+        except BaseException as e:
+            conn.rollback()
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for job, (ok, value) in zip(batch, outcomes):
+            if ok:
+                job.future.set_result(value)
+            else:
+                job.future.set_exception(value)
+
+    def _run_job(self, conn, job):
+        """Runs one job inside a savepoint; returns (ok, result or exception)."""
+        cursor = conn.cursor()
+        cursor.execute("SAVEPOINT write_job")
+        # Counts the job's own statements for the submitting thread, not the savepoint bookkeeping
+        outer = statement_listener()
+        set_statement_listener(job.listener)
+        try:
+            try:
+                value = job.fn(conn, *job.args, **job.kwargs)
+            finally:
+                set_statement_listener(outer)
+        except Exception as e:
+            cursor.execute("ROLLBACK TO write_job")
+            cursor.execute("RELEASE write_job")
+            return False, e
+        cursor.execute("RELEASE write_job")
+        return True, value
+
+def get_writer(db_path='anomalyguard.db'):
+    """The process-wide writer for a database, started on first use."""
+    writer = _writers.get(db_path)
+    if writer is None:
+        with _lock:
+            writer = _writers.get(db_path)
+            if writer is None:
+                writer = _writers[db_path] = DatabaseWriter(db_path)
+    return writer
+
+def close_writers():
+    """Drains and stops every writer in this process."""
+    with _lock:
+        for writer in _writers.values():
+            writer.close()
+        _writers.clear()
+
+atexit.register(close_writers)
+# A forked child gets no writer thread; it starts its own on first use
+os.register_at_fork(after_in_child=_writers.clear)
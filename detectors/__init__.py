@@ -1,58 +1,287 @@
-from .duplicate_detector import DuplicateDetector
-from .outlier_detector import OutlierDetector
-from .missing_field_detector import MissingFieldDetector
-from .format_validator import FormatValidator
-from .temporal_anomaly_detector import TemporalAnomalyDetector
-from rules.business_rules import BusinessRuleEngine
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import registry
 from analyzers.llm_analyzer import LLMAnalyzer
 from analyzers.risk_scorer import RiskScorer
+from database.connection import connect
+from utils.metrics import PipelineMetrics
+from utils.history import load_typed_history
+from utils.partitions import source_partitions
+from utils.payload import get_codec
+from utils.typed_frame import to_typed_frame
 import pandas as pd
-import sqlite3
 import json
 
+# Rows per worker task when chunk_safe detectors split a large source partition
+PARALLEL_CHUNK_ROWS = 50_000
+
+# Detectors of a partition worker process, built on first use by (db_path, name)
+_worker_detectors = {}
+
+def _detect_partition(db_path, names, df):
+    """Runs the named detectors on one source partition in a worker process; never writes."""
+    specs = registry.discover()
+    results = {}
+    for name in names:
+        detector = _worker_detectors.get((db_path, name))
+        if detector is None:
+            detector = _worker_detectors[(db_path, name)] = specs[name].cls(db_path)
+        start = time.perf_counter()
+        findings = detector.detect(df)
+        results[name] = (findings, time.perf_counter() - start)
+    return results
+
+def _partition_tasks(partitions, detectors):
+    """(source, position, detector names, rows) worker tasks covering every partition."""
+    for source, rows in partitions:
+        whole = [d.detector_spec.name for d in detectors if not d.detector_spec.chunk_safe]
+        chunked = [d.detector_spec.name for d in detectors if d.detector_spec.chunk_safe]
+        if len(rows) <= PARALLEL_CHUNK_ROWS or not chunked:
+            yield source, 0, whole + chunked, rows
+            continue
+        if whole:
+            yield source, 0, whole, rows
+        for position, start in enumerate(range(0, len(rows), PARALLEL_CHUNK_ROWS), start=1):
+            yield source, position, chunked, rows.iloc[start:start + PARALLEL_CHUNK_ROWS]
+
 class DetectionPipeline:
-    def __init__(self, db_path='anomalyguard.db'):
+    def __init__(self, db_path='anomalyguard.db', metrics=None, llm_analyzer=None,
+                 enabled=None, disabled=None, partition_workers=None):
         self.db_path = db_path
-        self.detectors = [
-            DuplicateDetector(db_path),
-            OutlierDetector(db_path),
-            MissingFieldDetector(db_path),
-            FormatValidator(db_path),
-            TemporalAnomalyDetector(db_path),
-            BusinessRuleEngine(db_path)
-        ]
-        self.llm_analyzer = LLMAnalyzer()
+        self.metrics = metrics or PipelineMetrics(db_path)
+        # Detectors come from the registry (see detectors/registry.py), in dependency order
+        self.specs = registry.select(enabled=enabled, disabled=disabled)
+        self.detectors = [spec.cls(db_path) for spec in self.specs]
+        self.columns = registry.required_columns(self.specs)
+        self._llm_analyzer = llm_analyzer
         self.risk_scorer = RiskScorer(db_path)
+        # Source partitions analyzed at once in worker processes; 1 keeps detection in this process
+        self.partition_workers = partition_workers or int(os.getenv('ANOMALYGUARD_PARTITION_WORKERS', '1'))
+
+    @property
+    def llm_analyzer(self):
+        # Created on first use; detection-only callers never build an API client
+        if self._llm_analyzer is None:
+            self._llm_analyzer = LLMAnalyzer()
+        return self._llm_analyzer
 
-    def run_all(self, df=None):
-        """Runs all registered detectors on the data."""
+    def run_all(self, df=None, start_date=None, end_date=None, sources=None):
+        """
+        Runs all enabled detectors on the data, separately for each source
+        (see utils/partitions.py), so every source is measured against its
+        own baseline.
+        Without a DataFrame, history is scanned once, restricted to the union
+        of the detectors' columns, the optional (inclusive) date range and
+        the given sources. With partition_workers > 1 sources are analyzed in
+        parallel processes, and each source's findings are saved as soon as
+        its detectors finish; detectors that depend on others run here once
+        their source's prerequisites are saved.
+        """
         total_findings = []
+        with self.metrics.run():
+            if df is None:
+                df = self._load_history(start_date, end_date, sources)
+            df = self._prepare(df)
+            partitions = source_partitions(df)
+            independent = [detector for detector in self.detectors if not self._dependencies(detector)]
+            if self._parallel(partitions, independent):
+                rows_by_source = dict(partitions)
+                for source, results in self._detect_parallel(partitions, independent):
+                    total_findings.extend(self._save_partition(results, rows_by_source[source]))
+            else:
+                for _, rows in partitions:
+                    total_findings.extend(self._run_partition(rows))
+        return total_findings
+
+    def detect_batch(self, df, needs_history=None):
+        """
+        Runs detectors on an in-memory batch, per source, without writing
+        anything. Returns findings keyed by detector name, for save_batch().
+        needs_history=False/True restricts the run to detectors that do not /
+        do read state built at ingest, so the former can run before ingestion.
+        Nothing is saved in between, so depends_on detectors see only
+        findings stored before the batch; run_all() honours it fully.
+        """
+        df = self._prepare(df)
+        detectors = [
+            detector for detector in self.detectors
+            if needs_history is None or detector.detector_spec.needs_history == needs_history
+        ]
+        batch_results = {detector.detector_spec.name: [] for detector in detectors}
+        partitions = source_partitions(df)
+        if self._parallel(partitions, detectors):
+            partition_results = (results for _, results in self._detect_parallel(partitions, detectors))
+        else:
+            partition_results = (
+                {detector.detector_spec.name: self._detect(detector, rows) for detector in detectors}
+                for _, rows in partitions
+            )
+        for results in partition_results:
+            for name, findings in results.items():
+                batch_results[name].extend(findings)
+        return batch_results
+
+    def save_batch(self, results):
+        """Persists findings produced by detect_batch(), possibly in another process."""
+        with self.metrics.run():
+            return self._save_partition(results)
+
+    def _run_partition(self, df):
+        # Each detector saves before the next runs, so depends_on sees its findings
+        findings = []
         for detector in self.detectors:
+            detected = self._detect(detector, df)
+            self._save(detector, detected)
+            findings.extend(detected)
+        self._fuse(f['transaction_id'] for f in findings)
+        return findings
+
+    def _save_partition(self, results, rows=None):
+        # Detectors missing from results depend on others; given the rows,
+        # they run once everything they depend on is saved
+        findings = []
+        for detector in self.detectors:
+            name = detector.detector_spec.name
+            if name in results:
+                detected = results[name]
+            elif rows is not None:
+                detected = self._detect(detector, rows)
+            else:
+                continue
+            self._save(detector, detected)
+            findings.extend(detected)
+        self._fuse(f['transaction_id'] for f in findings)
+        return findings
+
+    def _dependencies(self, detector):
+        """Selected detectors this one depends on."""
+        selected = {spec.name for spec in self.specs}
+        return [name for name in detector.detector_spec.depends_on if name in selected]
+
+    def _parallel(self, partitions, detectors):
+        if self.partition_workers <= 1 or not detectors:
+            return False
+        if len(partitions) > 1:
+            return True
+        # A single large source still splits for chunk_safe detectors
+        return (any(detector.detector_spec.chunk_safe for detector in detectors)
+                and any(len(rows) > PARALLEL_CHUNK_ROWS for _, rows in partitions))
+
+    def _detect_parallel(self, partitions, detectors):
+        """
+        Yields (source, findings by detector name) as worker processes finish
+        each partition, largest partitions first, so one large or slow
+        source never holds up the others' results. Partitions larger than
+        PARALLEL_CHUNK_ROWS are split into chunks for chunk_safe detectors
+        only; the others always see a source's rows whole.
+        """
+        tasks = list(_partition_tasks(sorted(partitions, key=lambda p: len(p[1]), reverse=True), detectors))
+        remaining = {}
+        for source, _, _, _ in tasks:
+            remaining[source] = remaining.get(source, 0) + 1
+        collected = {source: [] for source in remaining}
+        workers = min(self.partition_workers, len(tasks))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_detect_partition, self.db_path, names, rows): (source, position, len(rows))
+                for source, position, names, rows in tasks
+            }
+            for future in as_completed(futures):
+                source, position, rows_in = futures[future]
+                task_results = future.result()
+                for name, (findings, seconds) in task_results.items():
+                    self.metrics.add_stage(f"{name}.detect", seconds, rows_in=rows_in,
+                                           rows_out=len({f['transaction_id'] for f in findings}),
+                                           findings=len(findings))
+                collected[source].append((position, task_results))
+                remaining[source] -= 1
+                if remaining[source]:
+                    continue
+                # Chunks are merged in row order, so findings come out as from one run
+                results = {}
+                for _, task_results in sorted(collected.pop(source), key=lambda item: item[0]):
+                    for name, (findings, _) in task_results.items():
+                        results.setdefault(name, []).extend(findings)
+                yield source, results
+
+    def _load_history(self, start_date=None, end_date=None, sources=None):
+        # The source column is always read, as runs are partitioned on it
+        columns = self.columns + ['source'] if 'source' not in self.columns else self.columns
+        with self.metrics.stage('history.load') as stage:
+            df = load_typed_history(self.db_path, columns=columns,
+                                    start_date=start_date, end_date=end_date, sources=sources)
+            stage.record(rows_out=len(df))
+        return df
+
+    def _prepare(self, df):
+        # Parse dates, categoricals and amounts once for every detector
+        with self.metrics.stage('typed_frame', rows_in=len(df)) as stage:
+            df = to_typed_frame(df)
+            stage.record(rows_out=len(df))
+        return df
+
+    def _detect(self, detector, df):
+        name = detector.detector_spec.name
+        with self.metrics.stage(f"{name}.detect", rows_in=len(df)) as stage:
             findings = detector.detect(df)
+            stage.record(
+                rows_out=len({f['transaction_id'] for f in findings}),
+                findings=len(findings)
+            )
+        return findings
+
+    def _save(self, detector, findings):
+        name = detector.detector_spec.name
+        with self.metrics.stage(f"{name}.save_findings", rows_in=len(findings)) as stage:
             detector.save_findings(findings)
-            total_findings.extend(findings)
-        return total_findings
+            stage.record(rows_out=len(findings))
+
+    def _fuse(self, transaction_ids):
+        # One risk level per transaction from all of its detections, not
+        # whichever detector happened to save last
+        transaction_ids = list(dict.fromkeys(transaction_ids))
+        if not transaction_ids:
+            return
+        with self.metrics.stage('RiskScorer.fuse', rows_in=len(transaction_ids)) as stage:
+            stage.record(rows_out=self.risk_scorer.fuse(transaction_ids))
 
     def enrich_with_ai(self):
         """Processes flagged transactions with LLM for deeper insight."""
-        conn = sqlite3.connect(self.db_path)
-        # Get detections that haven't been analyzed by LLM yet
-        query = "SELECT id, transaction_id, finding_summary FROM anomaly_detections WHERE llm_context_analysis IS NULL"
-        detections = pd.read_sql_query(query, conn)
+        with self.metrics.run():
+            return self._enrich_pending()
+
+    def _enrich_pending(self):
+        with self.metrics.stage('enrich.load') as stage:
+            conn = connect(self.db_path)
+            # Get detections that haven't been analyzed by LLM yet; 'info' ones
+            # (group-level observations) are not worth a model call
+            query = """
+                SELECT id, transaction_id, finding_summary FROM anomaly_detections
+                WHERE llm_context_analysis IS NULL AND severity != 'info'
+            """
+            detections = pd.read_sql_query(query, conn)
+            stage.record(rows_out=len(detections))
         
-        enriched_count = 0
+        enriched = []
         for _, det in detections.iterrows():
             # Get transaction data
-            cursor = conn.cursor()
-            cursor.execute("SELECT data_json FROM monitored_transactions WHERE transaction_id = ?", (det['transaction_id'],))
-            row = cursor.fetchone()
+            with self.metrics.stage('enrich.load'):
+                cursor = conn.cursor()
+                cursor.execute("SELECT data_json FROM monitored_transactions WHERE transaction_id = ?", (det['transaction_id'],))
+                row = cursor.fetchone()
             if not row: continue
             
-            txn_data = json.loads(row[0])
-            llm_results = self.llm_analyzer.analyze_anomaly(txn_data, det['finding_summary'])
+            txn_data = get_codec(self.db_path).decode(conn, row[0])
+            with self.metrics.stage('enrich.llm_analysis', rows_in=1) as stage:
+                llm_results = self.llm_analyzer.analyze_anomaly(txn_data, det['finding_summary'])
+                stage.record(rows_out=1)
             
-            self.risk_scorer.update_anomaly_risk(det['id'], llm_results)
-            enriched_count += 1
+            with self.metrics.stage('RiskScorer.update_anomaly_risk', rows_in=1) as stage:
+                self.risk_scorer.update_anomaly_risk(det['id'], llm_results)
+                stage.record(rows_out=1)
+            enriched.append(det['transaction_id'])
             
         conn.close()
-        return enriched_count
+        self._fuse(enriched)
+        return len(enriched)
@@ -0,0 +1,92 @@
+from analyzers.risk_scorer import RISK_LEVELS
+from database.engine import bulk_writer
+from database.writer import get_writer
+from utils.history import load_typed_history
+from utils.typed_frame import to_typed_frame
+import json
+
+class BaseDetector:
+    """
+    Shared plumbing for registered detectors: history loading and saving
+    findings. Subclasses implement detect(df=None) and set risk_level.
+    """
+    # Filled in from @register_detector(columns=...)
+    columns = ['transaction_id']
+    # Risk level a finding raises its transaction to; None records the
+    # detection without flagging the transaction. The pipeline then replaces
+    # it with the level fused from all detections (RiskScorer.fuse), which
+    # never falls below the level declared by any of them
+    risk_level = 'medium'
+
+    def __init__(self, db_path='anomalyguard.db'):
+        self.db_path = db_path
+
+    def prepare(self, df=None):
+        """Typed frame of the batch, or of history restricted to this detector's columns."""
+        if df is None:
+            # Source is always read, so rows are measured against their own source's baselines
+            columns = self.columns if 'source' in self.columns else self.columns + ['source']
+            return load_typed_history(self.db_path, columns=columns)
+        return to_typed_frame(df)
+
+    def save_findings(self, findings):
+        """Saves findings to the anomaly_detections table and flags their transactions."""
+        if not findings:
+            return
+        get_writer(self.db_path).run(self._write_findings, findings)
+
+    def _write_findings(self, conn, findings):
+        cursor = conn.cursor()
+        columns = ['transaction_id', 'detector_type', 'detector_name', 'confidence',
+                   'severity', 'finding_summary', 'finding_details_json', 'finding_key', 'risk_level']
+        # Staged first, so a finding already stored for the transaction (a re-run
+        # over the same data) is not saved, or counted by risk fusion, twice.
+        # Findings match on their finding_key, which detectors whose summaries
+        # quote statistics that move as history grows set to what the finding
+        # is about (a group, digit or threshold); it defaults to the summary
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS finding_batch (
+                seq INTEGER, transaction_id TEXT, detector_type TEXT, detector_name TEXT, confidence REAL,
+                severity TEXT, finding_summary TEXT, finding_details_json TEXT, finding_key TEXT,
+                risk_level TEXT
+            )
+        """)
+        cursor.execute("DELETE FROM finding_batch")
+        bulk_writer(self.db_path).insert(conn, 'finding_batch', ['seq'] + columns, [(
+            seq,
+            finding['transaction_id'],
+            finding['detector_type'],
+            finding['detector_name'],
+            finding['confidence'],
+            finding['severity'],
+            finding['finding_summary'],
+            json.dumps(finding['finding_details']),
+            finding.get('finding_key', finding['finding_summary']),
+            self.risk_level
+        ) for seq, finding in enumerate(findings)])
+        cursor.execute(f"""
+            INSERT INTO anomaly_detections ({', '.join(columns)})
+            SELECT {', '.join(columns)} FROM finding_batch b
+            WHERE b.seq IN (
+                SELECT MIN(seq) FROM finding_batch GROUP BY transaction_id, detector_name, finding_key
+            ) AND NOT EXISTS (
+                SELECT 1 FROM anomaly_detections ad
+                WHERE ad.transaction_id = b.transaction_id AND ad.detector_name = b.detector_name
+                  AND (ad.finding_key = b.finding_key
+                       OR (ad.finding_key IS NULL AND ad.finding_summary = b.finding_summary))
+            )
+            ORDER BY b.seq
+        """)
+
+        if self.risk_level is not None:
+            # Only ever raises a transaction's risk level
+            lower = RISK_LEVELS[:RISK_LEVELS.index(self.risk_level)]
+            placeholders = ', '.join('?' for _ in lower)
+            cursor.executemany(f"""
+                UPDATE monitored_transactions
+                SET status = 'flagged', risk_level = ?
+                WHERE transaction_id = ? AND (risk_level IS NULL OR risk_level IN ({placeholders}))
+            """, [
+                (self.risk_level, transaction_id, *lower)
+                for transaction_id in dict.fromkeys(f['transaction_id'] for f in findings)
+            ])
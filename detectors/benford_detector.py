@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+from detectors.base import BaseDetector
+from detectors.registry import register_detector
+from utils.typed_frame import amounts_as_float
+from analyzers.digit_histograms import DigitHistogramStore, CELLS, MAGNITUDE_BASE
+from utils.partitions import source_partitions, DEFAULT_SOURCE
+
+# Benford's expected proportions for first digits 1-9 and first-two digits 10-99
+FIRST_DIGITS = np.arange(1, 10)
+FIRST_TWO_DIGITS = np.arange(10, 100)
+EXPECTED = {
+    'first': np.log10(1 + 1 / FIRST_DIGITS),
+    'first_two': np.log10(1 + 1 / FIRST_TWO_DIGITS),
+}
+# Nigrini's MAD cut-offs above which a distribution is "nonconforming"
+MAD_LIMITS = {'first': 0.015, 'first_two': 0.0022}
+
+@register_detector(columns=['transaction_id', 'amount', 'vendor_name', 'transaction_type'], needs_history=True)
+class BenfordDetector(BaseDetector):
+    """
+    Benford's-law conformity of amounts overall, per vendor and per category.
+    Groups are scored on the incrementally maintained digit histograms, and
+    findings go to the batch transactions whose leading digits are the ones
+    over-represented in a nonconforming group.
+    """
+    # Nonconformity is a property of the group, so detections are recorded
+    # without flagging transactions on it alone
+    risk_level = None
+
+    def __init__(self, db_path='anomalyguard.db', min_count=100, min_count_two=300,
+                 alpha=0.01, z_limit=1.96, min_spread=0.2, top_digits=1):
+        super().__init__(db_path)
+        self.histograms = DigitHistogramStore(db_path)
+        # Smallest group sizes worth testing; the first-two test needs far more data
+        self.min_counts = {'first': min_count, 'first_two': min_count_two}
+        self.alpha = alpha
+        self.z_limit = z_limit
+        # Benford's law only describes amounts spanning several orders of magnitude:
+        # at least this share must lie outside the group's most common magnitude
+        self.min_spread = min_spread
+        # Only the most over-represented first-two-digit cells of a nonconforming
+        # group are tied back to transactions (a first-digit cell holds ~30% of a
+        # group, far too coarse to point at individual payments)
+        self.top_digits = top_digits
+
+    def score(self, matrix):
+        """
+        Scores every group (row) of a digit-count matrix. Returns per-test
+        group statistics and a boolean group x digit frame marking the top_digits
+        most significantly over-represented first-two digits of each group
+        whose first-two distribution is nonconforming.
+        """
+        from scipy import stats
+
+        magnitudes = matrix[[c for c in CELLS if c > MAGNITUDE_BASE]].to_numpy(dtype='float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = 1 - magnitudes.max(axis=1) / magnitudes.sum(axis=1)
+        applicable = spread >= self.min_spread
+
+        scores = {}
+        suspicious = []
+        for test, digits in (('first', FIRST_DIGITS), ('first_two', FIRST_TWO_DIGITS)):
+            expected = EXPECTED[test]
+            counts = matrix[digits].to_numpy(dtype='float64')
+            n = counts.sum(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                observed = counts / n[:, None]
+                mad = np.abs(observed - expected).mean(axis=1)
+                chi2 = ((counts - n[:, None] * expected) ** 2 / (n[:, None] * expected)).sum(axis=1)
+                z = (np.abs(observed - expected) - 1 / (2 * n[:, None])) / np.sqrt(expected * (1 - expected) / n[:, None])
+            p_value = stats.chi2.sf(chi2, df=len(digits) - 1)
+            nonconforming = (applicable & (n >= self.min_counts[test])
+                             & (mad > MAD_LIMITS[test]) & (p_value < self.alpha))
+
+            scores[test] = pd.DataFrame({
+                'n': n, 'mad': mad, 'chi2': chi2, 'p_value': p_value,
+                'spread': spread, 'nonconforming': nonconforming
+            }, index=matrix.index)
+            over = (observed > expected) & (z > self.z_limit) & nonconforming[:, None] & (test == 'first_two')
+            ranked = np.where(over, z, -np.inf)
+            kth = -np.sort(-ranked, axis=1)[:, min(self.top_digits, len(digits)) - 1]
+            over &= ranked >= kth[:, None]
+            suspicious.append(pd.DataFrame(over, index=matrix.index, columns=digits))
+        return scores, pd.concat(suspicious, axis=1)
+
+    def detect(self, df=None):
+        """
+        Detects Benford nonconformity at group level, within each row's
+        source, and ties it back to the contributing transactions.
+        """
+        df = self.prepare(df)
+        if df.empty or 'amount' not in df.columns:
+            return []
+        findings = []
+        for source, rows in source_partitions(df, DEFAULT_SOURCE):
+            findings.extend(self._detect_source(rows, source))
+        return findings
+
+    def _detect_source(self, df, source):
+        long = self.histograms.group_digits(df)
+        if long.empty:
+            return []
+
+        # Stored histograms already include ingested batches; groups they lack
+        # (e.g. detection ahead of ingest) are scored on the batch alone
+        stored = self.histograms.load(source)
+        groups = pd.MultiIndex.from_frame(long[['group_type', 'group_key']].drop_duplicates())
+        batch_counts = (long.groupby(['group_type', 'group_key', 'digit']).size()
+                        .unstack(fill_value=0).reindex(columns=CELLS, fill_value=0))
+        matrix = stored.reindex(groups)
+        missing = matrix.isna().all(axis=1)
+        matrix[missing] = batch_counts.reindex(matrix.index[missing]).to_numpy()
+        matrix = matrix.fillna(0)
+
+        scores, suspicious = self.score(matrix)
+        cells = suspicious.stack()
+        cells = cells[cells].reset_index()
+        if cells.empty:
+            return []
+        cells.columns = ['group_type', 'group_key', 'digit', 'suspicious']
+        hits = long.merge(cells[['group_type', 'group_key', 'digit']], on=['group_type', 'group_key', 'digit'])
+
+        # Attach the group statistics of the test each hit came from
+        hits['test'] = np.where(hits['digit'] < 10, 'first', 'first_two')
+        stats_frame = pd.concat(scores, names=['test']).reset_index()
+        hits = hits.merge(stats_frame, on=['test', 'group_type', 'group_key'])
+        hits['severity_ratio'] = hits['mad'] / hits['test'].map(MAD_LIMITS)
+        hits = hits.sort_values(['row', 'severity_ratio'], ascending=[True, False])
+
+        groups_by_row = {}
+        for hit in hits.itertuples(index=False):
+            groups_by_row.setdefault(hit.row, []).append({
+                'group_type': hit.group_type,
+                'group_key': hit.group_key,
+                'test': hit.test,
+                'digits': int(hit.digit),
+                'group_size': int(hit.n),
+                'mad': round(float(hit.mad), 5),
+                'chi2': round(float(hit.chi2), 2),
+                'p_value': float(hit.p_value),
+            })
+
+        transaction_ids = df['transaction_id'].to_numpy()
+        amounts = amounts_as_float(df['amount']).to_numpy()
+        findings = []
+        for row, groups_detail in groups_by_row.items():
+            # Summarize with the group that deviates most relative to its MAD limit
+            worst = groups_detail[0]
+            label = 'all transactions' if worst['group_type'] == 'overall' else f"{worst['group_type']} '{worst['group_key']}'"
+            findings.append({
+                'transaction_id': transaction_ids[row],
+                'detector_type': 'statistical',
+                'detector_name': 'BenfordDetector',
+                'confidence': 0.6,
+                'severity': 'info',
+                # Group statistics change with every ingest, so they stay in the details
+                'finding_summary': f"Leading digits {worst['digits']} of ${float(amounts[row]):,.2f} are over-represented in {label}",
+                'finding_details': {'groups': groups_detail},
+                # Only the amount's own first-two digits can be flagged, while
+                # the worst group may change as history grows
+                'finding_key': str(worst['digits']),
+            })
+        return findings
@@ -1,92 +1,56 @@
 import pandas as pd
-import sqlite3
-import json
-import re
-from datetime import datetime
+import numpy as np
+from detectors.base import BaseDetector
+from detectors.registry import register_detector
+from utils.typed_frame import amounts_as_float
 
-class FormatValidator:
-    def __init__(self, db_path='anomalyguard.db'):
-        self.db_path = db_path
+@register_detector(columns=['transaction_id', 'amount', 'transaction_date'], chunk_safe=True)
+class FormatValidator(BaseDetector):
+    risk_level = 'medium'
 
     def detect(self, df=None):
         """
         Validates the format of transaction data.
         """
-        if df is None:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query("SELECT * FROM monitored_transactions", conn)
-            conn.close()
+        # Dates and amounts arrive parsed; unparseable values keep their text in *_raw
+        df = self.prepare(df)
+        amounts = amounts_as_float(df['amount']) if 'amount' in df.columns else None
+        dates = df['transaction_date'] if 'transaction_date' in df.columns else None
 
-        # Normalize columns for CSV input
-        if 'vendor' in df.columns:
-            df = df.rename(columns={'vendor': 'vendor_name', 'date': 'transaction_date', 'type': 'transaction_type'})
+        errors = [[] for _ in range(len(df))]
 
-        findings = []
-        for _, row in df.iterrows():
-            errors = []
-            
-            # 1. Amount validation
-            amount = row.get('amount')
-            try:
-                if amount is not None:
-                    float_amount = float(amount)
-                    if float_amount <= 0:
-                        errors.append(f"Invalid amount: {amount} (must be positive)")
-            except (ValueError, TypeError):
-                errors.append(f"Invalid amount format: {amount}")
+        # 1. Amount validation
+        if amounts is not None:
+            if 'amount_raw' in df.columns:
+                for pos in np.flatnonzero(df['amount_raw'].notna().to_numpy()):
+                    errors[pos].append(f"Invalid amount format: {df['amount_raw'].iloc[pos]}")
+            for pos in np.flatnonzero((amounts <= 0).to_numpy()):
+                errors[pos].append(f"Invalid amount: {amounts.iloc[pos]} (must be positive)")
 
-            # 2. Date validation
-            date_str = row.get('transaction_date')
-            if date_str:
-                try:
-                    dt = pd.to_datetime(date_str)
-                    if dt > datetime.now():
-                        errors.append(f"Future transaction date: {date_str}")
-                    if dt.year < 2000:
-                        errors.append(f"Suspiciously old transaction date: {date_str}")
-                except Exception:
-                    errors.append(f"Invalid date format: {date_str}")
+        # 2. Date validation
+        if dates is not None:
+            for pos in np.flatnonzero((dates > pd.Timestamp.now()).to_numpy()):
+                errors[pos].append(f"Future transaction date: {dates.iloc[pos].strftime('%Y-%m-%d')}")
+            for pos in np.flatnonzero((dates.dt.year < 2000).to_numpy()):
+                errors[pos].append(f"Suspiciously old transaction date: {dates.iloc[pos].strftime('%Y-%m-%d')}")
+            if 'transaction_date_raw' in df.columns:
+                for pos in np.flatnonzero(df['transaction_date_raw'].notna().to_numpy()):
+                    errors[pos].append(f"Invalid date format: {df['transaction_date_raw'].iloc[pos]}")
 
-            if errors:
+        findings = []
+        transaction_ids = df['transaction_id'].to_numpy()
+        for pos, row_errors in enumerate(errors):
+            if row_errors:
                 findings.append({
-                    'transaction_id': row['transaction_id'],
+                    'transaction_id': transaction_ids[pos],
                     'detector_type': 'statistical',
                     'detector_name': 'FormatValidator',
                     'confidence': 1.0,
                     'severity': 'error',
-                    'finding_summary': f"Format validation failed: {'; '.join(errors)}",
+                    'finding_summary': f"Format validation failed: {'; '.join(row_errors)}",
                     'finding_details': {
-                        'format_errors': errors
+                        'format_errors': row_errors
                     }
                 })
             
         return findings
-
-    def save_findings(self, findings):
-        """Saves findings to the anomaly_detections table."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for finding in findings:
-            cursor.execute("""
-                INSERT INTO anomaly_detections 
-                (transaction_id, detector_type, detector_name, confidence, severity, finding_summary, finding_details_json)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                finding['transaction_id'],
-                finding['detector_type'],
-                finding['detector_name'],
-                finding['confidence'],
-                finding['severity'],
-                finding['finding_summary'],
-                json.dumps(finding['finding_details'])
-            ))
-            
-            cursor.execute("""
-                UPDATE monitored_transactions 
-                SET status = 'flagged', risk_level = 'medium'
-                WHERE transaction_id = ? AND risk_level IN ('low', 'info')
-            """, (finding['transaction_id'],))
-            
-        conn.commit()
-        conn.close()
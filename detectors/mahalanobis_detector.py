@@ -0,0 +1,135 @@
+import numpy as np
+from detectors.base import BaseDetector
+from detectors.registry import register_detector
+from analyzers.vendor_profiles import VendorProfileStore
+from analyzers.covariance_models import (
+    CovarianceModelStore, FEATURES, WEEKDAY_COLUMN, engineer_features, feature_contributions,
+    robust_fit, score, encode_weekdays, weekday_distribution
+)
+from utils.history import load_typed_history
+from utils.partitions import source_partitions, DEFAULT_SOURCE
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+@register_detector(columns=['transaction_id', 'transaction_date', 'amount', 'vendor_name', 'transaction_type'],
+                   needs_history=True)
+class MahalanobisDetector(BaseDetector):
+    """
+    Scores each transaction against its category's joint distribution of
+    amount, weekday rarity, day of month and vendor frequency, so an ordinary
+    amount on an unusual day or from an unusual vendor for the category
+    still stands out. Per-source, per-category robust covariances are fitted
+    from that source's history and cached (analyzers/covariance_models.py).
+    """
+    risk_level = 'medium'
+
+    def __init__(self, db_path='anomalyguard.db', alpha=1e-6, min_rows=30, refit_growth=1.25, top_features=3):
+        super().__init__(db_path)
+        self.profiles = VendorProfileStore(db_path)
+        self.models = CovarianceModelStore(db_path)
+        # Flag squared distances above the chi-square (1 - alpha) quantile
+        self.alpha = alpha
+        # Categories need min_rows transactions for a model, and are refitted
+        # once they hold refit_growth times the rows their model was fitted on
+        self.min_rows = min_rows
+        self.refit_growth = refit_growth
+        self.top_features = top_features
+
+    def detect(self, df=None):
+        """
+        Scores the batch by Mahalanobis distance to its category's robust
+        mean, batched per source and category against cached Cholesky factors.
+        """
+        df = self.prepare(df)
+        if df.empty or not set(self.columns).issubset(df.columns):
+            return []
+        findings = []
+        for source, rows in source_partitions(df, DEFAULT_SOURCE):
+            findings.extend(self._detect_source(rows, source))
+        return findings
+
+    def _detect_source(self, df, source):
+        from scipy import stats
+
+        profiles, pairs = self.profiles.load(source)
+        features, categories = engineer_features(df, profiles, pairs)
+        valid = np.isfinite(features).all(axis=1) & (categories != None)  # noqa: E711
+        models = self._models(source, pairs, set(categories[valid]), profiles)
+        threshold = stats.chi2.ppf(1 - self.alpha, len(FEATURES))
+
+        findings = []
+        for category, model in models.items():
+            rows = np.flatnonzero(valid & (categories == category))
+            if not len(rows):
+                continue
+            encoded = encode_weekdays(features[rows], model['weekdays'])
+            distances = score(encoded, model['mean'], model['chol'])
+            flagged = np.flatnonzero(distances > threshold)
+            if not len(flagged):
+                continue
+            # Explaining the distance costs a few extra factorizations, so only flagged rows pay it
+            contributions = feature_contributions(encoded[flagged], model['mean'], model['chol'])
+            for i, contribution in zip(flagged, contributions):
+                findings.append(self._finding(df, rows[i], category, model, encoded[i], features[rows[i]],
+                                              distances[i], contribution, threshold))
+        return findings
+
+    def _models(self, source, pairs, categories, profiles):
+        """A source's stored models for the batch's categories, refitting those that are missing or outgrown."""
+        counts = pairs.groupby('category')['transaction_count'].sum()
+        models = self.models.load(source)
+        stale = [
+            category for category in categories
+            if counts.get(category, 0) >= self.min_rows and (
+                category not in models or counts[category] >= models[category]['fitted_rows'] * self.refit_growth)
+        ]
+        if stale:
+            history = load_typed_history(self.db_path, columns=self.columns, sources=[source])
+            features, history_categories = engineer_features(history, profiles, pairs)
+            usable = np.isfinite(features).all(axis=1)
+            fitted = {}
+            for category in stale:
+                rows = features[usable & (history_categories == category)]
+                if len(rows) >= self.min_rows:
+                    weekdays = weekday_distribution(rows)
+                    mean, chol = robust_fit(encode_weekdays(rows, weekdays))
+                    fitted[category] = {'weekdays': weekdays, 'mean': mean, 'chol': chol,
+                                        'fitted_rows': int(counts[category])}
+            self.models.save(source, fitted)
+            models.update(fitted)
+        return {category: models[category] for category in categories if category in models}
+
+    def _finding(self, df, row, category, model, values, raw, distance, contributions, threshold):
+        shares = {name: float(c / distance) for name, c in zip(FEATURES, contributions)}
+        top = sorted(shares, key=shares.get, reverse=True)[:self.top_features]
+        typical = dict(zip(FEATURES, model['mean']))
+        value = dict(zip(FEATURES, values))
+        # Amounts and vendor counts are reported in their own units rather than logs
+        for name in ('log_amount', 'vendor_frequency'):
+            value[name], typical[name] = np.expm1(value[name]), np.expm1(typical[name])
+        category_label = df['transaction_type'].iloc[row]
+        return {
+            'transaction_id': df['transaction_id'].iloc[row],
+            'detector_type': 'statistical',
+            'detector_name': 'MahalanobisDetector',
+            'confidence': 0.7,
+            'severity': 'warning',
+            'finding_summary': (
+                f"Unusual {category_label} transaction, "
+                f"mostly from {', '.join(name.replace('_', ' ') for name in top)}"
+            ),
+            'finding_key': str(category),
+            'finding_details': {
+                'category': category,
+                'distance': round(float(np.sqrt(distance)), 3),
+                'threshold_distance': round(float(np.sqrt(threshold)), 3),
+                'fitted_rows': int(model['fitted_rows']),
+                'weekday': WEEKDAYS[int(raw[WEEKDAY_COLUMN])],
+                'weekday_share': round(float(np.exp(-value['weekday_rarity'])), 4),
+                'contributions': [
+                    {'feature': name, 'share': round(shares[name], 3),
+                     'value': round(float(value[name]), 4), 'typical': round(float(typical[name]), 4)}
+                    for name in top
+                ],
+            }
+        }
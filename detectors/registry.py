@@ -0,0 +1,134 @@
+import os
+import pkgutil
+import importlib
+from importlib.metadata import entry_points
+
+# Packages scanned for @register_detector classes; third-party packages can
+# add detectors through the 'anomalyguard.detectors' entry point group instead
+DETECTOR_PACKAGES = ('detectors', 'rules')
+ENTRY_POINT_GROUP = 'anomalyguard.detectors'
+
+_registry = {}
+_discovered = False
+
+class DetectorSpec:
+    """What a detector declares about itself to the pipeline."""
+
+    def __init__(self, cls, name, columns, chunk_safe, needs_history, depends_on, enabled):
+        self.cls = cls
+        self.name = name
+        # Input columns; history scans load only the union over enabled detectors
+        self.columns = list(columns)
+        # True when running on parts of a batch and concatenating the findings
+        # gives the same result as one run on the whole batch; parallel runs
+        # then split large sources into chunks for it
+        self.chunk_safe = chunk_safe
+        # True when detection reads state built from ingested history (profiles,
+        # histograms), so it has to run after the batch is ingested
+        self.needs_history = needs_history
+        # Names of detectors that must run (and save) before this one
+        self.depends_on = tuple(depends_on)
+        # Off-by-default detectors run only when named in ANOMALYGUARD_DETECTORS
+        self.enabled = enabled
+
+    def __repr__(self):
+        return f"DetectorSpec({self.name!r}, columns={self.columns})"
+
+def register_detector(name=None, columns=('transaction_id',), chunk_safe=False,
+                      needs_history=False, depends_on=(), enabled=True):
+    """Class decorator adding a detector to the registry under its class name by default."""
+    def decorator(cls):
+        spec = DetectorSpec(cls, name or cls.__name__, columns, chunk_safe,
+                            needs_history, depends_on, enabled)
+        existing = _registry.get(spec.name)
+        if existing is not None and existing.cls is not cls:
+            raise ValueError(f"Detector name {spec.name!r} is already registered by {existing.cls.__module__}")
+        cls.columns = spec.columns
+        cls.detector_spec = spec
+        _registry[spec.name] = spec
+        return cls
+    return decorator
+
+def discover():
+    """Imports every module in DETECTOR_PACKAGES and every entry point, once per process."""
+    global _discovered
+    if _discovered:
+        return _registry
+
+    for package_name in DETECTOR_PACKAGES:
+        package = importlib.import_module(package_name)
+        for module in pkgutil.iter_modules(package.__path__):
+            importlib.import_module(f"{package_name}.{module.name}")
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            loaded = entry_point.load()
+        except Exception as e:
+            print(f"Warning: could not load detector plugin {entry_point.name}: {e}")
+            continue
+        # An entry point may name an undecorated class; register it with defaults
+        if isinstance(loaded, type) and not hasattr(loaded, 'detector_spec'):
+            register_detector(name=entry_point.name,
+                              columns=getattr(loaded, 'columns', ('transaction_id',)))(loaded)
+
+    _discovered = True
+    return _registry
+
+def _env_names(name):
+    value = os.getenv(name, '')
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+def select(enabled=None, disabled=None):
+    """
+    Registered specs that should run, in dependency order. Detectors are
+    switched off by name via ANOMALYGUARD_DISABLED_DETECTORS (comma-separated)
+    or `disabled`, and off-by-default ones switched on via ANOMALYGUARD_DETECTORS
+    or `enabled`.
+    """
+    specs = discover()
+    enabled = set(enabled or ()) | _env_names('ANOMALYGUARD_DETECTORS')
+    disabled = set(disabled or ()) | _env_names('ANOMALYGUARD_DISABLED_DETECTORS')
+
+    unknown = (enabled | disabled) - set(specs)
+    if unknown:
+        print(f"Warning: unknown detectors in configuration: {', '.join(sorted(unknown))}")
+
+    chosen = {
+        name: spec for name, spec in specs.items()
+        if (spec.enabled or name in enabled) and name not in disabled
+    }
+    return schedule(chosen)
+
+def schedule(specs):
+    """
+    Orders specs so each runs after the detectors it depends on (Kahn's
+    algorithm, alphabetical among ready detectors). Dependencies on detectors
+    that are not selected are ignored; cycles raise ValueError.
+    """
+    pending = {
+        name: {dep for dep in spec.depends_on if dep in specs}
+        for name, spec in specs.items()
+    }
+    for name, spec in specs.items():
+        skipped = set(spec.depends_on) - set(specs)
+        if skipped:
+            print(f"Warning: {name} depends on {', '.join(sorted(skipped))}, which will not run.")
+
+    ordered = []
+    while pending:
+        ready = sorted(name for name, deps in pending.items() if not deps)
+        if not ready:
+            raise ValueError(f"Detector dependency cycle among: {', '.join(sorted(pending))}")
+        for name in ready:
+            ordered.append(specs[name])
+            del pending[name]
+        for deps in pending.values():
+            deps.difference_update(ready)
+    return ordered
+
+def required_columns(specs):
+    """Union of the columns the given specs read, in first-seen order."""
+    columns = []
+    for spec in specs:
+        columns.extend(c for c in spec.columns if c not in columns)
+    return columns
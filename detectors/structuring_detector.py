@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from detectors.base import BaseDetector
+from detectors.registry import register_detector
+from utils.typed_frame import amounts_as_float
+
+@register_detector(columns=['transaction_id', 'transaction_date', 'amount', 'vendor_name'])
+class StructuringDetector(BaseDetector):
+    """
+    Flags split payments ("structuring"): several payments to one vendor
+    within a short window, each just below an approval threshold while
+    together they reach it.
+    """
+    risk_level = 'high'
+
+    def __init__(self, db_path='anomalyguard.db', thresholds=(5000.0, 10000.0),
+                 band=0.10, window_days=3, min_payments=2):
+        super().__init__(db_path)
+        # Approval limits, the fraction below each limit that counts as "just under" it,
+        # and the calendar-day window (inclusive) payments must fall within
+        self.thresholds = sorted(thresholds)
+        self.band = band
+        self.window_days = window_days
+        self.min_payments = min_payments
+
+    def detect(self, df=None):
+        """
+        Detects structuring per vendor and threshold. Candidates are sorted by
+        (vendor, day); each row's window start is found by binary search and
+        window sums come from a prefix sum, so the cost is O(n log n).
+        """
+        df = self.prepare(df)
+        if df.empty or not set(self.columns).issubset(df.columns):
+            return []
+
+        amounts = amounts_as_float(df['amount']).to_numpy()
+        days = df['transaction_date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        vendor_codes = self._vendor_codes(df['vendor_name'])
+        valid = ~np.isnat(days) & np.isfinite(amounts) & (vendor_codes >= 0)
+
+        findings = []
+        for threshold in self.thresholds:
+            in_band = valid & (amounts >= threshold * (1 - self.band)) & (amounts < threshold)
+            positions = np.flatnonzero(in_band)
+            if len(positions) < self.min_payments:
+                continue
+            findings.extend(self._detect_threshold(df, positions, amounts, days, vendor_codes, threshold))
+        return findings
+
+    @staticmethod
+    def _vendor_codes(vendors):
+        """Integer vendor keys, ignoring case and surrounding whitespace; -1 where missing."""
+        if not isinstance(vendors.dtype, pd.CategoricalDtype):
+            vendors = vendors.astype('category')
+        names = vendors.cat.categories.astype(str).str.strip().str.lower()
+        _, canonical = np.unique(np.asarray(names), return_inverse=True)
+        codes = vendors.cat.codes.to_numpy()
+        return np.where(codes >= 0, canonical[np.maximum(codes, 0)], -1)
+
+    def _detect_threshold(self, df, positions, amounts, days, vendor_codes, threshold):
+        day_numbers = days[positions].astype('int64')
+        day_numbers = day_numbers - day_numbers.min() + self.window_days
+        vendors = vendor_codes[positions].astype('int64')
+
+        # Composite (vendor, day) key; the day offset keeps subtraction inside one vendor
+        keys = (vendors << 32) | day_numbers
+        order = np.argsort(keys, kind='stable')
+        keys, positions = keys[order], positions[order]
+        values = amounts[positions]
+
+        # Window [start, end] of each row as the window's last payment
+        ends = np.arange(len(keys))
+        starts = np.searchsorted(keys, keys - (self.window_days - 1), side='left')
+        prefix = np.concatenate(([0.0], np.cumsum(values)))
+        window_sums = prefix[ends + 1] - prefix[starts]
+        window_counts = ends - starts + 1
+        flagged = (window_counts >= self.min_payments) & (window_sums >= threshold)
+        if not flagged.any():
+            return []
+
+        # Difference array marks every row inside at least one flagged window
+        coverage = np.zeros(len(keys) + 1, dtype='int64')
+        np.add.at(coverage, starts[flagged], 1)
+        np.add.at(coverage, ends[flagged] + 1, -1)
+        covered = np.cumsum(coverage[:-1]) > 0
+
+        # Contiguous covered runs of one vendor form a cluster
+        members = np.flatnonzero(covered)
+        sorted_vendors = keys >> 32
+        sorted_days = keys & 0xFFFFFFFF
+        breaks = np.ones(len(members), dtype=bool)
+        breaks[1:] = (
+            (np.diff(members) != 1)
+            | (np.diff(sorted_vendors[members]) != 0)
+            | (np.diff(sorted_days[members]) >= self.window_days)
+        )
+        cluster_ids = np.cumsum(breaks) - 1
+        cluster_totals = np.bincount(cluster_ids, weights=values[members])
+        cluster_sizes = np.bincount(cluster_ids)
+
+        # Members are sorted by day within a cluster
+        dates = days[positions][members]
+        first_members = np.flatnonzero(breaks)
+        first_days = dates[first_members]
+        last_days = dates[np.append(first_members[1:] - 1, len(members) - 1)]
+
+        transaction_ids = df['transaction_id'].to_numpy()
+        vendor_names = df['vendor_name'].to_numpy()
+        findings = []
+        for cluster_id, member in zip(cluster_ids, members):
+            row = positions[member]
+            total = round(float(cluster_totals[cluster_id]), 2)
+            count = int(cluster_sizes[cluster_id])
+            findings.append({
+                'transaction_id': transaction_ids[row],
+                'detector_type': 'statistical',
+                'detector_name': 'StructuringDetector',
+                'confidence': 0.85,
+                'severity': 'error',
+                'finding_summary': (
+                    f"Possible split payment: {count} payments to {vendor_names[row]} "
+                    f"just under ${threshold:,.0f} total ${total:,.2f}"
+                ),
+                'finding_key': f"{threshold:g}",
+                'finding_details': {
+                    'threshold': threshold,
+                    'amount': round(float(amounts[row]), 2),
+                    'cluster_total': total,
+                    'cluster_size': count,
+                    'window_days': self.window_days,
+                    'first_date': str(first_days[cluster_id]),
+                    'last_date': str(last_days[cluster_id]),
+                }
+            })
+        return findings
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+from detectors.base import BaseDetector
+from detectors.registry import register_detector
+from analyzers.spend_velocity import SpendVelocityStore
+from analyzers.vendor_profiles import normalize_vendor, normalize_category
+from utils.partitions import source_partitions, DEFAULT_SOURCE
+
+@register_detector(columns=['transaction_id', 'transaction_date', 'amount', 'vendor_name', 'transaction_type'],
+                   needs_history=True)
+class VelocityDetector(BaseDetector):
+    """
+    Flags bursts in spend velocity: a vendor or category whose payment count
+    or total over a rolling window is several times, and improbably far
+    above, its own usual rate for a window that long, measured over its
+    history before the window.
+    """
+    risk_level = 'medium'
+
+    def __init__(self, db_path='anomalyguard.db', windows=(7, 30, 90), burst_ratio=3.0,
+                 count_alpha=0.01, sum_z=3.0, min_payments=3, min_history_payments=5,
+                 min_history_windows=2):
+        super().__init__(db_path)
+        self.store = SpendVelocityStore(db_path)
+        # Rolling window lengths in calendar days (inclusive of the payment's day)
+        self.windows = sorted(windows)
+        # A burst is at least burst_ratio times the usual count or total, and
+        # unlikely under the group's usual rate: count p-value below count_alpha
+        # (Poisson) or total at least sum_z std devs above normal (compound Poisson)
+        self.burst_ratio = burst_ratio
+        self.count_alpha = count_alpha
+        self.sum_z = sum_z
+        # A burst needs min_payments in the window, and a baseline of at least
+        # min_history_payments spread over min_history_windows windows' worth of days
+        self.min_payments = min_payments
+        self.min_history_payments = min_history_payments
+        self.min_history_windows = min_history_windows
+
+    def detect(self, df=None):
+        """
+        Detects bursts for every vendor and category in the batch. Window and
+        baseline totals are differences of per-group cumulative sums over the
+        persisted daily totals of the row's source, located by binary search on (group, day) keys,
+        so each window costs O(n log n) however long the history is.
+        """
+        df = self.prepare(df)
+        if df.empty or not set(self.columns).issubset(df.columns):
+            return []
+        findings = []
+        for source, rows in source_partitions(df, DEFAULT_SOURCE):
+            findings.extend(self._detect_source(rows, source))
+        return findings
+
+    def _detect_source(self, df, source):
+        days = df['transaction_date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        bursts = {}
+        for group_type, keys in (('vendor', normalize_vendor(df['vendor_name'])),
+                                 ('category', normalize_category(df['transaction_type']))):
+            keys = keys.to_numpy(dtype=object)
+            valid = pd.notna(keys) & ~np.isnat(days)
+            if not valid.any():
+                continue
+            daily = self.store.load(group_type, keys[valid], source=source)
+            if daily.empty:
+                continue
+            for row, burst in self._detect_group_type(df, group_type, keys, days, valid, daily).items():
+                bursts.setdefault(row, []).append(burst)
+
+        # A payment in both a vendor and a category burst gets one finding,
+        # described by the stronger burst, with both groups in its details
+        transaction_ids = df['transaction_id'].to_numpy()
+        findings = []
+        for row in sorted(bursts):
+            ranked = sorted(bursts[row], key=lambda burst: burst['ratio'], reverse=True)
+            details = dict(ranked[0])
+            ratio = details.pop('ratio')
+            label = details.pop('label')
+            summary = (
+                f"Spend burst for {details['group_type']} {label}: {details['window_count']} payments "
+                f"totalling ${details['window_sum']:,.2f} in {details['window_days']} days, "
+                f"{ratio:.1f}x its usual rate"
+            )
+            if len(ranked) > 1:
+                summary += f" ({ranked[1]['group_type']} {ranked[1]['label']} is bursting too)"
+            details['groups'] = [{
+                'group_type': burst['group_type'],
+                'group_key': burst['group_key'],
+                'label': burst['label'],
+                'window_days': burst['window_days'],
+                'ratio': round(burst['ratio'], 2),
+            } for burst in ranked]
+            findings.append({
+                'transaction_id': transaction_ids[row],
+                'detector_type': 'statistical',
+                'detector_name': 'VelocityDetector',
+                'confidence': 0.7,
+                'severity': 'warning',
+                'finding_summary': summary,
+                # One finding per payment, whichever burst describes it
+                'finding_key': 'burst',
+                'finding_details': details,
+            })
+        return findings
+
+    def _detect_group_type(self, df, group_type, keys, days, valid, daily):
+        """The burst covering each batch row (by position) in one kind of group."""
+        from scipy import stats
+
+        # Integer group codes shared by the batch and the stored daily totals
+        codes, names = pd.factorize(pd.concat([daily['group_key'], pd.Series(keys[valid])], ignore_index=True))
+        daily_codes = codes[:len(daily)].astype('int64')
+        row_codes = codes[len(daily):].astype('int64')
+
+        daily_days = pd.to_datetime(daily['day']).to_numpy().astype('datetime64[D]').astype('int64')
+        row_dates = days[valid]
+        row_days = row_dates.astype('int64')
+        # Offset so that every window start stays a positive day number
+        offset = max(self.windows) + 1 - min(daily_days.min(), row_days.min())
+
+        stored = (daily_codes << 32) | (daily_days + offset)
+        order = np.argsort(stored, kind='stable')
+        stored = stored[order]
+        # Prefix sums of (count, sum, sum of squares) over the sorted daily rows
+        prefix = np.vstack([np.zeros(3), np.cumsum(
+            daily[['transaction_count', 'amount_sum', 'amount_sum_sq']].to_numpy(dtype='float64')[order], axis=0)])
+
+        def cumulative(query):
+            # Totals over every stored (group, day) key <= query
+            return prefix[np.searchsorted(stored, query, side='right')]
+
+        row_keys = (row_codes << 32) | (row_days + offset)
+        group_start = np.searchsorted(stored, row_codes << 32, side='left')
+        base = prefix[group_start]
+        first_day = (stored[np.minimum(group_start, len(stored) - 1)] & 0xFFFFFFFF) - offset
+        end = cumulative(row_keys)
+
+        best_ratio = np.zeros(len(row_keys))
+        best = {}
+        for window in self.windows:
+            start = cumulative(row_keys - window)
+            window_count, window_sum, _ = (end - start).T
+            prior_count, prior_sum, prior_sum_sq = (start - base).T
+            history_days = row_days - window - first_day + 1
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                expected_count = prior_count / history_days * window
+                expected_sum = prior_sum / history_days * window
+                count_ratio = np.where(expected_count > 0, window_count / expected_count, 0.0)
+                sum_ratio = np.where(expected_sum > 0, window_sum / expected_sum, 0.0)
+                # Compound Poisson: Var(window total) = expected count * E[amount^2]
+                sum_std = np.sqrt(expected_count * prior_sum_sq / prior_count)
+                sum_z = np.where(sum_std > 0, (window_sum - expected_sum) / sum_std, 0.0)
+            count_p = stats.poisson.sf(window_count - 1, np.maximum(expected_count, 1e-12))
+
+            eligible = (
+                (history_days >= self.min_history_windows * window)
+                & (prior_count >= self.min_history_payments)
+                & (window_count >= self.min_payments)
+            )
+            count_burst = (count_ratio >= self.burst_ratio) & (count_p < self.count_alpha)
+            sum_burst = (sum_ratio >= self.burst_ratio) & (sum_z >= self.sum_z)
+            ratio = np.maximum(np.where(count_burst, count_ratio, 0.0), np.where(sum_burst, sum_ratio, 0.0))
+            burst = eligible & (count_burst | sum_burst) & (ratio > best_ratio)
+            best_ratio = np.where(burst, ratio, best_ratio)
+            for i in np.flatnonzero(burst):
+                best[i] = {
+                    'window_days': window,
+                    'window_count': int(window_count[i]),
+                    'window_sum': round(float(window_sum[i]), 2),
+                    'expected_count': round(float(expected_count[i]), 2),
+                    'expected_sum': round(float(expected_sum[i]), 2),
+                    'count_ratio': round(float(count_ratio[i]), 2),
+                    'sum_ratio': round(float(sum_ratio[i]), 2),
+                    'count_p_value': float(f"{count_p[i]:.3g}"),
+                    'sum_z': round(float(sum_z[i]), 2),
+                    'history_days': int(history_days[i]),
+                    'window_end': str(row_dates[i]),
+                    'ratio': float(ratio[i]),
+                    'count_burst': bool(count_burst[i]),
+                }
+
+        # Every batch payment inside a burst of payments belongs to it, not just
+        # the ones on its last day (a burst in the total alone may come from one
+        # large payment, so only its last day is flagged); stronger bursts win
+        # where windows overlap
+        order = np.argsort(row_keys, kind='stable')
+        sorted_keys = row_keys[order]
+        covering = {}
+        for i in sorted(best, key=lambda i: best_ratio[i]):
+            window = best[i]['window_days'] if best[i]['count_burst'] else 1
+            low = np.searchsorted(sorted_keys, row_keys[i] - window, side='right')
+            high = np.searchsorted(sorted_keys, row_keys[i], side='right')
+            for member in order[low:high]:
+                covering[member] = best[i]
+
+        rows = np.flatnonzero(valid)
+        labels = df['vendor_name' if group_type == 'vendor' else 'transaction_type'].to_numpy()
+        bursts = {}
+        for i in covering:
+            details = dict(covering[i])
+            details.pop('count_burst')
+            bursts[rows[i]] = {
+                'group_type': group_type,
+                'group_key': names[row_codes[i]],
+                'label': labels[rows[i]],
+                **details,
+            }
+        return bursts
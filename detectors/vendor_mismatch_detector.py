@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from detectors.base import BaseDetector
+from detectors.registry import register_detector
+from utils.typed_frame import amounts_as_float
+from analyzers.vendor_profiles import VendorProfileStore, normalize_vendor, normalize_category
+from utils.partitions import source_partitions, DEFAULT_SOURCE
+
+@register_detector(columns=['transaction_id', 'transaction_date', 'amount', 'vendor_name', 'transaction_type'],
+                   needs_history=True)
+class VendorMismatchDetector(BaseDetector):
+    """
+    Checks each transaction against its vendor's profile: a category the
+    vendor is rarely or never booked under, or a large first payment to a
+    vendor with no earlier history.
+    """
+    risk_level = 'medium'
+
+    def __init__(self, db_path='anomalyguard.db', min_history=5, dominant_share=0.8,
+                 rare_share=0.05, first_time_amount=1000.0, category_z=3.0):
+        super().__init__(db_path)
+        self.profiles = VendorProfileStore(db_path)
+        # Profiles with fewer transactions than min_history are too young to judge categories
+        self.min_history = min_history
+        self.dominant_share = dominant_share
+        self.rare_share = rare_share
+        # First payments above the category's mean + category_z std devs are "large";
+        # categories without enough history fall back to first_time_amount
+        self.first_time_amount = first_time_amount
+        self.category_z = category_z
+
+    def detect(self, df=None):
+        """
+        Detects vendor/category mismatches with vectorized lookups against
+        the profiles of each row's source in the vendor profile store.
+        """
+        df = self.prepare(df)
+        if df.empty or not set(self.columns).issubset(df.columns):
+            return []
+        findings = []
+        for source, rows in source_partitions(df, DEFAULT_SOURCE):
+            findings.extend(self._detect_source(rows, source))
+        return findings
+
+    def _detect_source(self, df, source):
+        profiles, pairs = self.profiles.load(source)
+        vendor_keys = normalize_vendor(df['vendor_name'])
+        categories = normalize_category(df['transaction_type'])
+        amounts = amounts_as_float(df['amount']).to_numpy()
+        dates = df['transaction_date']
+        known = vendor_keys.notna().to_numpy()
+
+        # Vendor-level lookups
+        vendor_totals = profiles['transaction_count'].reindex(vendor_keys).to_numpy(dtype='float64')
+        first_seen = pd.to_datetime(profiles['first_seen_date'].reindex(vendor_keys), errors='coerce').to_numpy()
+
+        # Pair-level lookups
+        pair_counts = pairs.set_index(['vendor_key', 'category'])['transaction_count']
+        pair_index = pd.MultiIndex.from_arrays([vendor_keys, categories])
+        pair_totals = pair_counts.reindex(pair_index).fillna(0).to_numpy(dtype='float64')
+
+        dominant = pairs.sort_values('transaction_count').drop_duplicates('vendor_key', keep='last').set_index('vendor_key')
+        dominant_category = dominant['category'].reindex(vendor_keys).to_numpy(dtype=object)
+        dominant_share = (dominant['transaction_count'].reindex(vendor_keys).to_numpy(dtype='float64') / vendor_totals)
+
+        # Category-level amount statistics across all vendors
+        by_category = pairs.groupby('category')[['amount_count', 'amount_sum', 'amount_sum_sq']].sum()
+        mean = by_category['amount_sum'] / by_category['amount_count']
+        std = np.sqrt((by_category['amount_sum_sq'] / by_category['amount_count'] - mean ** 2).clip(lower=0))
+        category_count = by_category['amount_count'].reindex(categories).to_numpy(dtype='float64')
+        category_limit = (mean + self.category_z * std).reindex(categories).to_numpy(dtype='float64')
+        large_limit = np.where(category_count >= self.min_history, category_limit, self.first_time_amount)
+
+        established = known & (np.nan_to_num(vendor_totals) >= self.min_history)
+        has_category = categories.notna().to_numpy()
+        with np.errstate(invalid='ignore'):
+            mismatch = (established & has_category & (dominant_share >= self.dominant_share)
+                        & (dominant_category != categories.to_numpy(dtype=object)))
+            rare_pair = (established & has_category & ~mismatch
+                         & (pair_totals / vendor_totals < self.rare_share))
+
+        # First payment: nothing earlier in the profile or in this batch
+        batch_first = dates.groupby(vendor_keys.to_numpy()).transform('min').to_numpy()
+        earliest = np.fmin(first_seen, batch_first)
+        dates_np = dates.to_numpy()
+        with np.errstate(invalid='ignore'):
+            first_time_large = (known & ~np.isnat(dates_np) & (dates_np <= earliest)
+                                & (amounts > large_limit))
+
+        flagged = np.flatnonzero(mismatch | rare_pair | first_time_large)
+        transaction_ids = df['transaction_id'].to_numpy()
+        vendor_names = df['vendor_name'].to_numpy()
+        raw_categories = df['transaction_type'].to_numpy()
+
+        findings = []
+        for i in flagged:
+            reasons = []
+            confidence = 0.0
+            if mismatch[i]:
+                reasons.append(f"usually booked as {dominant_category[i]}")
+                confidence = max(confidence, 0.8)
+            if rare_pair[i]:
+                reasons.append(f"{int(pair_totals[i])} of {int(vendor_totals[i])} past payments under this category")
+                confidence = max(confidence, 0.6)
+            if first_time_large[i]:
+                reasons.append(f"first payment to this vendor is ${amounts[i]:,.2f}")
+                confidence = max(confidence, 0.7)
+
+            findings.append({
+                'transaction_id': transaction_ids[i],
+                'detector_type': 'statistical',
+                'detector_name': 'VendorMismatchDetector',
+                'confidence': confidence,
+                'severity': 'warning',
+                'finding_summary': f"Unusual vendor/category: {vendor_names[i]} as {raw_categories[i]} ({'; '.join(reasons)})",
+                'finding_key': f"{vendor_keys.iat[i]}:{categories.iat[i]}",
+                'finding_details': {
+                    'vendor_key': vendor_keys.iat[i],
+                    'category': categories.iat[i],
+                    'category_mismatch': bool(mismatch[i]),
+                    'rare_pair': bool(rare_pair[i]),
+                    'first_time_large': bool(first_time_large[i]),
+                    'usual_category': dominant_category[i] if isinstance(dominant_category[i], str) else None,
+                    'vendor_transactions': None if np.isnan(vendor_totals[i]) else int(vendor_totals[i]),
+                    'large_amount_limit': None if np.isnan(large_limit[i]) else round(float(large_limit[i]), 2),
+                }
+            })
+        return findings
@@ -0,0 +1,53 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.init_db import init_db
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A freshly initialized database; metrics off so tests only see the writes they make."""
+    monkeypatch.setenv('ANOMALYGUARD_METRICS', '0')
+    path = str(tmp_path / 'test.db')
+    init_db(path)
+    return path
+
+def sample_batch(prefix, count, offset=0):
+    """Transactions over three vendors, categories and months, with amounts spanning magnitudes."""
+    import pandas as pd
+    return pd.DataFrame({
+        'transaction_id': [f"{prefix}{i:03d}" for i in range(count)],
+        'transaction_date': [f"2026-0{1 + (i + offset) % 3}-{1 + (i + offset) % 27:02d}" for i in range(count)],
+        'amount': [round(12.5 * (i + offset + 1) ** 1.3, 2) for i in range(count)],
+        'vendor_name': [['Staples', 'Acme Corp', 'Delta Air'][(i + offset) % 3] for i in range(count)],
+        'transaction_type': [['office_supplies', 'consulting', 'travel'][(i + offset) % 3] for i in range(count)],
+    })
+
+@pytest.fixture
+def ingested(db_path):
+    """db_path after two ingested batches, the second from source 'north'."""
+    from utils.data_loader import DataLoader
+    loader = DataLoader(db_path)
+    loader.ingest_dataframe(sample_batch('A', 40))
+    loader.ingest_dataframe(sample_batch('B', 25, offset=7), source_name='north')
+    return db_path
+
+def assert_matches_rebuild(store):
+    """An incrementally maintained store equals the same store rebuilt from monitored_transactions."""
+    import pandas as pd
+
+    def normalized(frames):
+        frames = frames if isinstance(frames, tuple) else (frames,)
+        out = []
+        for frame in frames:
+            frame = frame.reset_index()
+            frame = frame.drop(columns=[c for c in ('index', 'id', 'updated_at', 'created_at') if c in frame.columns])
+            out.append(frame.sort_values(list(frame.columns)).reset_index(drop=True))
+        return out
+
+    incremental = normalized(store.load())
+    store.rebuild()
+    for before, after in zip(incremental, normalized(store.load())):
+        pd.testing.assert_frame_equal(before, after)
@@ -0,0 +1,38 @@
+import pandas as pd
+from cli import run_batch
+from database.connection import connect
+
+def _frame(ids):
+    return pd.DataFrame({
+        'transaction_id': ids,
+        'transaction_date': ['2026-03-07'] * len(ids),  # a Saturday
+        'amount': [5000.0 + 137 * i for i in range(len(ids))],
+        'vendor_name': ['Acme Consulting'] * len(ids),
+        'transaction_type': ['consulting'] * len(ids),
+    })
+
+def _detected_ids(db_path):
+    conn = connect(db_path)
+    rows = conn.execute("SELECT transaction_id FROM anomaly_detections").fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+def test_rerunning_a_file_analyzes_only_new_rows(db_path, tmp_path):
+    first = tmp_path / 'first.csv'
+    _frame([f"C{i}" for i in range(10)]).to_csv(first, index=False)
+    summary = run_batch([str(first)], db_path=db_path, workers=1)
+    assert summary['ingested'] == 10
+    stored = _detected_ids(db_path)
+    assert stored
+
+    again = run_batch([str(first)], db_path=db_path, workers=1)
+    assert again['ingested'] == 0
+    assert again['findings'] == 0
+    assert sorted(_detected_ids(db_path)) == sorted(stored)
+
+    overlap = tmp_path / 'overlap.csv'
+    _frame([f"C{i}" for i in range(5, 15)]).to_csv(overlap, index=False)
+    summary = run_batch([str(overlap)], db_path=db_path, workers=1)
+    assert summary['ingested'] == 5
+    new = set(_detected_ids(db_path)) - set(stored)
+    assert new and new <= {f"C{i}" for i in range(10, 15)}
@@ -0,0 +1,90 @@
+import pandas as pd
+import detectors
+from conftest import sample_batch
+from database.connection import connect
+from detectors import DetectionPipeline
+from detectors.base import BaseDetector
+from detectors.benford_detector import BenfordDetector
+from detectors.registry import register_detector
+from utils.data_loader import DataLoader
+
+@register_detector(columns=['transaction_id'], depends_on=['MissingFieldDetector'], enabled=False)
+class MissingFieldEchoDetector(BaseDetector):
+    """Flags every transaction MissingFieldDetector has already stored a detection for."""
+
+    def detect(self, df=None):
+        conn = connect(self.db_path)
+        flagged = {row[0] for row in conn.execute(
+            "SELECT transaction_id FROM anomaly_detections WHERE detector_name = 'MissingFieldDetector'")}
+        conn.close()
+        return [{
+            'transaction_id': transaction_id, 'detector_type': 'rule', 'detector_name': 'MissingFieldEchoDetector',
+            'confidence': 1.0, 'severity': 'warning', 'finding_summary': 'Echo', 'finding_details': {},
+        } for transaction_id in df['transaction_id'] if transaction_id in flagged]
+
+def _frame(count, sources):
+    return pd.DataFrame({
+        'transaction_id': [f"P{i:03d}" for i in range(count)],
+        'transaction_date': ['2026-02-03'] * count,
+        'amount': [100.0 + 37 * i for i in range(count)],
+        # Every third row misses its vendor
+        'vendor_name': [None if i % 3 == 0 else f"Vendor {i % 4}" for i in range(count)],
+        'transaction_type': ['office_supplies'] * count,
+        'source': [sources[i % len(sources)] for i in range(count)],
+    })
+
+def _pipeline(db_path, names, workers):
+    every = set(detectors.registry.discover())
+    return DetectionPipeline(db_path, enabled=names, disabled=every - set(names), partition_workers=workers)
+
+def _key(findings):
+    return sorted((f['transaction_id'], f['detector_name'], f['finding_summary']) for f in findings)
+
+def test_parallel_runs_dependents_after_their_prerequisites_are_saved(db_path):
+    df = _frame(24, ['north', 'south'])
+    findings = _pipeline(db_path, ['MissingFieldDetector', 'MissingFieldEchoDetector'], 2).run_all(df)
+
+    echoed = {f['transaction_id'] for f in findings if f['detector_name'] == 'MissingFieldEchoDetector'}
+    assert echoed == set(df['transaction_id'][df['vendor_name'].isna()])
+
+def test_only_chunk_safe_detectors_split_a_large_source(db_path, monkeypatch):
+    monkeypatch.setattr(detectors, 'PARALLEL_CHUNK_ROWS', 10)
+    df = _frame(35, ['only'])
+    names = ['MissingFieldDetector', 'DuplicateDetector']
+    pipeline = _pipeline(db_path, names, 2)
+
+    tasks = list(detectors._partition_tasks(detectors.source_partitions(df), pipeline.detectors))
+    assert [(names, len(rows)) for _, _, names, rows in tasks] == [
+        (['DuplicateDetector'], 35),
+        (['MissingFieldDetector'], 10), (['MissingFieldDetector'], 10),
+        (['MissingFieldDetector'], 10), (['MissingFieldDetector'], 5),
+    ]
+    parallel = pipeline.detect_batch(df)
+    sequential = _pipeline(db_path, names, 1).detect_batch(df)
+    assert {name: _key(f) for name, f in parallel.items()} == {name: _key(f) for name, f in sequential.items()}
+
+def test_redetecting_after_more_history_saves_no_duplicate_findings(db_path):
+    def inflated(prefix, count, offset=0):
+        # Every third amount starts with 45, over-represented in every group
+        df = sample_batch(prefix, count, offset)
+        df.loc[::3, 'amount'] = [4500.0 + i for i in range(len(df.loc[::3]))]
+        return df
+
+    loader = DataLoader(db_path)
+    first = inflated('A', 360)
+    loader.ingest_dataframe(first)
+    detector = BenfordDetector(db_path)
+    before = detector.detect(first)
+    detector.save_findings(before)
+
+    # The group statistics of the findings move with the new rows
+    loader.ingest_dataframe(inflated('B', 90, offset=360))
+    after = detector.detect(first)
+    assert [f['finding_details'] for f in after] != [f['finding_details'] for f in before]
+    detector.save_findings(after)
+
+    conn = connect(db_path)
+    stored, transactions = conn.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT transaction_id) FROM anomaly_detections").fetchone()
+    conn.close()
+    assert stored == transactions == len(before) > 0
@@ -0,0 +1,5 @@
+from conftest import assert_matches_rebuild
+from analyzers.digit_histograms import DigitHistogramStore
+
+def test_incremental_histograms_match_a_rebuild(ingested):
+    assert_matches_rebuild(DigitHistogramStore(ingested))
@@ -0,0 +1,42 @@
+import io
+import json
+import pandas as pd
+import pytest
+from detectors.base import BaseDetector
+from utils.data_loader import DataLoader
+from utils.export import write_export, FINDINGS_COLUMNS
+
+def _findings(db_path):
+    """Eight transactions over two sources, each with an outlier and a duplicate detection."""
+    df = pd.DataFrame({
+        'transaction_id': [f"E{i}" for i in range(8)],
+        'transaction_date': [f"2026-02-{i + 1:02d}" for i in range(8)],
+        'amount': [100.0 + i for i in range(8)],
+        'vendor_name': ['Staples'] * 8,
+        'transaction_type': ['office_supplies'] * 8,
+        'source': ['north', 'south'] * 4,
+        'po_number': [f"PO-{i}" for i in range(8)],
+    })
+    DataLoader(db_path).ingest_dataframe(df)
+    BaseDetector(db_path).save_findings([{
+        'transaction_id': transaction_id, 'detector_type': 'statistical', 'detector_name': name,
+        'confidence': 0.8, 'severity': 'warning', 'finding_summary': name, 'finding_details': {'n': 1},
+    } for transaction_id in df['transaction_id'] for name in ('OutlierDetector', 'DuplicateDetector')])
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_filtered_export_round_trips(db_path, fmt):
+    _findings(db_path)
+    buffer = io.BytesIO()
+    rows = write_export(buffer, db_path, kind='findings', fmt=fmt, chunk_rows=3,
+                        detectors=['OutlierDetector'], sources=['north'], end_date='2026-02-06')
+    buffer.seek(0)
+    exported = pd.read_csv(buffer) if fmt == 'csv' else pd.read_parquet(buffer)
+
+    assert rows == len(exported) == 3
+    assert list(exported.columns) == list(FINDINGS_COLUMNS)
+    assert exported['transaction_id'].tolist() == ['E0', 'E2', 'E4']
+    assert set(exported['detector_name']) == {'OutlierDetector'} and set(exported['source']) == {'north'}
+    assert exported['amount'].tolist() == [100.0, 102.0, 104.0]
+    assert json.loads(exported['finding_details_json'].iloc[0]) == {'n': 1}
+    # Payloads come back as the row as uploaded
+    assert json.loads(exported['data_json'].iloc[1])['po_number'] == 'PO-2'
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+from database.connection import connect
+from database.feature_store import FeatureStore
+from database.parquet_store import ParquetStore
+from utils.typed_frame import to_typed_frame
+
+def test_feature_cache_matches_parsing_the_database(ingested):
+    columns = ['transaction_id', 'transaction_date', 'amount', 'vendor_name', 'source']
+    cached = FeatureStore(ingested).read(columns=columns)
+    conn = connect(ingested)
+    parsed = to_typed_frame(pd.read_sql_query(
+        f"SELECT {', '.join(columns)} FROM monitored_transactions ORDER BY id", conn))
+    conn.close()
+
+    assert cached['transaction_id'].astype(str).tolist() == parsed['transaction_id'].astype(str).tolist()
+    assert cached['amount'].tolist() == pytest.approx(parsed['amount'].tolist())
+    assert (cached['transaction_date'] == parsed['transaction_date']).all()
+    assert cached['source'].astype(str).tolist() == parsed['source'].astype(str).tolist()
+
+def test_ingest_writes_no_parquet_tier_while_the_cache_is_enabled(ingested):
+    store = ParquetStore(ingested)
+    assert not store.enabled and not store.has_data()
+    assert FeatureStore(ingested).read(columns=['transaction_id'])['transaction_id'].nunique() == 65
+
+def _refresh(db_path):
+    return FeatureStore(db_path).update()
+
+def test_concurrent_processes_add_each_row_once(ingested):
+    import multiprocessing
+    # Rows ingested while the cache was off are all picked up by the first refresh
+    store = FeatureStore(ingested)
+    store._save_manifest({'segments': [], 'rows': 0, 'max_id': 0, 'last_transaction_id': None})
+    with multiprocessing.get_context('spawn').Pool(4) as pool:
+        added = pool.map(_refresh, [ingested] * 4)
+
+    assert sorted(added) == [0, 0, 0, 65]
+    cached = store.read(columns=['transaction_id'])
+    assert len(cached) == cached['transaction_id'].nunique() == 65
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from detectors.mahalanobis_detector import MahalanobisDetector
+from utils.data_loader import DataLoader
+
+def test_flags_a_payment_far_from_its_category(db_path):
+    rng = np.random.default_rng(7)
+    days = pd.bdate_range('2025-09-01', periods=80)
+    history = pd.DataFrame({
+        'transaction_id': [f"H{i:03d}" for i in range(80)],
+        'transaction_date': days.strftime('%Y-%m-%d'),
+        'amount': np.round(rng.normal(5000, 400, 80), 2),
+        'vendor_name': [['Acme Consulting', 'Bright Advisors'][i % 2] for i in range(80)],
+        'transaction_type': ['consulting'] * 80,
+    })
+    batch = pd.DataFrame({
+        'transaction_id': ['N1', 'N2'],
+        'transaction_date': ['2026-01-07', '2026-01-07'],
+        'amount': [5100.0, 96000.0],
+        'vendor_name': ['Acme Consulting', 'Acme Consulting'],
+        'transaction_type': ['consulting', 'consulting'],
+    })
+    loader = DataLoader(db_path)
+    loader.ingest_dataframe(history)
+    loader.ingest_dataframe(batch)
+
+    findings = MahalanobisDetector(db_path).detect(batch)
+
+    assert [f['transaction_id'] for f in findings] == ['N2']
+    assert findings[0]['finding_details']['contributions'][0]['feature'] == 'log_amount'
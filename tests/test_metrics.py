@@ -0,0 +1,37 @@
+import tracemalloc
+from database.connection import connect
+from database.writer import get_writer
+from utils.metrics import PipelineMetrics
+
+def _insert_runs(conn, count):
+    for i in range(count):
+        conn.execute("INSERT INTO pipeline_runs (run_id, status) VALUES (?, 'completed')", (f"job{i}",))
+
+def test_stages_count_writer_jobs_and_connections_opened_earlier(db_path):
+    metrics = PipelineMetrics(db_path, enabled=True)
+    conn = connect(db_path)
+    with metrics.run():
+        with metrics.stage('write'):
+            get_writer(db_path).run(_insert_runs, 3)
+        with metrics.stage('read'):
+            conn.execute("SELECT COUNT(*) FROM pipeline_runs").fetchone()
+    conn.close()
+
+    assert metrics.stages['write'].sql_statements == 3
+    assert metrics.stages['read'].sql_statements == 1
+
+def test_memory_is_only_traced_on_request(db_path, monkeypatch):
+    monkeypatch.delenv('ANOMALYGUARD_METRICS_MEMORY', raising=False)
+    metrics = PipelineMetrics(db_path, enabled=True)
+    with metrics.run():
+        with metrics.stage('load'):
+            assert not tracemalloc.is_tracing()
+    assert metrics.stages['load'].peak_memory is None
+
+    monkeypatch.setenv('ANOMALYGUARD_METRICS_MEMORY', '1')
+    metrics = PipelineMetrics(db_path, enabled=True)
+    with metrics.run():
+        with metrics.stage('load'):
+            data = [0] * 100_000
+    del data
+    assert metrics.stages['load'].peak_memory > 0
@@ -0,0 +1,22 @@
+import pytest
+from conftest import sample_batch
+from database.parquet_store import ParquetStore
+
+@pytest.fixture(autouse=True)
+def feature_cache_off(monkeypatch):
+    # The Parquet tier is only kept while the feature cache is disabled
+    monkeypatch.setenv('ANOMALYGUARD_FEATURES', '0')
+
+def test_parquet_history_mirrors_the_database(ingested):
+    store = ParquetStore(ingested)
+    assert store.count_rows() == 65
+    north = store.read(columns=['transaction_id'], sources=['north'])
+    assert sorted(north['transaction_id']) == sorted(sample_batch('B', 25)['transaction_id'])
+    january = store.read(columns=['transaction_date'], start_date='2026-01-01', end_date='2026-01-31')
+    assert len(january) and january['transaction_date'].str.startswith('2026-01').all()
+
+def test_removed_transactions_leave_the_tier(ingested):
+    store = ParquetStore(ingested)
+    assert store.remove(['A000', 'A001', 'B000'], months=['2026-01', '2026-02']) == 3
+    assert store.count_rows() == 62
+    assert not {'A000', 'A001', 'B000'} & set(store.read(columns=['transaction_id'])['transaction_id'])
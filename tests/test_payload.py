@@ -0,0 +1,42 @@
+import json
+import pytest
+from database.connection import connect
+from database.writer import get_writer
+from utils.payload import PayloadCodec, FORMAT_DEFLATE, FORMAT_VALUES
+
+COLUMNS = ['transaction_id', 'vendor_name', 'amount', 'memo']
+ROWS = [[f"T{i}", 'Staples Office Supply', 100.5 + i, None if i % 2 else 'toner'] for i in range(20)]
+
+def test_payloads_round_trip_in_every_format(db_path):
+    codec = PayloadCodec()
+    encoded = get_writer(db_path).run(codec.encode_rows, 'csv_upload', COLUMNS, ROWS)
+    assert {raw[0] for raw in encoded} <= {FORMAT_VALUES, FORMAT_DEFLATE}
+    assert sum(len(raw) for raw in encoded) < sum(len(json.dumps(dict(zip(COLUMNS, r)))) for r in ROWS)
+
+    conn = connect(db_path)
+    # A fresh codec reads the schema back from the database
+    decoded = [PayloadCodec().decode(conn, raw) for raw in encoded]
+    legacy = codec.decode(conn, json.dumps({'transaction_id': 'L1', 'amount': 3}))
+    conn.close()
+    assert decoded == [dict(zip(COLUMNS, row)) for row in ROWS]
+    assert legacy == {'transaction_id': 'L1', 'amount': 3}
+    assert codec.decode(None, None) == {}
+
+def test_a_rolled_back_schema_is_not_cached(db_path):
+    codec = PayloadCodec()
+
+    def encode_then_fail(conn):
+        codec.encode_rows(conn, 'csv_upload', COLUMNS, ROWS)
+        raise RuntimeError("insert failed")
+
+    with pytest.raises(RuntimeError):
+        get_writer(db_path).run(encode_then_fail)
+    assert codec._schema_ids == {}
+
+    # Another layout now takes the rolled-back id; the first must get its own schema again
+    other = get_writer(db_path).run(codec.encode_rows, 'csv_upload', ['transaction_id'], [['X1']])
+    encoded = get_writer(db_path).run(codec.encode_rows, 'csv_upload', COLUMNS, ROWS)
+    conn = connect(db_path)
+    assert codec.decode(conn, other[0]) == {'transaction_id': 'X1'}
+    assert [codec.decode(conn, raw) for raw in encoded] == [dict(zip(COLUMNS, row)) for row in ROWS]
+    conn.close()
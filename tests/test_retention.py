@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+from database.connection import connect
+from database.feature_store import FeatureStore
+from database.retention import RetentionManager
+from detectors import DetectionPipeline
+from utils.data_loader import DataLoader
+from utils.history import load_history
+
+def _ingest_history(db_path):
+    """60 old transactions, resolved as clean, and 20 recent pending ones."""
+    old = [f"OLD{i:03d}" for i in range(60)]
+    new = [f"NEW{i:03d}" for i in range(20)]
+    DataLoader(db_path).ingest_dataframe(pd.DataFrame({
+        'transaction_id': old + new,
+        'transaction_date': [f"2020-01-{i % 28 + 1:02d}" for i in range(60)] + ['2026-10-01'] * 20,
+        'amount': [100.0 + i for i in range(60)] + [25000.0] + [90.0] * 19,
+        'vendor_name': ['Staples'] * 80,
+        'transaction_type': ['office_supplies'] * 80,
+    }))
+    conn = connect(db_path)
+    conn.execute("UPDATE monitored_transactions SET status = 'clean' WHERE transaction_id LIKE 'OLD%'")
+    conn.commit()
+    conn.close()
+    return old, new
+
+def _live_ids(db_path, table):
+    conn = connect(db_path)
+    ids = {row[0] for row in conn.execute(f"SELECT DISTINCT transaction_id FROM {table}")}
+    conn.close()
+    return ids
+
+@pytest.mark.parametrize('archive_name', ['archive.db', 'archive_parquet'])
+def test_archived_rows_leave_history_and_are_not_detected_on(db_path, tmp_path, monkeypatch, archive_name):
+    old, new = _ingest_history(db_path)
+    # load_history(include_archive=True) finds the archive through the environment
+    monkeypatch.setenv('ANOMALYGUARD_ARCHIVE', str(tmp_path / archive_name))
+    manager = RetentionManager(db_path, max_age_days=365, chunk_rows=25)
+
+    report = manager.run()
+
+    assert report['archived'] == len(old)
+    assert _live_ids(db_path, 'monitored_transactions') == set(new)
+    assert set(FeatureStore(db_path).read(columns=['transaction_id'])['transaction_id']) == set(new)
+    assert set(load_history(db_path, columns=['transaction_id'])['transaction_id']) == set(new)
+    assert set(manager.read_archive()['transaction_id']) == set(old)
+    assert len(load_history(db_path, columns=['transaction_id'], include_archive=True)) == len(old) + len(new)
+
+    DetectionPipeline(db_path).run_all()
+    assert _live_ids(db_path, 'anomaly_detections') <= set(new)
+
+def test_history_ignores_a_parquet_tier_ahead_of_the_database(db_path, monkeypatch):
+    # The Parquet tier is only kept while the feature cache is disabled
+    monkeypatch.setenv('ANOMALYGUARD_FEATURES', '0')
+    _, new = _ingest_history(db_path)
+    conn = connect(db_path)
+    conn.execute("DELETE FROM monitored_transactions WHERE transaction_id LIKE 'OLD%'")
+    conn.commit()
+    conn.close()
+
+    assert set(load_history(db_path, columns=['transaction_id'])['transaction_id']) == set(new)
+
+def test_rerunning_retention_after_a_rollback_does_not_duplicate_the_sqlite_archive(db_path, tmp_path):
+    old, _ = _ingest_history(db_path)
+    manager = RetentionManager(db_path, max_age_days=365, archive_path=str(tmp_path / 'archive.db'))
+    manager._sync_archive()
+    # Copies left behind by a chunk whose working-database transaction rolled back
+    conn = connect(db_path)
+    manager._write_sqlite_archive(conn, 'monitored_transactions', "transaction_id LIKE 'OLD%'")
+    conn.close()
+
+    manager.run()
+
+    assert len(manager.read_archive()) == len(old)
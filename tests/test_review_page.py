@@ -0,0 +1,54 @@
+import pandas as pd
+from database.connection import connect
+from detectors.base import BaseDetector
+from ui.review_page import bulk_update_status, count_review_queue, load_review_queue, review_queue_items
+from utils.data_loader import DataLoader
+
+def _flag(db_path, findings):
+    """Ingests T1-T3 (Saturday, Monday, Sunday) and stores a detection per (transaction_id, detector_name); returns their ids."""
+    DataLoader(db_path).ingest_dataframe(pd.DataFrame({
+        'transaction_id': ['T1', 'T2', 'T3'],
+        'transaction_date': ['2026-03-07', '2026-03-09', '2026-03-08'],
+        'amount': [100.0, 200.0, 300.0],
+        'vendor_name': ['Staples'] * 3,
+        'transaction_type': ['office_supplies'] * 3,
+    }))
+    BaseDetector(db_path).save_findings([{
+        'transaction_id': transaction_id, 'detector_type': 'rule', 'detector_name': name,
+        'confidence': 0.9, 'severity': 'warning', 'finding_summary': name, 'finding_details': {},
+    } for transaction_id, name in findings])
+    conn = connect(db_path)
+    ids = {(t, name): i for i, t, name in conn.execute("SELECT id, transaction_id, detector_name FROM anomaly_detections")}
+    conn.close()
+    return ids
+
+def test_bulk_update_sets_status_and_records_one_action_per_row(db_path):
+    ids = _flag(db_path, [('T1', 'OutlierDetector'), ('T1', 'DuplicateDetector'), ('T2', 'OutlierDetector'),
+                          ('T3', 'OutlierDetector')])
+    items = [('T1', ids['T1', 'OutlierDetector']), ('T1', ids['T1', 'DuplicateDetector']),
+             ('T2', ids['T2', 'OutlierDetector'])]
+
+    assert bulk_update_status(items, 'clean', 'checked with AP', db_path) == 2
+
+    conn = connect(db_path)
+    statuses = dict(conn.execute("SELECT transaction_id, status FROM monitored_transactions"))
+    actions = conn.execute("SELECT transaction_id, detection_id, action_type, reviewer, notes FROM review_actions").fetchall()
+    conn.close()
+    assert statuses == {'T1': 'clean', 'T2': 'clean', 'T3': 'flagged'}
+    assert sorted(actions) == sorted((t, d, 'clean', 'user', 'checked with AP') for t, d in items)
+
+def test_queue_is_filtered_and_paged_in_sql(db_path):
+    ids = _flag(db_path, [('T1', 'OutlierDetector'), ('T1', 'DuplicateDetector'), ('T2', 'OutlierDetector'),
+                          ('T3', 'OutlierDetector')])
+
+    outliers = {'detectors': ['OutlierDetector']}
+    assert count_review_queue(db_path, **outliers) == 3
+    pages = [load_review_queue(db_path, limit=2, offset=offset, **outliers) for offset in (0, 2)]
+    assert [len(page) for page in pages] == [2, 1]
+    assert sorted(pd.concat(pages)['transaction_id']) == ['T1', 'T2', 'T3']
+
+    weekend = {'detectors': ['OutlierDetector'], 'vendors': ['Staples'], 'weekend_only': True}
+    assert sorted(review_queue_items(db_path, **weekend)) == [('T1', ids['T1', 'OutlierDetector']),
+                                                               ('T3', ids['T3', 'OutlierDetector'])]
+    assert count_review_queue(db_path, vendors=['Acme']) == 0
+    assert count_review_queue(db_path, sources=['north']) == 0
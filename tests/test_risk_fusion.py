@@ -0,0 +1,84 @@
+import pandas as pd
+from analyzers.risk_scorer import RiskScorer
+from database.connection import connect
+from detectors.base import BaseDetector
+from utils.data_loader import DataLoader
+
+def _ingest(db_path, ids):
+    DataLoader(db_path).ingest_dataframe(pd.DataFrame({
+        'transaction_id': ids,
+        'transaction_date': ['2026-01-05'] * len(ids),
+        'amount': [100.0] * len(ids),
+        'vendor_name': ['Staples'] * len(ids),
+        'transaction_type': ['office_supplies'] * len(ids),
+    }))
+
+def _finding(transaction_id, detector_name, summary, severity='error', confidence=0.9):
+    return {
+        'transaction_id': transaction_id, 'detector_type': 'statistical', 'detector_name': detector_name,
+        'confidence': confidence, 'severity': severity, 'finding_summary': summary, 'finding_details': {},
+    }
+
+def _detections(db_path):
+    conn = connect(db_path)
+    count = conn.execute("SELECT COUNT(*) FROM anomaly_detections").fetchone()[0]
+    conn.close()
+    return count
+
+def _risk(db_path, transaction_id):
+    conn = connect(db_path)
+    row = conn.execute("SELECT risk_score, risk_level FROM monitored_transactions WHERE transaction_id = ?",
+                       (transaction_id,)).fetchone()
+    conn.close()
+    return row
+
+def test_saving_the_same_findings_again_stores_nothing(db_path):
+    _ingest(db_path, ['T1', 'T2'])
+    detector = BaseDetector(db_path)
+    findings = [_finding('T1', 'OutlierDetector', 'Large'), _finding('T2', 'OutlierDetector', 'Large')]
+    detector.save_findings(findings)
+    detector.save_findings(findings)
+    # Repeats inside one batch are dropped too
+    detector.save_findings([_finding('T1', 'DuplicateDetector', 'Dup')] * 2)
+    assert _detections(db_path) == 3
+
+def test_rerun_does_not_raise_fused_risk(db_path):
+    _ingest(db_path, ['T1'])
+    detector = BaseDetector(db_path)
+    scorer = RiskScorer(db_path)
+    detector.save_findings([_finding('T1', 'OutlierDetector', 'Large')])
+    scorer.fuse(['T1'])
+    first = _risk(db_path, 'T1')
+
+    detector.save_findings([_finding('T1', 'OutlierDetector', 'Large')])
+    scorer.fuse(['T1'])
+    assert _risk(db_path, 'T1') == first
+
+def test_fusion_counts_each_detector_once(db_path):
+    _ingest(db_path, ['T1'])
+    detector = BaseDetector(db_path)
+    # Two findings of one detector count as its strongest, a second detector adds evidence
+    detector.save_findings([
+        _finding('T1', 'BenfordDetector', 'vendor', severity='warning', confidence=0.5),
+        _finding('T1', 'BenfordDetector', 'category', severity='warning', confidence=1.0),
+    ])
+    RiskScorer(db_path).fuse(['T1'])
+    assert _risk(db_path, 'T1')[0] == 0.4
+
+    detector.save_findings([_finding('T1', 'OutlierDetector', 'Large', severity='warning', confidence=1.0)])
+    RiskScorer(db_path).fuse(['T1'])
+    assert abs(_risk(db_path, 'T1')[0] - (1 - 0.6 * 0.6)) < 1e-9
+
+def test_fusion_keeps_the_level_a_single_detector_declared(db_path):
+    _ingest(db_path, ['T1'])
+    # A medium-level detector's warning scores 0.4 * 0.75 = 0.3, below the 'medium' cut-off
+    detector = BaseDetector(db_path)
+    detector.save_findings([_finding('T1', 'TemporalAnomalyDetector', 'Weekend', severity='warning', confidence=0.75)])
+    RiskScorer(db_path).fuse(['T1'])
+
+    conn = connect(db_path)
+    status = conn.execute("SELECT status FROM monitored_transactions WHERE transaction_id = 'T1'").fetchone()[0]
+    conn.close()
+    assert status == 'flagged'
+    score, level = _risk(db_path, 'T1')
+    assert abs(score - 0.3) < 1e-9 and level == 'medium'
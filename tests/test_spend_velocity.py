@@ -0,0 +1,5 @@
+from conftest import assert_matches_rebuild
+from analyzers.spend_velocity import SpendVelocityStore
+
+def test_incremental_daily_totals_match_a_rebuild(ingested):
+    assert_matches_rebuild(SpendVelocityStore(ingested))
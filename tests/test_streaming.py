@@ -0,0 +1,102 @@
+import pandas as pd
+from database.connection import connect
+from utils.streaming import InboxSource, TailSource, StreamingPipeline
+
+def _frame(start, count):
+    return pd.DataFrame({
+        'transaction_id': [f"S{i:04d}" for i in range(start, start + count)],
+        'transaction_date': ['2026-03-02'] * count,
+        'amount': [120.0 + i for i in range(count)],
+        'vendor_name': ['Staples'] * count,
+        'transaction_type': ['office_supplies'] * count,
+    })
+
+def _poll(source):
+    """Chunks from a source; the first poll only records file signatures."""
+    return list(source.poll()) + list(source.poll())
+
+def _fail_once(pipeline, monkeypatch):
+    ingest = pipeline.loader.ingest_new
+    calls = []
+    def flaky(df, source_name=None):
+        calls.append(len(df))
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        return ingest(df, source_name=source_name)
+    monkeypatch.setattr(pipeline.loader, 'ingest_new', flaky)
+
+def _scalar(db_path, query):
+    conn = connect(db_path)
+    value = conn.execute(query).fetchone()[0]
+    conn.close()
+    return value
+
+def test_inbox_file_with_a_failed_chunk_is_replayed_after_restart(db_path, tmp_path, monkeypatch):
+    inbox = tmp_path / 'inbox'
+    inbox.mkdir()
+    _frame(0, 30).to_csv(inbox / 'batch.csv', index=False)
+
+    pipeline = StreamingPipeline(db_path, InboxSource(db_path, str(inbox), chunk_rows=10), on_batch=lambda r: None)
+    chunks = _poll(pipeline.source)
+    assert len(chunks) == 3
+    _fail_once(pipeline, monkeypatch)
+    assert pipeline.process_batch(chunks[:1])['status'] == 'failed'
+    assert pipeline.process_batch(chunks[1:])['status'] == 'completed'
+    # The last chunk committed, but the first never did
+    assert _scalar(db_path, "SELECT status FROM stream_files") == 'in_progress'
+
+    restarted = StreamingPipeline(db_path, InboxSource(db_path, str(inbox), chunk_rows=10), on_batch=lambda r: None)
+    chunks = _poll(restarted.source)
+    assert len(chunks) == 3
+    assert restarted.process_batch(chunks)['status'] == 'completed'
+    assert _scalar(db_path, "SELECT status FROM stream_files") == 'done'
+    assert _scalar(db_path, "SELECT COUNT(*) FROM monitored_transactions") == 30
+    assert _scalar(db_path, "SELECT COUNT(*) FROM anomaly_detections") == _scalar(db_path, """
+        SELECT COUNT(*) FROM (SELECT DISTINCT transaction_id, detector_name, finding_summary FROM anomaly_detections)
+    """)
+    assert _poll(restarted.source) == []
+
+def test_inbox_rejects_files_missing_required_columns(db_path, tmp_path):
+    inbox = tmp_path / 'inbox'
+    inbox.mkdir()
+    _frame(0, 5).drop(columns=['amount']).to_csv(inbox / 'bad.csv', index=False)
+
+    assert _poll(InboxSource(db_path, str(inbox))) == []
+    assert _scalar(db_path, "SELECT status FROM stream_files") == 'failed'
+
+def test_tail_offset_stops_before_a_failed_read(db_path, tmp_path, monkeypatch):
+    path = tmp_path / 'feed.csv'
+    _frame(0, 10).to_csv(path, index=False)
+    pipeline = StreamingPipeline(db_path, TailSource(db_path, str(path)), on_batch=lambda r: None)
+    first = list(pipeline.source.poll())
+    first_end = path.stat().st_size
+    _frame(10, 10).to_csv(path, index=False, header=False, mode='a')
+    second = list(pipeline.source.poll())
+
+    _fail_once(pipeline, monkeypatch)
+    assert pipeline.process_batch(first)['status'] == 'failed'
+    assert pipeline.process_batch(second)['status'] == 'completed'
+    assert _scalar(db_path, "SELECT COUNT(*) FROM stream_offsets") == 0
+
+    # Once the failed read is processed, the offset covers both reads
+    assert pipeline.process_batch(first)['status'] == 'completed'
+    assert _scalar(db_path, "SELECT offset FROM stream_offsets") == path.stat().st_size
+    assert first_end < path.stat().st_size
+
+def test_tail_skips_an_unparseable_range_and_moves_past_it(db_path, tmp_path, capsys):
+    path = tmp_path / 'feed.csv'
+    _frame(0, 10).to_csv(path, index=False)
+    pipeline = StreamingPipeline(db_path, TailSource(db_path, str(path)), on_batch=lambda r: None)
+    first = list(pipeline.source.poll())
+    with open(path, 'a') as f:
+        f.write('S9999,2026-03-02,1.0,"Staples,office_supplies\n')
+    assert list(pipeline.source.poll()) == []
+    assert 'skipping them' in capsys.readouterr().err
+    _frame(10, 10).to_csv(path, index=False, header=False, mode='a')
+    third = list(pipeline.source.poll())
+
+    assert pipeline.process_batch(third)['status'] == 'completed'
+    assert _scalar(db_path, "SELECT COUNT(*) FROM stream_offsets") == 0
+    assert pipeline.process_batch(first)['status'] == 'completed'
+    assert _scalar(db_path, "SELECT offset FROM stream_offsets") == path.stat().st_size
+    assert _scalar(db_path, "SELECT COUNT(*) FROM monitored_transactions") == 20
@@ -0,0 +1,40 @@
+import pandas as pd
+from detectors.structuring_detector import StructuringDetector
+
+def _payments(rows):
+    """Frame of (vendor, date, amount) payments."""
+    return pd.DataFrame({
+        'transaction_id': [f"S{i:03d}" for i in range(len(rows))],
+        'vendor_name': [vendor for vendor, _, _ in rows],
+        'transaction_date': [date for _, date, _ in rows],
+        'amount': [amount for _, _, amount in rows],
+        'transaction_type': ['consulting'] * len(rows),
+    })
+
+def _flagged(db_path, rows):
+    return sorted(f['transaction_id'] for f in StructuringDetector(db_path).detect(_payments(rows)))
+
+def test_payments_just_under_the_threshold_form_a_cluster(db_path):
+    df = _payments([
+        ('Acme Corp', '2026-03-02', 4950.0),
+        ('Acme Corp', '2026-03-02', 4500.0),
+        # At the threshold itself, or below the 10% band, a payment is not "just under" it
+        ('Acme Corp', '2026-03-02', 5000.0),
+        ('Acme Corp', '2026-03-02', 4499.99),
+    ])
+    findings = StructuringDetector(db_path).detect(df)
+
+    assert sorted(f['transaction_id'] for f in findings) == ['S000', 'S001']
+    details = findings[0]['finding_details']
+    assert details['threshold'] == 5000.0
+    assert details['cluster_size'] == 2 and details['cluster_total'] == 9450.0
+
+def test_the_window_includes_its_last_day(db_path):
+    # window_days=3 covers the payment's day and the two before it
+    assert _flagged(db_path, [('Acme Corp', '2026-03-02', 4800.0), ('Acme Corp', '2026-03-04', 4800.0)]) == ['S000', 'S001']
+    assert _flagged(db_path, [('Acme Corp', '2026-03-02', 4800.0), ('Acme Corp', '2026-03-05', 4800.0)]) == []
+
+def test_clusters_never_span_vendors(db_path):
+    assert _flagged(db_path, [('Acme Corp', '2026-03-02', 4800.0), ('Staples', '2026-03-02', 4800.0)]) == []
+    # Vendor names only differing in case and surrounding whitespace are one vendor
+    assert _flagged(db_path, [('Acme Corp', '2026-03-02', 4800.0), (' ACME CORP ', '2026-03-03', 4800.0)]) == ['S000', 'S001']
@@ -0,0 +1,27 @@
+import pandas as pd
+from detectors import DetectionPipeline
+from ui.upload_page import AnalysisJob
+from utils.data_loader import DataLoader
+
+def test_reanalyzing_the_same_upload_runs_no_detection(db_path, monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    df = pd.DataFrame({
+        'transaction_id': [f"U{i}" for i in range(8)],
+        'transaction_date': ['2026-03-07'] * 8,
+        'amount': [5000.0 + 137 * i for i in range(8)],
+        'vendor_name': ['Acme Consulting'] * 8,
+        'transaction_type': ['consulting'] * 8,
+    })
+    pipeline = DetectionPipeline(db_path)
+    loader = DataLoader(db_path, metrics=pipeline.metrics)
+
+    first = AnalysisJob('hash', 'upload.csv', df).run(pipeline, loader)
+    assert first['ingested'] == 8
+    assert first['findings']
+
+    calls = []
+    monkeypatch.setattr(pipeline, 'run_all', lambda *args, **kwargs: calls.append(args) or [])
+    again = AnalysisJob('hash', 'upload.csv', df).run(pipeline, loader)
+    assert again['ingested'] == 0
+    assert again['findings'] == []
+    assert calls == []
@@ -0,0 +1,40 @@
+import pandas as pd
+from detectors.velocity_detector import VelocityDetector
+from utils.data_loader import DataLoader
+
+def _payments(prefix, dates, amount=250.0):
+    return pd.DataFrame({
+        'transaction_id': [f"{prefix}{i:03d}" for i in range(len(dates))],
+        'transaction_date': dates,
+        'amount': [amount + i for i in range(len(dates))],
+        'vendor_name': ['Staples'] * len(dates),
+        'transaction_type': ['office_supplies'] * len(dates),
+    })
+
+def test_a_vendor_and_category_burst_gives_one_finding_per_payment(db_path):
+    loader = DataLoader(db_path)
+    weekly = pd.date_range('2026-01-05', periods=20, freq='7D').strftime('%Y-%m-%d').tolist()
+    loader.ingest_dataframe(_payments('H', weekly))
+    burst = _payments('B', ['2026-06-01', '2026-06-01', '2026-06-02', '2026-06-02', '2026-06-03', '2026-06-03'])
+    loader.ingest_dataframe(burst)
+
+    findings = VelocityDetector(db_path).detect(burst)
+
+    assert sorted(f['transaction_id'] for f in findings) == sorted(burst['transaction_id'])
+    for finding in findings:
+        groups = finding['finding_details']['groups']
+        assert {g['group_type'] for g in groups} == {'vendor', 'category'}
+        assert groups[0]['ratio'] >= groups[1]['ratio']
+        assert finding['finding_details']['group_type'] == groups[0]['group_type']
+        assert 'is bursting too' in finding['finding_summary']
+
+def test_bursts_are_measured_against_their_own_source(db_path):
+    loader = DataLoader(db_path)
+    weekly = pd.date_range('2026-01-05', periods=20, freq='7D').strftime('%Y-%m-%d').tolist()
+    loader.ingest_dataframe(_payments('H', weekly))
+    burst = _payments('B', ['2026-06-01', '2026-06-01', '2026-06-02', '2026-06-02', '2026-06-03', '2026-06-03'])
+    stored = loader.ingest_new(burst, source_name='north')
+
+    # The default source's weekly payments are no baseline for 'north', which has none yet
+    assert set(stored['source']) == {'north'}
+    assert VelocityDetector(db_path).detect(stored) == []
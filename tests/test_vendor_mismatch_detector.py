@@ -0,0 +1,38 @@
+import pandas as pd
+from detectors.vendor_mismatch_detector import VendorMismatchDetector
+from utils.data_loader import DataLoader
+
+def _payments(prefix, rows):
+    """Frame of (vendor, category, amount) payments on consecutive days."""
+    return pd.DataFrame({
+        'transaction_id': [f"{prefix}{i:03d}" for i in range(len(rows))],
+        'transaction_date': pd.date_range('2026-01-05', periods=len(rows), freq='D').strftime('%Y-%m-%d'),
+        'vendor_name': [vendor for vendor, _, _ in rows],
+        'transaction_type': [category for _, category, _ in rows],
+        'amount': [amount for _, _, amount in rows],
+    })
+
+def test_mismatched_rare_and_large_first_payments_are_flagged(db_path):
+    loader = DataLoader(db_path)
+    # Acme is always consulting; Staples is mostly office supplies, some consulting, once travel
+    loader.ingest_dataframe(_payments('H', (
+        [('Acme Corp', 'consulting', 500.0 + i) for i in range(20)]
+        + [('Staples', 'office_supplies', 80.0 + i) for i in range(30)]
+        + [('Staples', 'consulting', 450.0 + i) for i in range(10)]
+        + [('Staples', 'travel', 300.0)]
+    )))
+    batch = loader.ingest_new(_payments('N', [
+        ('Acme Corp', 'travel', 520.0),
+        ('Staples', 'travel', 310.0),
+        ('Globex', 'consulting', 25000.0),
+        ('Acme Corp', 'consulting', 510.0),
+        ('Initech', 'consulting', 480.0),
+    ]).assign(transaction_date='2026-03-02'))
+
+    findings = {f['transaction_id']: f['finding_details'] for f in VendorMismatchDetector(db_path).detect(batch)}
+
+    assert sorted(findings) == ['N000', 'N001', 'N002']
+    assert findings['N000']['category_mismatch'] and findings['N000']['usual_category'] == 'consulting'
+    # Staples has no dominant category, so travel (2 of 42 payments) is only a rare pair
+    assert findings['N001']['rare_pair'] and not findings['N001']['category_mismatch']
+    assert findings['N002']['first_time_large'] and findings['N002']['vendor_transactions'] == 1
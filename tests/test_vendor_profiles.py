@@ -0,0 +1,13 @@
+from conftest import assert_matches_rebuild
+from analyzers.vendor_profiles import VendorProfileStore
+from utils.partitions import DEFAULT_SOURCE
+
+def test_incremental_profiles_match_a_rebuild(ingested):
+    assert_matches_rebuild(VendorProfileStore(ingested))
+
+def test_profiles_are_kept_per_source(ingested):
+    store = VendorProfileStore(ingested)
+    default, _ = store.load(DEFAULT_SOURCE)
+    north, north_pairs = store.load('north')
+    assert default['transaction_count'].sum() == 40
+    assert north['transaction_count'].sum() == north_pairs['transaction_count'].sum() == 25
@@ -0,0 +1,53 @@
+import threading
+import pytest
+from database.connection import connect
+from database.writer import DatabaseWriter
+
+def _insert(conn, run_id):
+    conn.execute("INSERT INTO pipeline_runs (run_id, status) VALUES (?, 'completed')", (run_id,))
+    return run_id
+
+def _run_ids(db_path):
+    conn = connect(db_path)
+    ids = sorted(row[0] for row in conn.execute("SELECT run_id FROM pipeline_runs"))
+    conn.close()
+    return ids
+
+@pytest.fixture
+def writer(db_path):
+    writer = DatabaseWriter(db_path)
+    yield writer
+    writer.close()
+
+def test_a_failing_job_rolls_back_alone(db_path, writer):
+    def insert_then_fail(conn):
+        _insert(conn, 'bad')
+        raise ValueError("rejected")
+
+    # Queued together, the jobs share one transaction
+    futures = [writer.submit(_insert, 'a'), writer.submit(insert_then_fail), writer.submit(_insert, 'b')]
+    assert futures[0].result() == 'a'
+    with pytest.raises(ValueError):
+        futures[1].result()
+    assert futures[2].result() == 'b'
+    assert _run_ids(db_path) == ['a', 'b']
+
+def test_jobs_submitted_from_a_job_join_its_transaction(db_path, writer):
+    def outer(conn):
+        _insert(conn, 'outer')
+        return writer.run(_insert, 'inner')
+
+    assert writer.run(outer) == 'inner'
+    assert _run_ids(db_path) == ['inner', 'outer']
+
+def test_concurrent_submitters_all_land(db_path, writer):
+    def submit_many(thread):
+        for i in range(25):
+            writer.run(_insert, f"t{thread}-{i:02d}")
+
+    threads = [threading.Thread(target=submit_many, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(_run_ids(db_path)) == 100
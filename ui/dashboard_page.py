@@ -1,15 +1,15 @@
+import io
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import sqlite3
+from database.connection import connect
 
 def show_dashboard(db_path='anomalyguard.db'):
+    import plotly.express as px
     st.header("📊 Anomaly Dashboard")
     
-    conn = sqlite3.connect(db_path)
-    df_all = pd.read_sql_query("SELECT * FROM monitored_transactions", conn)
-    df_anomalies = pd.read_sql_query("SELECT * FROM anomaly_detections", conn)
-    conn.close()
+    sources = st.multiselect("Source", list_sources(db_path), placeholder="All sources",
+                             help="Business units or feeds the transactions were ingested from")
+    df_all, df_anomalies = load_dashboard_data(db_path, sources)
     
     if df_all.empty:
         st.warning("No data found. Please upload a file first.")
@@ -63,3 +63,73 @@ def show_dashboard(db_path='anomalyguard.db'):
         st.dataframe(priority_df[['transaction_id', 'transaction_date', 'amount', 'vendor_name', 'risk_level', 'status']])
     else:
         st.success("All caught up! No flagged transactions needing review.")
+
+    show_export(db_path, sorted(df_anomalies['detector_name'].dropna().unique()), sources)
+
+def load_dashboard_data(db_path='anomalyguard.db', sources=None):
+    """Transactions and detections behind the dashboard, optionally only of the given sources."""
+    conn = connect(db_path)
+    try:
+        # Source filters are answered from idx_monitored_transactions_source
+        condition, params = source_condition(sources)
+        where = f" WHERE {condition}" if condition else ""
+        df_all = pd.read_sql_query(f"SELECT * FROM monitored_transactions mt{where}", conn, params=params)
+        df_anomalies = pd.read_sql_query(f"""
+            SELECT ad.* FROM anomaly_detections ad
+            JOIN monitored_transactions mt ON mt.transaction_id = ad.transaction_id{where}
+        """, conn, params=params)
+    finally:
+        conn.close()
+    return df_all, df_anomalies
+
+def list_sources(db_path='anomalyguard.db'):
+    """Distinct transaction sources, read from the source index."""
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT DISTINCT source FROM monitored_transactions WHERE source IS NOT NULL ORDER BY source"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+def source_condition(sources, alias='mt'):
+    """SQL condition and parameters restricting {alias}.source to the given sources; (None, []) for all."""
+    if not sources:
+        return None, []
+    return f"{alias}.source IN ({', '.join('?' for _ in sources)})", list(sources)
+
+def show_export(db_path, detector_names, sources=None):
+    """
+    Download of findings or the audit trail of the selected sources. The
+    file is built when "Prepare download" is clicked and kept in the session
+    for as long as the selection stays the same.
+    """
+    from utils.export import write_export
+
+    with st.expander("Export for audit"):
+        col1, col2 = st.columns(2)
+        with col1:
+            kind = st.radio("Contents", ['findings', 'audit'], horizontal=True,
+                            format_func={'findings': "Findings", 'audit': "Review audit trail"}.get)
+            risk_levels = st.multiselect("Risk level", ['critical', 'high', 'medium', 'low'], key='export_levels')
+            detectors = st.multiselect("Detector", detector_names, key='export_detectors')
+        with col2:
+            fmt = st.radio("Format", ['csv', 'parquet'], horizontal=True)
+            start_date = st.date_input("From", value=None, key='export_start')
+            end_date = st.date_input("To", value=None, key='export_end')
+
+        selection = (db_path, kind, fmt, start_date, end_date, tuple(risk_levels), tuple(detectors),
+                     tuple(sources or ()))
+        if st.button("Prepare download", key='export_prepare'):
+            buffer = io.BytesIO()
+            write_export(buffer, db_path, kind=kind, fmt=fmt, start_date=start_date, end_date=end_date,
+                         risk_levels=risk_levels, detectors=detectors, sources=sources)
+            st.session_state.export_file = (selection, buffer.getvalue())
+
+        prepared = st.session_state.get('export_file')
+        if prepared is not None and prepared[0] == selection:
+            st.download_button(
+                "Download", data=prepared[1], file_name=f"anomalyguard_{kind}.{fmt}",
+                mime='text/csv' if fmt == 'csv' else 'application/octet-stream'
+            )
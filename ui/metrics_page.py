@@ -0,0 +1,81 @@
+import streamlit as st
+import pandas as pd
+from database.connection import connect
+
+def show_metrics(db_path='anomalyguard.db'):
+    import plotly.express as px
+    st.header("⏱️ Pipeline Metrics")
+
+    conn = connect(db_path)
+    df_runs = pd.read_sql_query(
+        "SELECT * FROM pipeline_runs ORDER BY started_at DESC LIMIT 100", conn
+    )
+    df_stages = pd.read_sql_query("""
+        SELECT sm.*, pr.started_at
+        FROM stage_metrics sm
+        JOIN pipeline_runs pr ON pr.run_id = sm.run_id
+        WHERE sm.run_id IN (SELECT run_id FROM pipeline_runs ORDER BY started_at DESC LIMIT 100)
+        ORDER BY pr.started_at, sm.stage_order
+    """, conn)
+    conn.close()
+
+    if df_runs.empty:
+        st.info("No pipeline runs recorded yet. Ingest a file to collect metrics.")
+        return
+
+    st.markdown("""
+    **Where does the time go?** Each upload is recorded as a run, broken down into ingestion,
+    every detector's detect/save step, AI enrichment and risk scoring.
+    """)
+
+    # Per-run breakdown
+    run_labels = {
+        f"{r['started_at']} · {r['source'] or 'pipeline'} · {r['status']} ({r['run_id']})": r['run_id']
+        for _, r in df_runs.iterrows()
+    }
+    selected = st.selectbox("Run", list(run_labels.keys()))
+    run_id = run_labels[selected]
+    run = df_runs[df_runs['run_id'] == run_id].iloc[0]
+    run_stages = df_stages[df_stages['run_id'] == run_id]
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Time", f"{run['total_seconds']:.2f}s")
+    with col2:
+        st.metric("Stages", len(run_stages))
+    with col3:
+        st.metric("SQL Statements", int(run_stages['sql_statements'].sum()))
+    with col4:
+        st.metric("Findings", int(run_stages['findings_count'].fillna(0).sum()))
+
+    if pd.notna(run['error']):
+        st.error(f"Run failed: {run['error']}")
+
+    if not run_stages.empty:
+        fig = px.bar(run_stages, x='wall_time_seconds', y='stage_name', orientation='h',
+                     labels={'wall_time_seconds': 'Seconds', 'stage_name': 'Stage'})
+        fig.update_yaxes(autorange='reversed')
+        st.plotly_chart(fig, use_container_width=True)
+
+        table = run_stages[[
+            'stage_name', 'calls', 'wall_time_seconds', 'rows_in', 'rows_out',
+            'findings_count', 'sql_statements', 'peak_memory_bytes'
+        ]].copy()
+        table['peak_memory_mb'] = table.pop('peak_memory_bytes') / (1024 * 1024)
+        st.dataframe(table, use_container_width=True)
+
+    # Trends across runs
+    st.markdown("---")
+    st.subheader("Trends")
+    completed = df_runs[df_runs['status'] == 'completed'].sort_values('started_at')
+    if len(completed) > 1:
+        fig = px.line(completed, x='started_at', y='total_seconds', markers=True,
+                      labels={'started_at': 'Run', 'total_seconds': 'Total seconds'})
+        st.plotly_chart(fig, use_container_width=True)
+
+        trend = df_stages[df_stages['run_id'].isin(completed['run_id'])]
+        fig = px.area(trend, x='started_at', y='wall_time_seconds', color='stage_name',
+                      labels={'started_at': 'Run', 'wall_time_seconds': 'Seconds', 'stage_name': 'Stage'})
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.caption("Trends appear once more than one run has completed.")
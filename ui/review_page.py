@@ -1,28 +1,35 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
+from database.connection import connect
+from database.engine import bulk_writer, get_engine
+from database.writer import get_writer
 import json
+from utils.payload import get_codec
+from ui.dashboard_page import list_sources, source_condition
+
+# Alerts shown individually; the rest are reached through filters and bulk actions
+REVIEW_PAGE_SIZE = 50
 
 def show_review(db_path='anomalyguard.db'):
     st.header("🔍 Alert Review Queue")
     
-    conn = sqlite3.connect(db_path)
-    # Get all flagged transactions and their detections
-    query = """
-    SELECT mt.*, ad.id as detection_id, ad.detector_name, ad.finding_summary, ad.finding_details_json, ad.llm_context_analysis, ad.llm_risk_assessment, ad.combined_risk_score
-    FROM monitored_transactions mt
-    JOIN anomaly_detections ad ON mt.transaction_id = ad.transaction_id
-    WHERE mt.status = 'flagged'
-    ORDER BY ad.combined_risk_score DESC
-    """
-    df_review = pd.read_sql_query(query, conn)
-    conn.close()
+    sources = st.multiselect("Source", list_sources(db_path), placeholder="All sources", key='review_sources')
+    filters = show_review_filters(db_path, sources)
+    total = count_review_queue(db_path, sources, **filters)
     
-    if df_review.empty:
+    if total == 0:
         st.success("No flagged transactions to review!")
         return
 
-    st.write(f"Showing {len(df_review)} items needing review.")
+    pages = (total - 1) // REVIEW_PAGE_SIZE + 1
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, key='review_page') if pages > 1 else 1
+    offset = (page - 1) * REVIEW_PAGE_SIZE
+    df_review = load_review_queue(db_path, sources, limit=REVIEW_PAGE_SIZE, offset=offset, **filters)
+    st.write(f"Showing {offset + 1}–{offset + len(df_review)} of {total} items needing review.")
+    show_bulk_actions(df_review, total, db_path, sources, filters)
+
+    # Only the payloads of the rows shown below are decoded
+    df_review = decode_payloads(db_path, df_review)
     
     # Review Interface
     for idx, row in df_review.iterrows():
@@ -31,7 +38,7 @@ def show_review(db_path='anomalyguard.db'):
             
             with col1:
                 st.markdown("#### Transaction Details")
-                st.json(json.loads(row['data_json']))
+                st.json(row['data_json'])
                 
             with col2:
                 st.markdown("#### Detection Context")
@@ -60,19 +67,165 @@ def show_review(db_path='anomalyguard.db'):
                     update_status(row['transaction_id'], row['detection_id'], 'escalated', notes, db_path)
                     st.rerun()
 
+def show_review_filters(db_path, sources):
+    """Detector, vendor, risk level and weekend filters of the queue, as keyword arguments of load_review_queue()."""
+    detector_names, vendor_names = review_filter_options(db_path, sources)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        detectors = st.multiselect("Detector", detector_names, key='review_detectors')
+    with col2:
+        vendors = st.multiselect("Vendor", vendor_names, key='review_vendors')
+    with col3:
+        risk_levels = st.multiselect("Risk level", ['critical', 'high', 'medium', 'low'], key='review_levels')
+    weekend_only = st.checkbox("Weekend transactions only", key='review_weekend')
+    return {'detectors': detectors, 'vendors': vendors, 'risk_levels': risk_levels, 'weekend_only': weekend_only}
+
+def review_condition(db_path, sources=None, detectors=None, vendors=None, risk_levels=None, weekend_only=False):
+    """WHERE clause and parameters selecting the flagged alerts that pass the given filters."""
+    conditions, params = ["mt.status = 'flagged'"], []
+    condition, source_params = source_condition(sources)
+    if condition:
+        conditions.append(condition)
+        params.extend(source_params)
+    for column, values in (('ad.detector_name', detectors), ('mt.vendor_name', vendors), ('mt.risk_level', risk_levels)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+    if weekend_only:
+        conditions.append(_weekend_condition(db_path))
+    return " AND ".join(conditions), params
+
+def _weekend_condition(db_path):
+    # Day of week 0 is Sunday in both SQLite and PostgreSQL
+    if get_engine(db_path).dialect.name == 'postgresql':
+        return "EXTRACT(DOW FROM CAST(mt.transaction_date AS DATE)) IN (0, 6)"
+    return "strftime('%w', mt.transaction_date) IN ('0', '6')"
+
+def _query(db_path, query, params):
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+def load_review_queue(db_path='anomalyguard.db', sources=None, limit=None, offset=0, **filters):
+    """
+    Flagged transactions joined with their detections, highest risk first,
+    filtered in SQL (see review_condition()); limit and offset select a page.
+    """
+    condition, params = review_condition(db_path, sources, **filters)
+    query = f"""
+    SELECT mt.*, ad.id as detection_id, ad.detector_name, ad.finding_summary, ad.finding_details_json, ad.llm_context_analysis, ad.llm_risk_assessment, ad.combined_risk_score
+    FROM monitored_transactions mt
+    JOIN anomaly_detections ad ON mt.transaction_id = ad.transaction_id
+    WHERE {condition}
+    ORDER BY ad.combined_risk_score DESC, ad.id
+    """
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [int(limit), int(offset)]
+    return _query(db_path, query, params)
+
+def count_review_queue(db_path='anomalyguard.db', sources=None, **filters):
+    """Number of alerts load_review_queue() returns for the same filters."""
+    condition, params = review_condition(db_path, sources, **filters)
+    query = f"""
+    SELECT COUNT(*) AS alerts FROM monitored_transactions mt
+    JOIN anomaly_detections ad ON mt.transaction_id = ad.transaction_id
+    WHERE {condition}
+    """
+    return int(_query(db_path, query, params)['alerts'].iloc[0])
+
+def review_queue_items(db_path='anomalyguard.db', sources=None, **filters):
+    """(transaction_id, detection_id) pairs of every alert matching the filters, for bulk actions."""
+    condition, params = review_condition(db_path, sources, **filters)
+    query = f"""
+    SELECT mt.transaction_id, ad.id AS detection_id FROM monitored_transactions mt
+    JOIN anomaly_detections ad ON mt.transaction_id = ad.transaction_id
+    WHERE {condition}
+    """
+    return list(_query(db_path, query, params).itertuples(index=False, name=None))
+
+def review_filter_options(db_path='anomalyguard.db', sources=None):
+    """Sorted detector and vendor names occurring among the flagged alerts of the given sources."""
+    condition, params = review_condition(db_path, sources)
+    options = _query(db_path, f"""
+    SELECT DISTINCT ad.detector_name, mt.vendor_name FROM monitored_transactions mt
+    JOIN anomaly_detections ad ON mt.transaction_id = ad.transaction_id
+    WHERE {condition}
+    """, params)
+    return (sorted(options['detector_name'].dropna().unique()),
+            sorted(options['vendor_name'].dropna().unique()))
+
+def decode_payloads(db_path, df_review):
+    """Copy of queue rows with data_json decoded to the row as uploaded."""
+    df_review = df_review.copy()
+    conn = connect(db_path)
+    try:
+        codec = get_codec(db_path)
+        df_review['data_json'] = [codec.decode(conn, raw) for raw in df_review['data_json']]
+    finally:
+        conn.close()
+    return df_review
+
+def show_bulk_actions(df_review, total, db_path, sources, filters):
+    """Applies one action to the selected alerts of this page or to all total alerts matching the filters."""
+    with st.expander("Bulk actions"):
+        table = st.dataframe(
+            df_review[['transaction_id', 'transaction_date', 'vendor_name', 'amount',
+                       'risk_level', 'detector_name', 'finding_summary']],
+            hide_index=True, on_select='rerun', selection_mode='multi-row', key='bulk_table'
+        )
+        rows = table.selection.rows
+        selected = len(rows) if rows else total
+        st.caption(f"{selected} of {total} matching alerts will be updated "
+                   f"({'selected rows' if rows else 'all matching'}).")
+
+        notes = st.text_input("Review Notes", key='bulk_notes')
+        action_col1, action_col2 = st.columns(2)
+        with action_col1:
+            clean = st.button(f"Mark {selected} as Clean", key='bulk_clean')
+        with action_col2:
+            escalate = st.button(f"Escalate {selected} to Manager", key='bulk_esc')
+        if clean or escalate:
+            new_status = 'clean' if clean else 'escalated'
+            if rows:
+                items = df_review.iloc[rows][['transaction_id', 'detection_id']].itertuples(index=False, name=None)
+            else:
+                items = review_queue_items(db_path, sources, **filters)
+            bulk_update_status(items, new_status, notes, db_path)
+            st.rerun()
+
 def update_status(txn_id, det_id, new_status, notes, db_path):
-    conn = sqlite3.connect(db_path)
+    bulk_update_status([(txn_id, det_id)], new_status, notes, db_path)
+    st.success(f"Transaction {txn_id} marked as {new_status}.")
+
+def bulk_update_status(items, new_status, notes, db_path):
+    """
+    Sets the status of (transaction_id, detection_id) pairs and records one
+    audit row per pair, as two set-based statements in one transaction.
+    Returns the number of transactions updated.
+    """
+    # Queued behind at most one chunk of a running ingest, never a lock timeout
+    return get_writer(db_path).run(_write_review, list(items), new_status, notes, bulk_writer(db_path))
+
+def _write_review(conn, items, new_status, notes, bulk):
     cursor = conn.cursor()
-    
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS review_batch (transaction_id TEXT, detection_id INTEGER)")
+    cursor.execute("DELETE FROM review_batch")
+    bulk.insert(conn, 'review_batch', ['transaction_id', 'detection_id'],
+                [(str(txn_id), None if pd.isna(det_id) else int(det_id)) for txn_id, det_id in items])
+
     # Update transaction status
-    cursor.execute("UPDATE monitored_transactions SET status = ? WHERE transaction_id = ?", (new_status, txn_id))
-    
+    cursor.execute("""
+        UPDATE monitored_transactions SET status = ?
+        WHERE transaction_id IN (SELECT transaction_id FROM review_batch)
+    """, (new_status,))
+    updated = cursor.rowcount
+
     # Add to review_actions audit trail
     cursor.execute("""
         INSERT INTO review_actions (transaction_id, detection_id, action_type, reviewer, notes)
-        VALUES (?, ?, ?, ?, ?)
-    """, (txn_id, det_id, new_status, 'user', notes))
-    
-    conn.commit()
-    conn.close()
-    st.success(f"Transaction {txn_id} marked as {new_status}.")
+        SELECT transaction_id, detection_id, ?, 'user', ? FROM review_batch
+    """, (new_status, notes))
+    return updated
@@ -0,0 +1,163 @@
+import io
+import os
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+
+SAMPLE_PATH = "samples/demo_transactions_extended.csv"
+POLL_SECONDS = 0.5
+
+@st.cache_data(max_entries=8, show_spinner="Parsing file...")
+def parse_upload(content_hash, _content):
+    """
+    Parses an uploaded CSV once per distinct file content. Only the hash is
+    used as the cache key (the leading underscore keeps Streamlit from
+    hashing the raw bytes again).
+    """
+    import pandas as pd
+    from utils.typed_frame import normalize_columns
+    return normalize_columns(pd.read_csv(io.BytesIO(_content)))
+
+@st.cache_resource
+def _analysis_executor():
+    # Shared by all sessions; each session runs at most one job at a time
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix='anomalyguard-analysis')
+
+class AnalysisJob:
+    """Ingest, detect and enrich one upload off the script thread; the page polls its progress."""
+
+    def __init__(self, content_hash, file_name, df, source_name='csv_upload'):
+        self.content_hash = content_hash
+        self.file_name = file_name
+        self.df = df
+        self.source_name = source_name
+        self.stage = "⏳ Queued..."
+        self.progress = 0
+        self.future = None
+
+    def _step(self, stage, progress):
+        self.stage = stage
+        self.progress = progress
+
+    def run(self, pipeline, loader):
+        # Never touches st.*: the worker thread has no script context
+        start = time.perf_counter()
+        with pipeline.metrics.run(source=self.source_name) as run_id:
+            self._step("📥 Ingesting data...", 5)
+            new_rows = loader.ingest_new(self.df, source_name=self.source_name)
+
+            # Rows already stored were analyzed when they were first uploaded
+            self._step("🕵️ Running detection pipeline...", 30)
+            findings = pipeline.run_all(new_rows) if len(new_rows) else []
+
+            self._step("🧠 Analyzing context with AI...", 60)
+            enriched_count = pipeline.enrich_with_ai()
+            self._step("🎉 Analysis Complete!", 100)
+
+        return {
+            'content_hash': self.content_hash,
+            'file_name': self.file_name,
+            'rows': len(self.df),
+            'ingested': len(new_rows),
+            'findings': findings,
+            'enriched': enriched_count,
+            'run_id': run_id,
+            'seconds': time.perf_counter() - start,
+        }
+
+def _read_source():
+    """Returns (file name, raw bytes) of the sample or uploaded file, or (None, None)."""
+    use_sample = st.checkbox("Use sample data (Demo Mode)")
+    if use_sample:
+        if not os.path.exists(SAMPLE_PATH):
+            st.error("Sample file not found!")
+            return None, None
+        st.info(f"Loaded extended sample file: `{SAMPLE_PATH}` (200+ rows)")
+        with open(SAMPLE_PATH, 'rb') as f:
+            return SAMPLE_PATH, f.read()
+
+    uploaded_file = st.file_uploader("Choose a CSV transaction file", type="csv")
+    if uploaded_file is None:
+        return None, None
+    return uploaded_file.name, uploaded_file.getvalue()
+
+def _show_result(result):
+    st.subheader("Last Analysis")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Rows in File", result['rows'])
+    col2.metric("New Transactions", result['ingested'])
+    col3.metric("Statistical Anomalies", len(result['findings']))
+    col4.metric("AI Analyzed", result['enriched'])
+    st.caption(f"`{result['file_name']}` analyzed in {result['seconds']:.1f}s"
+               + (f" · run `{result['run_id']}`" if result['run_id'] else ""))
+
+    findings = result['findings']
+    if result['ingested'] == 0:
+        st.info("Every transaction in this file was already stored and analyzed; nothing new to analyze.")
+    if findings:
+        with st.expander(f"Found {len(findings)} Statistical Anomalies", expanded=True):
+            st.dataframe(
+                [{
+                    'Transaction': f['transaction_id'],
+                    'Detector': f['detector_name'],
+                    'Severity': f['severity'],
+                    'Summary': f['finding_summary'],
+                } for f in findings],
+                use_container_width=True,
+                hide_index=True,
+            )
+    st.info("👉 Check the **Dashboard** for trends or **Review Alerts** to take action.")
+
+def show_upload(get_modules):
+    """
+    Upload page. get_modules returns the session's (pipeline, loader); it is
+    only called when an analysis starts.
+    """
+    st.subheader("Step 1: Ingest Data")
+
+    file_name, content = _read_source()
+    job = st.session_state.get('analysis_job')
+    running = job is not None and not job.future.done()
+
+    if content is not None:
+        content_hash = hashlib.sha256(content).hexdigest()
+        try:
+            df = parse_upload(content_hash, content)
+        except Exception as e:
+            st.error(f"Error processing file: {e}")
+            return
+
+        with st.expander("🔎 Preview Raw Data", expanded=job is None):
+            st.dataframe(df.head())
+
+        source_name = st.text_input(
+            "Source", value='csv_upload',
+            help="Business unit or feed the file comes from; rows with their own source/business_unit column keep it"
+        ).strip() or 'csv_upload'
+
+        if st.button("🚀 Ingest and Analyze", type="primary", disabled=running):
+            pipeline, loader = get_modules()
+            job = AnalysisJob(content_hash, file_name, df, source_name)
+            job.future = _analysis_executor().submit(job.run, pipeline, loader)
+            st.session_state.analysis_job = job
+            running = True
+
+    if job is not None:
+        if running:
+            st.progress(job.progress)
+            st.markdown(f"### {job.stage}")
+            time.sleep(POLL_SECONDS)
+            st.rerun()
+
+        del st.session_state['analysis_job']
+        try:
+            st.session_state.last_result = job.future.result()
+        except Exception as e:
+            st.error(f"Error processing file: {e}")
+        else:
+            st.balloons()
+
+    result = st.session_state.get('last_result')
+    if result is not None:
+        _show_result(result)
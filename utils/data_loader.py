@@ -3,34 +3,122 @@ import sqlite3
 import json
 import uuid
 from datetime import datetime
+from database.connection import connect
+from database.writer import get_writer
+from database.parquet_store import ParquetStore
+from database.feature_store import FeatureStore
+from utils.metrics import PipelineMetrics
+from analyzers.vendor_profiles import VendorProfileStore
+from analyzers.digit_histograms import DigitHistogramStore
+from analyzers.spend_velocity import SpendVelocityStore
+from utils.payload import get_codec, compact_payloads_enabled
+from utils.partitions import source_partitions, source_labels, DEFAULT_SOURCE
+from utils.typed_frame import normalize_columns, to_typed_frame, storage_values, INGEST_REQUIRED_COLUMNS
+
+# Rows written per write job; other writers (e.g. review actions) get the
+# write connection between chunks of a large ingest
+INGEST_CHUNK_ROWS = 2000
 
 class DataLoader:
-    def __init__(self, db_path='anomalyguard.db'):
+    def __init__(self, db_path='anomalyguard.db', metrics=None):
         self.db_path = db_path
+        self.metrics = metrics or PipelineMetrics(db_path)
+        self.columnar_store = ParquetStore(db_path)
+        # Incremental aggregates fed every ingested batch via update(batch, source_name)
+        self.ingest_hooks = [VendorProfileStore(db_path), DigitHistogramStore(db_path), SpendVelocityStore(db_path),
+                             FeatureStore(db_path)]
 
     def load_csv(self, file_path):
         """Loads a CSV file into a pandas DataFrame."""
         try:
             df = pd.read_csv(file_path)
-            return df
+            return normalize_columns(df)
         except Exception as e:
             print(f"Error loading CSV: {e}")
             return None
 
-    def ingest_dataframe(self, df, source_name='csv_upload'):
-        """Ingests a DataFrame into the monitored_transactions table."""
-        conn = sqlite3.connect(self.db_path)
+    def ingest_dataframe(self, df, source_name=DEFAULT_SOURCE):
+        """
+        Ingests a DataFrame into the monitored_transactions table. Rows are
+        tagged with their own `source` (e.g. business unit) where the frame
+        has that column, otherwise with source_name; each source's rows are
+        stored and fed to the ingest hooks as a separate batch.
+        Returns the number of rows stored.
+        """
+        return len(self.ingest_new(df, source_name))
+
+    def ingest_new(self, df, source_name=DEFAULT_SOURCE):
+        """
+        ingest_dataframe(), returning the rows of df that were newly stored:
+        rows whose transaction_id was already in the database (or earlier in
+        df) are left out, so callers only analyze new transactions. Their
+        `source` column holds the source each row was stored under, so
+        detectors measure them against that source's baselines.
+        """
+        stored = set()
+        with self.metrics.run(source=source_name):
+            for source, rows in source_partitions(df, source_name):
+                stored.update(self._ingest_partition(rows, source))
+        df = df.assign(source=source_labels(df, source_name))
+        if 'transaction_id' not in df.columns:
+            # Every row got a generated id, so every row is new
+            return df
+        ids = df['transaction_id'].astype(str)
+        return df[ids.isin(stored) & ~ids.duplicated()]
+
+    def _ingest_partition(self, df, source_name):
+        with self.metrics.stage('ingest', rows_in=len(df)) as stage:
+            ingested = self._insert_rows(df, source_name)
+            stage.record(rows_out=len(ingested))
+
+        if not ingested:
+            return []
+        batch = pd.DataFrame(ingested, columns=[
+            'transaction_id', 'transaction_date', 'amount', 'vendor_name', 'transaction_type'
+        ])
+
+        if self.columnar_store.enabled:
+            with self.metrics.stage('ingest.columnar', rows_in=len(batch)) as stage:
+                stage.record(rows_out=self.columnar_store.write_batch(batch, source_name))
+
+        for hook in self.ingest_hooks:
+            with self.metrics.stage(f"ingest.{type(hook).__name__}", rows_in=len(batch)) as stage:
+                stage.record(rows_out=hook.update(batch, source_name))
+        return [row[0] for row in ingested]
+
+    def _insert_rows(self, df, source_name):
+        typed = to_typed_frame(df, required=INGEST_REQUIRED_COLUMNS)
+        writer = get_writer(self.db_path)
+        ingested = []
+        for start in range(0, len(df), INGEST_CHUNK_ROWS):
+            end = start + INGEST_CHUNK_ROWS
+            ingested.extend(writer.run(self._insert_chunk, df.iloc[start:end], typed.iloc[start:end], source_name))
+        return ingested
+
+    def _insert_chunk(self, conn, df, typed, source_name):
         cursor = conn.cursor()
         
-        ingested_count = 0
-        for _, row in df.iterrows():
-            transaction_id = str(row.get('transaction_id', uuid.uuid4()))
-            data_json = row.to_json()
-            transaction_date = row.get('date') or row.get('transaction_date')
-            amount = row.get('amount')
-            vendor_name = row.get('vendor') or row.get('vendor_name')
-            transaction_type = row.get('type') or row.get('transaction_type')
-            
+        # The payload keeps the row exactly as uploaded; typed columns feed the rest
+        if compact_payloads_enabled():
+            payloads = get_codec(self.db_path).encode_frame(conn, source_name, df)
+        else:
+            payloads = [row.to_json() for _, row in df.iterrows()]
+
+        if 'transaction_id' in typed.columns:
+            transaction_ids = [str(t) for t in typed['transaction_id'].tolist()]
+        else:
+            transaction_ids = [str(uuid.uuid4()) for _ in range(len(typed))]
+        columns = zip(
+            transaction_ids,
+            payloads,
+            storage_values(typed, 'transaction_date'),
+            storage_values(typed, 'amount'),
+            storage_values(typed, 'vendor_name'),
+            storage_values(typed, 'transaction_type'),
+        )
+
+        ingested = []
+        for transaction_id, data_json, transaction_date, amount, vendor_name, transaction_type in columns:
             try:
                 cursor.execute("""
                     INSERT INTO monitored_transactions 
@@ -47,18 +135,15 @@ class DataLoader:
                     'clean', 
                     'low'
                 ))
-                ingested_count += 1
+                ingested.append((transaction_id, transaction_date, amount, vendor_name, transaction_type))
             except sqlite3.IntegrityError:
                 # Skip duplicates based on transaction_id
                 continue
-                
-        conn.commit()
-        conn.close()
-        return ingested_count
+        return ingested
 
     def get_all_transactions(self):
         """Retrieves all transactions from the database."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect(self.db_path)
         df = pd.read_sql_query("SELECT * FROM monitored_transactions", conn)
         conn.close()
         return df
@@ -0,0 +1,163 @@
+import io
+import csv
+import contextlib
+import json
+import pandas as pd
+from database.connection import connect
+from utils.payload import get_codec
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Rows fetched from the cursor and written per chunk
+EXPORT_CHUNK_ROWS = 10_000
+EXPORT_FORMATS = ('csv', 'parquet')
+
+# Exported columns and their Parquet types, per export kind
+FINDINGS_COLUMNS = {
+    'transaction_id': 'string', 'source': 'string', 'transaction_date': 'string',
+    'amount': 'float64', 'vendor_name': 'string', 'transaction_type': 'string',
+    'status': 'string', 'risk_level': 'string', 'risk_score': 'float64',
+    'detection_id': 'int64', 'detection_timestamp': 'string', 'detector_type': 'string',
+    'detector_name': 'string', 'confidence': 'float64', 'severity': 'string',
+    'finding_summary': 'string', 'finding_details_json': 'string',
+    'combined_risk_score': 'float64', 'llm_context_analysis': 'string',
+    'llm_risk_assessment': 'string', 'suggested_action': 'string', 'data_json': 'string',
+}
+AUDIT_COLUMNS = {
+    'action_id': 'int64', 'action_timestamp': 'string', 'transaction_id': 'string',
+    'detection_id': 'int64', 'action_type': 'string', 'reviewer': 'string',
+    'notes': 'string', 'resolution': 'string', 'transaction_date': 'string',
+    'amount': 'float64', 'vendor_name': 'string', 'status': 'string', 'risk_level': 'string',
+    'detector_name': 'string', 'finding_summary': 'string',
+}
+EXPORT_KINDS = {'findings': FINDINGS_COLUMNS, 'audit': AUDIT_COLUMNS}
+
+def export_query(kind='findings', start_date=None, end_date=None, risk_levels=None, detectors=None,
+                 sources=None):
+    """
+    SQL and parameters for an export, with the filters pushed into the WHERE
+    clause. Date bounds are inclusive; detectors match detector_name and
+    sources the transaction's source.
+    """
+    if kind == 'findings':
+        query = """
+            SELECT mt.transaction_id, mt.source, mt.transaction_date, mt.amount, mt.vendor_name,
+                   mt.transaction_type, mt.status, mt.risk_level, mt.risk_score,
+                   ad.id AS detection_id, ad.detection_timestamp, ad.detector_type, ad.detector_name,
+                   ad.confidence, ad.severity, ad.finding_summary, ad.finding_details_json,
+                   ad.combined_risk_score, ad.llm_context_analysis, ad.llm_risk_assessment,
+                   ad.suggested_action, mt.data_json
+            FROM anomaly_detections ad
+            JOIN monitored_transactions mt ON mt.transaction_id = ad.transaction_id
+        """
+        order = " ORDER BY ad.id"
+    elif kind == 'audit':
+        query = """
+            SELECT ra.id AS action_id, ra.action_timestamp, ra.transaction_id, ra.detection_id,
+                   ra.action_type, ra.reviewer, ra.notes, ra.resolution,
+                   mt.transaction_date, mt.amount, mt.vendor_name, mt.status, mt.risk_level,
+                   ad.detector_name, ad.finding_summary
+            FROM review_actions ra
+            LEFT JOIN monitored_transactions mt ON mt.transaction_id = ra.transaction_id
+            LEFT JOIN anomaly_detections ad ON ad.id = ra.detection_id
+        """
+        order = " ORDER BY ra.id"
+    else:
+        raise ValueError(f"Unknown export kind {kind!r}; expected one of {', '.join(EXPORT_KINDS)}")
+
+    conditions, params = [], []
+    if start_date is not None:
+        conditions.append("mt.transaction_date >= ?")
+        params.append(pd.Timestamp(start_date).strftime('%Y-%m-%d'))
+    if end_date is not None:
+        # Dates may carry a time part, so compare against the following day
+        conditions.append("mt.transaction_date < ?")
+        params.append((pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+    if risk_levels:
+        conditions.append(f"mt.risk_level IN ({', '.join('?' for _ in risk_levels)})")
+        params.extend(risk_levels)
+    if detectors:
+        conditions.append(f"ad.detector_name IN ({', '.join('?' for _ in detectors)})")
+        params.extend(detectors)
+    if sources:
+        conditions.append(f"mt.source IN ({', '.join('?' for _ in sources)})")
+        params.extend(sources)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query + order, params
+
+def iter_export_chunks(db_path='anomalyguard.db', kind='findings', chunk_rows=EXPORT_CHUNK_ROWS, **filters):
+    """
+    Yields the export as DataFrames of at most chunk_rows rows, fetched from
+    one open cursor, so memory stays flat however many rows match.
+    """
+    query, params = export_query(kind, **filters)
+    columns = list(EXPORT_KINDS[kind])
+    conn = connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        codec = get_codec(db_path)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            chunk = pd.DataFrame(rows, columns=columns)
+            if 'data_json' in chunk.columns:
+                # Payloads are exported as the JSON of the row as uploaded
+                chunk['data_json'] = [json.dumps(codec.decode(conn, raw), default=str) for raw in chunk['data_json']]
+            yield chunk
+    finally:
+        conn.close()
+
+def _arrow_schema(kind):
+    types = {'string': pa.string(), 'float64': pa.float64(), 'int64': pa.int64()}
+    return pa.schema([(name, types[t]) for name, t in EXPORT_KINDS[kind].items()])
+
+def write_export(output, db_path='anomalyguard.db', kind='findings', fmt='csv',
+                 chunk_rows=EXPORT_CHUNK_ROWS, **filters):
+    """
+    Writes an export to a path or binary file object chunk by chunk: CSV rows
+    are appended, Parquet gets one row group per chunk. Returns the row count.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    chunks = iter_export_chunks(db_path, kind, chunk_rows=chunk_rows, **filters)
+    rows = 0
+
+    if fmt == 'parquet':
+        if pa is None:
+            raise ImportError("Parquet export requires pyarrow.")
+        schema = _arrow_schema(kind)
+        with pq.ParquetWriter(output, schema) as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                rows += len(chunk)
+            if rows == 0:
+                writer.write_table(schema.empty_table())
+        return rows
+
+    with _open_text(output) as f:
+        csv.writer(f).writerow(EXPORT_KINDS[kind])
+        for chunk in chunks:
+            chunk.to_csv(f, header=False, index=False)
+            rows += len(chunk)
+    return rows
+
+@contextlib.contextmanager
+def _open_text(output):
+    """Opens a path for writing, or wraps a binary file object without closing it."""
+    if isinstance(output, str) or hasattr(output, '__fspath__'):
+        with open(output, 'w', newline='', encoding='utf-8') as f:
+            yield f
+        return
+    f = io.TextIOWrapper(output, encoding='utf-8', newline='', write_through=True)
+    try:
+        yield f
+    finally:
+        f.flush()
+        f.detach()
@@ -0,0 +1,73 @@
+import pandas as pd
+from database.connection import connect
+from database.parquet_store import ParquetStore
+from database.feature_store import FeatureStore, FEATURE_COLUMNS
+from utils.typed_frame import to_typed_frame
+
+def load_history(db_path='anomalyguard.db', columns=None, start_date=None, end_date=None,
+                 include_archive=False, sources=None):
+    """
+    Loads transaction history with only the requested columns, optionally
+    only of the given sources.
+
+    Reads from the Parquet tier (only kept while the feature cache is
+    disabled) when it holds exactly the rows SQLite holds, otherwise falls
+    back to a projected SQLite query; archived rows are added when
+    include_archive is set.
+    """
+    store = ParquetStore(db_path)
+    conn = connect(db_path)
+    try:
+        df = None
+        if store.has_data():
+            sqlite_rows = conn.execute("SELECT COUNT(*) FROM monitored_transactions").fetchone()[0]
+            columnar_rows = store.count_rows()
+            if columnar_rows == sqlite_rows:
+                df = store.read(columns=columns, start_date=start_date, end_date=end_date, sources=sources)
+            else:
+                # Ahead means rows left the database without leaving the tier (an interrupted retention
+                # run); scanning them would detect on transactions that no longer exist
+                state = "behind" if columnar_rows < sqlite_rows else "ahead of"
+                print(f"Warning: {store.root} is {state} the database; reading history from SQLite. "
+                      "Run `python -m database.parquet_store` on a fresh history directory to rebuild.")
+        if df is None:
+            df = _read_sqlite_history(conn, columns, start_date, end_date, sources)
+        if include_archive:
+            from database.retention import RetentionManager
+            archived = RetentionManager(db_path).read_archive(start_date=start_date, end_date=end_date)
+            if sources and 'source' in archived.columns:
+                archived = archived[archived['source'].isin(sources)]
+            if not archived.empty:
+                df = pd.concat([df, archived.reindex(columns=df.columns)], ignore_index=True)
+        return df
+    finally:
+        conn.close()
+
+def load_typed_history(db_path='anomalyguard.db', columns=None, start_date=None, end_date=None, sources=None):
+    """
+    History as a typed frame (see utils/typed_frame.py). Served from the
+    parsed feature cache when it holds every requested column and the
+    history, otherwise parsed from load_history().
+    """
+    store = FeatureStore(db_path)
+    if store.enabled and columns and set(columns) <= set(FEATURE_COLUMNS):
+        return store.read(columns=columns, start_date=start_date, end_date=end_date, sources=sources)
+    return to_typed_frame(load_history(db_path, columns=columns, start_date=start_date, end_date=end_date,
+                                       sources=sources))
+
+def _read_sqlite_history(conn, columns, start_date, end_date, sources):
+    select = ", ".join(columns) if columns else "*"
+    query = f"SELECT {select} FROM monitored_transactions"
+    conditions, params = [], []
+    if start_date is not None:
+        conditions.append("transaction_date >= ?")
+        params.append(pd.Timestamp(start_date).strftime('%Y-%m-%d'))
+    if end_date is not None:
+        conditions.append("transaction_date < ?")
+        params.append((pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+    if sources:
+        conditions.append(f"source IN ({', '.join('?' for _ in sources)})")
+        params.extend(sources)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return pd.read_sql_query(query, conn, params=params)
@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import multiprocessing
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from database.init_db import init_db
+from utils.generate_sample_data import generate_data
+from utils.typed_frame import normalize_columns
+
+# Relative frequency of simulated reviewer actions
+USER_ACTIONS = {'dashboard': 4, 'review_queue': 4, 'review_write': 2}
+PERCENTILES = (50, 90, 95, 99)
+# Messages of SQLite lock/busy errors, however the driver or SQLAlchemy wraps them
+LOCK_MARKERS = ('database is locked', 'database table is locked', 'database is busy')
+
+def is_lock_error(error):
+    text = str(error).lower()
+    return any(marker in text for marker in LOCK_MARKERS)
+
+def generated_batch(batch_number, rows, sources):
+    """Generated transactions (utils/generate_sample_data.py) with batch-unique ids, spread over sources."""
+    df = normalize_columns(generate_data(rows))
+    df['transaction_id'] = f"LT{batch_number:05d}_" + df['transaction_id'].astype(str)
+    df['source'] = [sources[i % len(sources)] for i in range(len(df))]
+    return df
+
+def user_session(db_path, user_id, duration, think_time, seed):
+    """
+    One simulated reviewer running the Dashboard and Review Alerts data paths
+    and single-alert review writes (what update_status() does) for duration
+    seconds. Returns (operation, seconds, error) samples; error is None,
+    'lock' or the exception type.
+    """
+    from ui.dashboard_page import load_dashboard_data, list_sources
+    from ui.review_page import load_review_queue, count_review_queue, decode_payloads, bulk_update_status, REVIEW_PAGE_SIZE
+
+    rng = random.Random(seed)
+    sources = list_sources(db_path)
+    queue = None
+    samples = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        action = rng.choices(list(USER_ACTIONS), weights=list(USER_ACTIONS.values()))[0]
+        if action == 'review_write' and (queue is None or queue.empty):
+            # Reviewers act on the queue they last loaded
+            action = 'review_queue'
+
+        start = time.perf_counter()
+        error = None
+        try:
+            if action == 'dashboard':
+                # Half of the dashboard views are filtered to one source
+                load_dashboard_data(db_path, [rng.choice(sources)] if sources and rng.random() < 0.5 else None)
+            elif action == 'review_queue':
+                count_review_queue(db_path)
+                queue = load_review_queue(db_path, limit=REVIEW_PAGE_SIZE)
+                decode_payloads(db_path, queue)
+            else:
+                row = queue.iloc[rng.randrange(len(queue))]
+                bulk_update_status([(row['transaction_id'], row['detection_id'])], rng.choice(['clean', 'escalated']),
+                                   f"load test user {user_id}", db_path)
+                queue = queue.drop(index=row.name)
+        except Exception as e:
+            error = 'lock' if is_lock_error(e) else type(e).__name__
+        samples.append((action, time.perf_counter() - start, error))
+        if think_time > 0:
+            time.sleep(rng.expovariate(1 / think_time))
+    return samples
+
+def _ingest_loop(db_path, stop, batch_rows, sources, interval, samples):
+    """Background ingest + detection of generated batches, as the Upload page runs them, until stop is set."""
+    from detectors import DetectionPipeline
+    from utils.data_loader import DataLoader
+
+    pipeline = DetectionPipeline(db_path)
+    loader = DataLoader(db_path, metrics=pipeline.metrics)
+    batch_number = 0
+    while not stop.is_set():
+        batch_number += 1
+        df = generated_batch(batch_number, batch_rows, sources)
+        start = time.perf_counter()
+        error = None
+        try:
+            with pipeline.metrics.run(source='load_test'):
+                loader.ingest_dataframe(df, source_name='load_test')
+                pipeline.run_all(df)
+        except Exception as e:
+            error = 'lock' if is_lock_error(e) else type(e).__name__
+        samples.append(('ingest_batch', time.perf_counter() - start, error, len(df)))
+        stop.wait(interval)
+
+def _latency_summary(seconds):
+    ms = np.asarray(seconds) * 1000
+    summary = {f"p{p}_ms": round(float(np.percentile(ms, p)), 1) for p in PERCENTILES}
+    summary['max_ms'] = round(float(ms.max()), 1)
+    return summary
+
+def summarize(samples, elapsed):
+    """Per-operation counts, errors, lock errors, throughput and latency percentiles."""
+    frame = pd.DataFrame([s[:3] for s in samples], columns=['operation', 'seconds', 'error'])
+    operations = {}
+    for operation, group in frame.groupby('operation', sort=True):
+        errors = group['error'].notna()
+        operations[operation] = {
+            'count': len(group),
+            'errors': int(errors.sum()),
+            'lock_errors': int((group['error'] == 'lock').sum()),
+            'per_second': round(len(group) / elapsed, 2),
+            **_latency_summary(group['seconds']),
+        }
+    return operations
+
+def run_load_test(db_path=None, users=10, duration=60.0, think_time=1.0, processes=False,
+                  seed_rows=2000, batch_rows=2000, ingest_interval=0.0, sources=4, seed=0):
+    """
+    Runs `users` simulated reviewers (threads, or processes with their own
+    connection pools and writers) against a database for `duration` seconds
+    while a background thread keeps ingesting and analyzing generated
+    batches. The database is first seeded with seed_rows analyzed rows so
+    there is a review queue. Without db_path a temporary database is used
+    and removed afterwards. Returns the report as a dict.
+    """
+    temp_dir = None
+    if db_path is None:
+        temp_dir = tempfile.mkdtemp(prefix='anomalyguard_load_')
+        db_path = os.path.join(temp_dir, 'load_test.db')
+    source_names = [f"unit_{i + 1}" for i in range(max(1, sources))]
+
+    try:
+        init_db(db_path)
+        if seed_rows:
+            from detectors import DetectionPipeline
+            from utils.data_loader import DataLoader
+            df = generated_batch(0, seed_rows, source_names)
+            DataLoader(db_path).ingest_dataframe(df, source_name='load_test')
+            DetectionPipeline(db_path).run_all(df)
+
+        stop = threading.Event()
+        ingest_samples = []
+        ingest_thread = threading.Thread(
+            target=_ingest_loop, args=(db_path, stop, batch_rows, source_names, ingest_interval, ingest_samples),
+            name='load-test-ingest', daemon=True
+        )
+        if processes:
+            # Spawned, not forked: this process already runs writer and ingest threads
+            pool = ProcessPoolExecutor(max_workers=users, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            pool = ThreadPoolExecutor(max_workers=users, thread_name_prefix='load-test-user')
+        start = time.perf_counter()
+        ingest_thread.start()
+        with pool:
+            futures = [pool.submit(user_session, db_path, user, duration, think_time, seed + user)
+                       for user in range(users)]
+            user_samples = [sample for future in futures for sample in future.result()]
+        user_elapsed = time.perf_counter() - start
+        stop.set()
+        # The batch in flight when users finish still counts towards ingest throughput
+        ingest_thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    operations = summarize(user_samples, user_elapsed)
+    ingest = summarize(ingest_samples, elapsed).get('ingest_batch', {'count': 0, 'errors': 0, 'lock_errors': 0})
+    ingest['rows'] = sum(s[3] for s in ingest_samples)
+    ingest['rows_per_second'] = round(ingest['rows'] / elapsed, 1)
+    return {
+        'db_path': None if temp_dir else db_path,
+        'users': users,
+        'mode': 'processes' if processes else 'threads',
+        'think_time_seconds': think_time,
+        'elapsed_seconds': round(elapsed, 2),
+        'user_operations': sum(op['count'] for op in operations.values()),
+        'user_operations_per_second': round(sum(op['count'] for op in operations.values()) / user_elapsed, 2),
+        'errors': sum(op['errors'] for op in operations.values()) + ingest['errors'],
+        'lock_errors': sum(op['lock_errors'] for op in operations.values()) + ingest['lock_errors'],
+        'operations': operations,
+        'ingest': ingest,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load-test the dashboard/review data paths and review writes under concurrent ingestion.")
+    parser.add_argument('--db', default=None,
+                        help="Database to test against; must not exist yet (default: a temporary database)")
+    parser.add_argument('--users', type=int, default=10, help="Simulated concurrent reviewers")
+    parser.add_argument('--duration', type=float, default=60.0, help="Seconds each reviewer keeps working")
+    parser.add_argument('--think-time', type=float, default=1.0, help="Mean seconds between a reviewer's actions")
+    parser.add_argument('--processes', action='store_true',
+                        help="Run reviewers as processes (separate pools and writers) instead of threads")
+    parser.add_argument('--seed-rows', type=int, default=2000, help="Rows ingested and analyzed before reviewers start")
+    parser.add_argument('--batch-rows', type=int, default=2000, help="Rows per background ingest batch")
+    parser.add_argument('--ingest-interval', type=float, default=0.0, help="Seconds between background ingest batches")
+    parser.add_argument('--sources', type=int, default=4, help="Sources the generated rows are spread over")
+    parser.add_argument('--summary', default='-', help="Where to write the JSON report (default: stdout)")
+    args = parser.parse_args()
+
+    if args.db is not None and os.path.exists(args.db):
+        # Reviewers write statuses and audit rows; never do that to real data
+        parser.error(f"{args.db} already exists; load tests run on a new database")
+    report = run_load_test(args.db, users=args.users, duration=args.duration, think_time=args.think_time,
+                           processes=args.processes, seed_rows=args.seed_rows, batch_rows=args.batch_rows,
+                           ingest_interval=args.ingest_interval, sources=args.sources)
+    text = json.dumps(report, indent=2)
+    if args.summary == '-':
+        print(text)
+    else:
+        with open(args.summary, 'w') as f:
+            f.write(text + '\n')
+    sys.exit(1 if report['errors'] else 0)
@@ -0,0 +1,212 @@
+import os
+import time
+import uuid
+import tracemalloc
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from database.connection import set_statement_listener
+from database.writer import get_writer
+
+_local = threading.local()
+
+def _env_flag(name, default=True):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ('0', 'false', 'no', 'off', '')
+
+class StageMetrics:
+    """Accumulated measurements for one named stage of a pipeline run."""
+
+    def __init__(self, name, order):
+        self.name = name
+        self.order = order
+        self.calls = 0
+        self.wall_time = 0.0
+        self.rows_in = None
+        self.rows_out = None
+        self.findings = None
+        self.sql_statements = 0
+        self.peak_memory = None
+        self._memory_baseline = 0
+
+    def record(self, rows_in=None, rows_out=None, findings=None):
+        """Adds row and finding counts observed during the current call."""
+        if rows_in is not None:
+            self.rows_in = (self.rows_in or 0) + int(rows_in)
+        if rows_out is not None:
+            self.rows_out = (self.rows_out or 0) + int(rows_out)
+        if findings is not None:
+            self.findings = (self.findings or 0) + int(findings)
+
+    def count_sql(self, statement):
+        self.sql_statements += 1
+
+class _NullStage:
+    """Stand-in yielded when metrics are disabled, so callers never branch."""
+
+    def record(self, rows_in=None, rows_out=None, findings=None):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+class PipelineMetrics:
+    """
+    Collects per-stage wall time, row/finding counts, SQL statement counts
+    and peak memory for a pipeline run and persists them to the
+    pipeline_runs / stage_metrics tables.
+
+    Disable with ANOMALYGUARD_METRICS=0. Peak memory needs tracemalloc,
+    which slows allocation-heavy stages several times over, so it is only
+    measured with ANOMALYGUARD_METRICS_MEMORY=1. SQL statements are counted
+    on SQLite connections, including writer jobs submitted from the stage;
+    statements run in worker processes or on server backends are not.
+    """
+
+    def __init__(self, db_path='anomalyguard.db', enabled=None, track_memory=None):
+        self.db_path = db_path
+        self.enabled = _env_flag('ANOMALYGUARD_METRICS') if enabled is None else enabled
+        self.track_memory = _env_flag('ANOMALYGUARD_METRICS_MEMORY', default=False) if track_memory is None else track_memory
+        self.run_id = None
+        self.stages = {}
+        self._source = None
+        self._started_at = None
+        self._start = None
+        self._started_tracing = False
+
+    def start_run(self, source=None, run_id=None):
+        """Starts a new run; every stage measured until finish_run() is tagged with its id."""
+        if not self.enabled:
+            return None
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.stages = {}
+        self._source = source
+        self._started_at = datetime.now()
+        self._start = time.perf_counter()
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self.run_id
+
+    def finish_run(self, status='completed', error=None):
+        """Persists the run and its stages, then resets the collector."""
+        if not self.enabled or self.run_id is None:
+            return None
+        total_seconds = time.perf_counter() - self._start
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        run_id = self.run_id
+        try:
+            self._save(run_id, status, total_seconds, error)
+        finally:
+            self.run_id = None
+        return run_id
+
+    @contextmanager
+    def run(self, source=None):
+        """
+        Groups every stage measured inside the block under one run id.
+        If a run is already active the block joins it instead.
+        """
+        if not self.enabled or self.run_id is not None:
+            yield self.run_id
+            return
+
+        run_id = self.start_run(source)
+        try:
+            yield run_id
+        except Exception as e:
+            self.finish_run('failed', str(e))
+            raise
+        self.finish_run()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Measures the enclosed block; repeated stages in one run accumulate."""
+        if not self.enabled or self.run_id is None:
+            yield _NULL_STAGE
+            return
+
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = StageMetrics(name, len(self.stages))
+            self.stages[name] = stage
+        stage.record(rows_in=rows_in)
+
+        parent = getattr(_local, 'stage', None)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                # Fold the parent's peak so far in before resetting it for this stage
+                parent.peak_memory = max(parent.peak_memory or 0, peak - parent._memory_baseline)
+            tracemalloc.reset_peak()
+            stage._memory_baseline = current
+
+        _local.stage = stage
+        set_statement_listener(stage.count_sql)
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.wall_time += time.perf_counter() - start
+            stage.calls += 1
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                stage.peak_memory = max(stage.peak_memory or 0, peak - stage._memory_baseline)
+            _local.stage = parent
+            set_statement_listener(parent.count_sql if parent is not None else None)
+
+    def add_stage(self, name, wall_time, rows_in=None, rows_out=None, findings=None):
+        """Records a stage that was measured elsewhere, e.g. in a worker process."""
+        if not self.enabled or self.run_id is None:
+            return
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = StageMetrics(name, len(self.stages))
+            self.stages[name] = stage
+        stage.calls += 1
+        stage.wall_time += wall_time
+        stage.record(rows_in=rows_in, rows_out=rows_out, findings=findings)
+
+    def _save(self, run_id, status, total_seconds, error):
+        get_writer(self.db_path).run(self._write, run_id, status, total_seconds, error)
+
+    def _write(self, conn, run_id, status, total_seconds, error):
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO pipeline_runs
+            (run_id, source, started_at, finished_at, status, total_seconds, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            run_id,
+            self._source,
+            self._started_at.isoformat(sep=' ', timespec='seconds'),
+            datetime.now().isoformat(sep=' ', timespec='seconds'),
+            status,
+            total_seconds,
+            error
+        ))
+        cursor.executemany("""
+            INSERT INTO stage_metrics
+            (run_id, stage_name, stage_order, calls, wall_time_seconds, rows_in, rows_out,
+             findings_count, sql_statements, peak_memory_bytes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                run_id,
+                stage.name,
+                stage.order,
+                stage.calls,
+                stage.wall_time,
+                stage.rows_in,
+                stage.rows_out,
+                stage.findings,
+                stage.sql_statements,
+                stage.peak_memory
+            )
+            for stage in self.stages.values()
+        ])
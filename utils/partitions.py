@@ -0,0 +1,25 @@
+import pandas as pd
+
+# Source of rows ingested without one; frames without a source column are
+# measured against this source's baselines
+DEFAULT_SOURCE = 'csv_upload'
+
+def source_labels(df, default=None):
+    """Each row's source: its own `source` value where the frame has one and it is not blank, else default."""
+    if 'source' not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    labels = df['source'].astype(object)
+    labels = labels.where(labels.isna(), labels.astype(str).str.strip())
+    return labels.where(labels.notna() & (labels != ''), default)
+
+def source_partitions(df, default=None):
+    """
+    (source, rows) pairs of a frame split by source_labels(), in first-seen
+    order. A frame without a source column is one partition.
+    """
+    if 'source' not in df.columns:
+        return [(default, df)]
+    labels = source_labels(df, default)
+    if labels.nunique(dropna=False) <= 1:
+        return [(labels.iloc[0] if len(labels) and pd.notna(labels.iloc[0]) else default, df)]
+    return [(source, rows) for source, rows in df.groupby(labels, sort=False, dropna=False, observed=True)]
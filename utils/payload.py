@@ -0,0 +1,153 @@
+import os
+import json
+import struct
+import zlib
+from collections import Counter
+
+# Compact payload layout: 1-byte format tag, 4-byte schema id, then the row's
+# values as a JSON array, either plain or raw-deflated against the schema's
+# shared dictionary. Legacy rows are plain JSON objects stored as TEXT.
+FORMAT_VALUES = 1
+FORMAT_DEFLATE = 2
+_HEADER = struct.Struct('>BI')
+
+MAX_DICTIONARY_BYTES = 4096
+DICTIONARY_SAMPLE_ROWS = 1000
+
+def _dumps(values):
+    return json.dumps(values, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def build_dictionary(rows):
+    """
+    Builds a deflate preset dictionary from the most frequent values
+    (vendor names, categories, date prefixes) of a sample of rows.
+    """
+    counts = Counter()
+    for values in rows[:DICTIONARY_SAMPLE_ROWS]:
+        for value in values:
+            if isinstance(value, str):
+                counts[_dumps(value)] += 1
+                if len(value) >= 8:
+                    counts[_dumps(value[:8])[:-1]] += 1
+
+    chunks, size = [], 0
+    for token, count in counts.most_common():
+        if count < 2 or size + len(token) > MAX_DICTIONARY_BYTES:
+            continue
+        chunks.append(token)
+        size += len(token)
+    # zlib finds matches at short distances cheapest, so the most common tokens go last
+    return b','.join(reversed(chunks))
+
+def compact_payloads_enabled():
+    return os.getenv('ANOMALYGUARD_COMPACT_PAYLOAD', '1') != '0'
+
+def _committed(conn):
+    # A connection outside a write transaction only sees committed schemas;
+    # one inside may see a schema its transaction has yet to commit or roll back
+    return getattr(conn, 'in_transaction', True) is False
+
+class PayloadCodec:
+    """
+    Encodes raw transaction rows as a per-source column schema plus a
+    compressed value tuple, and decodes both this format and legacy JSON.
+    Schemas are stored in the payload_schemas table and cached in memory
+    once read back committed, so a rolled-back schema id is never reused
+    from the cache.
+    """
+
+    def __init__(self):
+        self._schemas = {}      # schema_id -> (columns, dictionary)
+        self._schema_ids = {}   # (source, columns) -> schema_id
+
+    def _cache(self, schema_id, source_name, columns, dictionary):
+        self._schemas[schema_id] = (list(columns), dictionary)
+        self._schema_ids[(source_name, tuple(columns))] = schema_id
+
+    def _load_schema(self, conn, schema_id):
+        row = conn.execute(
+            "SELECT source, columns_json, dictionary FROM payload_schemas WHERE schema_id = ?", (schema_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown payload schema {schema_id}")
+        columns, dictionary = json.loads(row[1]), row[2] or b''
+        if _committed(conn):
+            self._cache(schema_id, row[0], columns, dictionary)
+        return columns, dictionary
+
+    def _schema_for(self, conn, source_name, columns, rows):
+        """(schema_id, dictionary) of a layout, created in conn's transaction if new."""
+        schema_id = self._schema_ids.get((source_name, tuple(columns)))
+        if schema_id is not None:
+            return schema_id, self._schemas[schema_id][1]
+
+        columns_json = json.dumps(list(columns))
+        row = conn.execute(
+            "SELECT schema_id, dictionary FROM payload_schemas WHERE source = ? AND columns_json = ?",
+            (source_name, columns_json)
+        ).fetchone()
+        if row is None:
+            dictionary = build_dictionary(rows)
+            cursor = conn.execute(
+                "INSERT INTO payload_schemas (source, columns_json, dictionary) VALUES (?, ?, ?)",
+                (source_name, columns_json, dictionary)
+            )
+            schema_id = cursor.lastrowid
+        else:
+            schema_id, dictionary = row[0], row[1] or b''
+        if _committed(conn):
+            self._cache(schema_id, source_name, columns, dictionary)
+        return schema_id, dictionary
+
+    def encode_rows(self, conn, source_name, columns, rows):
+        """
+        Encodes value lists that share one column layout.
+        The caller commits, so schema creation lands in the same transaction.
+        """
+        schema_id, dictionary = self._schema_for(conn, source_name, columns, rows)
+        plain_header = _HEADER.pack(FORMAT_VALUES, schema_id)
+        deflate_header = _HEADER.pack(FORMAT_DEFLATE, schema_id)
+
+        encoded = []
+        for values in rows:
+            body = _dumps(values)
+            if dictionary:
+                compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=dictionary)
+                packed = compressor.compress(body) + compressor.flush()
+                if len(packed) < len(body):
+                    encoded.append(deflate_header + packed)
+                    continue
+            encoded.append(plain_header + body)
+        return encoded
+
+    def encode_frame(self, conn, source_name, df):
+        """Encodes every row of a DataFrame, matching Series.to_json() value conversion."""
+        rows = json.loads(df.to_json(orient='values'))
+        return self.encode_rows(conn, source_name, [str(c) for c in df.columns], rows)
+
+    def decode(self, conn, raw):
+        """Returns the row as a dict, whichever format it was stored in."""
+        if raw is None:
+            return {}
+        if isinstance(raw, str):
+            return json.loads(raw)
+
+        raw = bytes(raw)
+        fmt, schema_id = _HEADER.unpack_from(raw)
+        columns, dictionary = self._schemas.get(schema_id) or self._load_schema(conn, schema_id)
+        body = raw[_HEADER.size:]
+        if fmt == FORMAT_DEFLATE:
+            decompressor = zlib.decompressobj(-15, zdict=dictionary)
+            body = decompressor.decompress(body) + decompressor.flush()
+        elif fmt != FORMAT_VALUES:
+            raise ValueError(f"Unknown payload format {fmt}")
+        return dict(zip(columns, json.loads(body)))
+
+_codecs = {}
+
+def get_codec(db_path):
+    """One codec per database, so schema caches are shared by all readers."""
+    codec = _codecs.get(db_path)
+    if codec is None:
+        codec = _codecs[db_path] = PayloadCodec()
+    return codec
@@ -0,0 +1,414 @@
+import io
+import os
+import sys
+import json
+import time
+import queue
+import hashlib
+import threading
+from datetime import datetime
+import pandas as pd
+from database.connection import connect
+from database.writer import get_writer
+from detectors import DetectionPipeline
+from utils.data_loader import DataLoader
+from utils.typed_frame import normalize_columns, require_columns, SchemaError, INGEST_REQUIRED_COLUMNS
+
+SUPPORTED_EXTENSIONS = ('.csv', '.parquet')
+_STOP = object()
+
+class Chunk:
+    """
+    A slice of arriving rows. `commit` is the bookkeeping writer job run
+    once this chunk's micro-batch has been fully processed.
+    """
+
+    def __init__(self, df, arrived_at, origin, commit=None):
+        self.df = df
+        self.arrived_at = arrived_at
+        self.origin = origin
+        self.commit = commit
+
+def _split(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+class _ChunkTracker:
+    """
+    The chunks one file or tail read was split into. Each chunk's commit
+    marks it processed; on_complete(conn) runs once all of them are, so a
+    chunk whose micro-batch failed keeps the read unfinished and it is
+    replayed after a restart. Commits run on the writer thread, in order.
+    """
+
+    def __init__(self, count, on_complete):
+        self._pending = set(range(count))
+        self._on_complete = on_complete
+
+    def chunks(self, pieces, arrived_at, origin):
+        for position, piece in enumerate(pieces):
+            yield Chunk(piece, arrived_at, origin, commit=self._commit(position))
+
+    def _commit(self, position):
+        def commit(conn):
+            self._pending.discard(position)
+            if not self._pending:
+                self._on_complete(conn)
+        return commit
+
+class InboxSource:
+    """
+    Watches a directory for new CSV/Parquet files.
+
+    A file is picked up once its size and mtime are unchanged across two
+    polls. Files are identified by content hash in stream_files, so a file
+    that was completed before a restart (or re-dropped under another name)
+    is never processed twice.
+    """
+
+    def __init__(self, db_path, inbox, chunk_rows=5000):
+        self.db_path = db_path
+        self.inbox = inbox
+        self.chunk_rows = chunk_rows
+        self._signatures = {}   # path -> (size, mtime) from the previous poll
+        self._first_seen = {}   # path -> wall-clock time the file appeared
+        self._handled = set()   # (path, size, mtime) already queued or skipped
+
+    @property
+    def idle(self):
+        """True when no file is still waiting to settle."""
+        return all((path,) + sig in self._handled for path, sig in self._signatures.items())
+
+    def poll(self):
+        now = time.time()
+        paths = sorted(
+            os.path.join(self.inbox, name) for name in os.listdir(self.inbox)
+            if name.lower().endswith(SUPPORTED_EXTENSIONS)
+        )
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_size, stat.st_mtime)
+            self._first_seen.setdefault(path, now)
+            if self._signatures.get(path) != signature:
+                # Still being written (or just appeared); look again next poll
+                self._signatures[path] = signature
+                continue
+            if (path,) + signature in self._handled:
+                continue
+            self._handled.add((path,) + signature)
+            try:
+                yield from self._read_file(path, self._first_seen.pop(path))
+            except Exception as e:
+                # Left in_progress; it is retried once it changes or after a restart
+                print(f"Error reading {path}: {e}", file=sys.stderr)
+
+    def _read_file(self, path, arrived_at):
+        with open(path, 'rb') as f:
+            content = f.read()
+        file_key = hashlib.sha256(content).hexdigest()
+
+        conn = connect(self.db_path)
+        row = conn.execute("SELECT status FROM stream_files WHERE file_key = ?", (file_key,)).fetchone()
+        conn.close()
+        if row and row[0] in ('done', 'failed'):
+            return
+        get_writer(self.db_path).run(_claim_file, file_key, path, len(content))
+
+        if path.lower().endswith('.parquet'):
+            df = pd.read_parquet(io.BytesIO(content))
+        else:
+            df = pd.read_csv(io.BytesIO(content))
+        df = normalize_columns(df)
+        try:
+            require_columns(df, ('transaction_id',) + INGEST_REQUIRED_COLUMNS)
+        except SchemaError as e:
+            # Rejected for good: it would fail the same way on every retry
+            get_writer(self.db_path).run(_reject_file, file_key, str(e))
+            raise
+
+        def mark_done(conn, rows=len(df)):
+            conn.execute("""
+                UPDATE stream_files SET status = 'done', rows = ?, completed_at = CURRENT_TIMESTAMP
+                WHERE file_key = ?
+            """, (rows, file_key))
+
+        pieces = list(_split(df, self.chunk_rows)) or [df]
+        yield from _ChunkTracker(len(pieces), mark_done).chunks(pieces, arrived_at, path)
+
+def _claim_file(conn, file_key, path, size):
+    conn.execute("""
+        INSERT INTO stream_files (file_key, path, size, status)
+        VALUES (?, ?, ?, 'in_progress')
+        ON CONFLICT(file_key) DO UPDATE SET path = excluded.path
+    """, (file_key, path, size))
+
+def _reject_file(conn, file_key, error):
+    conn.execute("UPDATE stream_files SET status = 'failed', error = ? WHERE file_key = ?", (error, file_key))
+
+class TailSource:
+    """
+    Tails an append-only CSV file. Only complete lines are read; the byte
+    offset reached is stored in stream_offsets once every row before it is
+    processed, so a restart resumes after the last unbroken run of
+    finished reads. A read that cannot be parsed is reported and skipped.
+    """
+
+    def __init__(self, db_path, path, chunk_rows=5000):
+        self.db_path = db_path
+        self.path = os.path.abspath(path)
+        self.chunk_rows = chunk_rows
+        self._offset = None
+        self._header = None
+        self._caught_up = False
+        self._reads = []   # [end offset, finished] per read not yet reflected in stream_offsets
+        self._lock = threading.Lock()
+
+    @property
+    def idle(self):
+        return self._caught_up
+
+    def _load_position(self):
+        conn = connect(self.db_path)
+        row = conn.execute("SELECT offset, header FROM stream_offsets WHERE path = ?", (self.path,)).fetchone()
+        conn.close()
+        self._offset, self._header = (row[0], row[1]) if row else (0, None)
+
+    def poll(self):
+        self._caught_up = True
+        if not os.path.exists(self.path):
+            return
+        if self._offset is None:
+            self._load_position()
+
+        size = os.path.getsize(self.path)
+        if size < self._offset:
+            print(f"Warning: {self.path} shrank below the stored offset; reading it from the start.", file=sys.stderr)
+            self._offset, self._header = 0, None
+            with self._lock:
+                self._reads = []
+
+        with open(self.path, 'rb') as f:
+            if self._header is None:
+                first_line = f.readline()
+                if not first_line.endswith(b'\n'):
+                    return
+                self._header = first_line.decode('utf-8').rstrip('\r\n')
+                self._offset = len(first_line)
+            if size <= self._offset:
+                return
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+
+        end = data.rfind(b'\n')
+        if end < 0:
+            return
+        data = data[:end + 1]
+        new_offset = self._offset + end + 1
+        self._offset = new_offset
+        self._caught_up = False
+        arrived_at = time.time()
+
+        read = [new_offset, False]
+        with self._lock:
+            self._reads.append(read)
+        try:
+            df = normalize_columns(pd.read_csv(io.BytesIO(self._header.encode('utf-8') + b'\n' + data)))
+            require_columns(df, ('transaction_id',) + INGEST_REQUIRED_COLUMNS)
+        except (SchemaError, pd.errors.ParserError, UnicodeDecodeError) as e:
+            # Would fail the same way on every retry, so the range is skipped
+            # and counts as finished for the stored offset
+            print(f"Error reading bytes {new_offset - len(data)}-{new_offset} of {self.path}, skipping them: {e}",
+                  file=sys.stderr)
+            get_writer(self.db_path).run(self._finisher(read, self._header))
+            return
+
+        pieces = list(_split(df, self.chunk_rows))
+        yield from _ChunkTracker(len(pieces), self._finisher(read, self._header)).chunks(
+            pieces, arrived_at, self.path)
+
+    def _finisher(self, read, header):
+        def save_offset(conn):
+            # A later read may finish first; the offset only moves past reads that all finished
+            offset = None
+            with self._lock:
+                read[1] = True
+                while self._reads and self._reads[0][1]:
+                    offset = self._reads.pop(0)[0]
+            if offset is None:
+                return
+            conn.execute("""
+                INSERT INTO stream_offsets (path, offset, header, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(path) DO UPDATE SET offset = excluded.offset, header = excluded.header,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (self.path, offset, header))
+        return save_offset
+
+def _commit_chunks(conn, chunks):
+    for chunk in chunks:
+        if chunk.commit is not None:
+            chunk.commit(conn)
+
+class StreamingPipeline:
+    """
+    Long-running ingest -> detect -> (optional) enrich loop.
+
+    Threads are connected by bounded queues: source -> chunks -> micro-batcher
+    -> batches -> processor -> enrichment. A full queue blocks the stage
+    before it, so a slow stage throttles reading instead of buffering
+    unbounded rows. A micro-batch closes once it reaches `batch_rows` rows or
+    its first chunk has waited `max_wait` seconds.
+    """
+
+    def __init__(self, db_path, source, source_name='stream', batch_rows=5000, max_wait=10.0,
+                 poll_interval=2.0, queue_size=4, enrich=False, on_batch=None):
+        self.db_path = db_path
+        self.source = source
+        self.source_name = source_name
+        self.batch_rows = batch_rows
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.enrich = enrich
+        self.on_batch = on_batch or self._print_report
+
+        self.pipeline = DetectionPipeline(db_path)
+        self.loader = DataLoader(db_path, metrics=self.pipeline.metrics)
+        # Enrichment runs on its own thread, so it gets its own metrics collector
+        self.enrich_pipeline = DetectionPipeline(db_path) if enrich else None
+
+        self.chunk_queue = queue.Queue(maxsize=queue_size)
+        self.batch_queue = queue.Queue(maxsize=queue_size)
+        self.enrich_queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._batch_number = 0
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, until_idle=False):
+        """Runs until stop() (or, with until_idle, until the source has nothing new)."""
+        threads = [
+            threading.Thread(target=self._source_loop, args=(until_idle,), name='stream-source', daemon=True),
+            threading.Thread(target=self._batch_loop, name='stream-batcher', daemon=True),
+            threading.Thread(target=self._process_loop, name='stream-processor', daemon=True),
+        ]
+        if self.enrich:
+            threads.append(threading.Thread(target=self._enrich_loop, name='stream-enrich', daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            print("Stopping after in-flight batches finish...", file=sys.stderr)
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+    def _source_loop(self, until_idle):
+        try:
+            while not self._stop.is_set():
+                queued = 0
+                for chunk in self.source.poll():
+                    self.chunk_queue.put(chunk)
+                    queued += 1
+                    if self._stop.is_set():
+                        break
+                if until_idle and queued == 0 and self.source.idle:
+                    break
+                self._stop.wait(self.poll_interval)
+        finally:
+            self.chunk_queue.put(_STOP)
+
+    def _batch_loop(self):
+        pending, rows, opened_at = [], 0, None
+        while True:
+            timeout = None if not pending else max(0.0, self.max_wait - (time.monotonic() - opened_at))
+            try:
+                item = self.chunk_queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                if pending:
+                    self.batch_queue.put(pending)
+                self.batch_queue.put(_STOP)
+                return
+            if item is not None:
+                if not pending:
+                    opened_at = time.monotonic()
+                pending.append(item)
+                rows += len(item.df)
+
+            if pending and (rows >= self.batch_rows or time.monotonic() - opened_at >= self.max_wait):
+                self.batch_queue.put(pending)
+                pending, rows, opened_at = [], 0, None
+
+    def _process_loop(self):
+        while True:
+            batch = self.batch_queue.get()
+            if batch is _STOP:
+                if self.enrich:
+                    self.enrich_queue.put(_STOP)
+                return
+            report = self.process_batch(batch)
+            if self.enrich and report['status'] == 'completed':
+                self.enrich_queue.put(report)
+            else:
+                self.on_batch(report)
+
+    def _enrich_loop(self):
+        while True:
+            report = self.enrich_queue.get()
+            if report is _STOP:
+                return
+            start = time.perf_counter()
+            report['enriched'] = self.enrich_pipeline.enrich_with_ai()
+            report['enrich_seconds'] = round(time.perf_counter() - start, 4)
+            report['latency_seconds'] = round(time.time() - report['_first_arrival'], 4)
+            self.on_batch(report)
+
+    def process_batch(self, chunks):
+        """Ingests, analyzes and commits one micro-batch; returns its report."""
+        self._batch_number += 1
+        first_arrival = min(c.arrived_at for c in chunks)
+        started = time.time()
+        df = pd.concat([c.df for c in chunks], ignore_index=True)
+        report = {
+            'batch': self._batch_number,
+            'origins': sorted({c.origin for c in chunks}),
+            'rows': len(df),
+            'queue_wait_seconds': round(started - first_arrival, 4),
+            '_first_arrival': first_arrival,
+        }
+
+        try:
+            metrics = self.pipeline.metrics
+            with metrics.run(source=self.source_name) as run_id:
+                metrics.add_stage('stream.queue_wait', started - first_arrival, rows_in=len(df))
+                # Only rows stored by this batch are analyzed, so a replayed
+                # chunk does not detect (or save findings for) its rows twice
+                stored = self.loader.ingest_new(df, source_name=self.source_name)
+                report['ingested'] = len(stored)
+                results = self.pipeline.detect_batch(stored) if len(stored) else {}
+                report['findings'] = len(self.pipeline.save_batch(results))
+
+            # Bookkeeping only after the batch's rows and findings are stored
+            get_writer(self.db_path).run(_commit_chunks, chunks)
+            report.update(status='completed', run_id=run_id)
+        except Exception as e:
+            # Files/offsets stay unfinished and are replayed after a restart
+            report.update(status='failed', error=f"{type(e).__name__}: {e}")
+
+        report['latency_seconds'] = round(time.time() - first_arrival, 4)
+        return report
+
+    @staticmethod
+    def _print_report(report):
+        public = {k: v for k, v in report.items() if not k.startswith('_')}
+        public['finished_at'] = datetime.now().isoformat(timespec='seconds')
+        print(json.dumps(public), flush=True)
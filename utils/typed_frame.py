@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+# Source column names accepted for the canonical ones
+COLUMN_ALIASES = {
+    'vendor': 'vendor_name',
+    'date': 'transaction_date',
+    'type': 'transaction_type',
+    'business_unit': 'source',
+}
+
+# Declared dtype kind of every known transaction column
+SCHEMA = {
+    'id': 'integer',
+    'transaction_id': 'string',
+    'transaction_date': 'datetime',
+    'amount': 'amount',
+    'vendor_name': 'category',
+    'transaction_type': 'category',
+    'source': 'category',
+    'status': 'category',
+    'risk_level': 'category',
+}
+
+INGEST_REQUIRED_COLUMNS = ('transaction_date', 'amount', 'vendor_name')
+DETECT_REQUIRED_COLUMNS = ('transaction_id',)
+
+# Unparseable dates/amounts keep their original text here (NA when the value parsed)
+RAW_SUFFIX = '_raw'
+
+class SchemaError(ValueError):
+    """Raised when a frame lacks columns the pipeline cannot run without."""
+
+def normalize_columns(df):
+    """Renames CSV aliases (vendor/date/type/business_unit) to canonical column names."""
+    rename_map = {
+        alias: name for alias, name in COLUMN_ALIASES.items()
+        if alias in df.columns and name not in df.columns
+    }
+    return df.rename(columns=rename_map) if rename_map else df
+
+def require_columns(df, required):
+    """Raises SchemaError unless every required column is present."""
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise SchemaError(f"Missing required columns: {', '.join(missing)}")
+
+def is_typed(df):
+    return bool(df.attrs.get('typed'))
+
+def _parse_dates(raw):
+    if pd.api.types.is_datetime64_any_dtype(raw):
+        return raw, None
+    parsed = pd.to_datetime(raw, errors='coerce', format='ISO8601')
+    retry = parsed.isna() & raw.notna()
+    if retry.any():
+        # Only non-ISO leftovers pay for per-element format inference
+        parsed[retry] = pd.to_datetime(raw[retry].astype(str), errors='coerce', format='mixed')
+    invalid = parsed.isna() & raw.notna()
+    return parsed, (raw.where(invalid).astype('category') if invalid.any() else None)
+
+def _parse_amounts(raw):
+    if pd.api.types.is_numeric_dtype(raw):
+        amounts, invalid_raw = raw.astype('float64'), None
+    else:
+        amounts = pd.to_numeric(raw, errors='coerce')
+        invalid = amounts.isna() & raw.notna()
+        invalid_raw = raw.where(invalid).astype('category') if invalid.any() else None
+        amounts = amounts.astype('float64')
+
+    # float32 only when every amount survives the round trip at cent precision
+    narrow = amounts.astype('float32')
+    values = amounts.to_numpy()
+    cents = np.round(values, 2)
+    finite = np.isfinite(values)
+    if (cents[finite] == values[finite]).all() and \
+            (np.round(narrow.to_numpy(dtype='float64'), 2)[finite] == values[finite]).all():
+        amounts = narrow
+    return amounts, invalid_raw
+
+def to_typed_frame(df, required=DETECT_REQUIRED_COLUMNS):
+    """
+    Returns a normalized, memory-lean copy of a transaction frame:
+    vendor/type/source strings as categoricals, dates parsed once to
+    datetime64, amounts and ids downcast. Frames that are already typed
+    are returned unchanged, so every stage can call this freely.
+    """
+    if is_typed(df):
+        return df
+
+    df = normalize_columns(df)
+    require_columns(df, required)
+
+    typed = {}
+    for column in df.columns:
+        kind = SCHEMA.get(column)
+        series = df[column]
+        if kind == 'datetime':
+            typed[column], invalid_raw = _parse_dates(series)
+            if invalid_raw is not None:
+                typed[column + RAW_SUFFIX] = invalid_raw
+        elif kind == 'amount':
+            typed[column], invalid_raw = _parse_amounts(series)
+            if invalid_raw is not None:
+                typed[column + RAW_SUFFIX] = invalid_raw
+        elif kind == 'category':
+            typed[column] = series.astype('category')
+        elif kind == 'integer':
+            typed[column] = pd.to_numeric(series, downcast='integer')
+        else:
+            typed[column] = series
+
+    result = pd.DataFrame(typed, index=df.index)
+    result.attrs['typed'] = True
+    return result
+
+def raw_value(df, column, index):
+    """Original text of an unparseable date/amount, or None."""
+    raw_column = column + RAW_SUFFIX
+    if raw_column not in df.columns:
+        return None
+    value = df.at[index, raw_column]
+    return None if pd.isna(value) else value
+
+def is_missing(df, column):
+    """True where a value is absent (not merely unparseable) or blank text."""
+    series = df[column]
+    missing = series.isna()
+    raw_column = column + RAW_SUFFIX
+    if raw_column in df.columns:
+        missing &= df[raw_column].isna()
+
+    blank_tokens = {'nan', 'none', '', 'null'}
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        blank = categories[categories.astype(str).str.strip().str.lower().isin(blank_tokens)]
+        missing |= series.isin(blank)
+    elif series.dtype == object or pd.api.types.is_string_dtype(series):
+        missing |= series.astype(str).str.strip().str.lower().isin(blank_tokens)
+    return missing
+
+def amounts_as_float(series):
+    """float64 amounts, undoing the float32 storage error for downcast columns."""
+    if series.dtype == 'float32':
+        return series.astype('float64').round(2)
+    return series.astype('float64')
+
+def storage_values(df, column):
+    """
+    Python values for writing a typed column back to SQL: ISO date text,
+    cent-exact amounts, None for NA and the original text where unparseable.
+    """
+    if column not in df.columns:
+        return [None] * len(df)
+
+    series = df[column]
+    if pd.api.types.is_datetime64_any_dtype(series):
+        present = series.dropna()
+        has_time = (present != present.dt.normalize()).any()
+        series = series.dt.strftime('%Y-%m-%d %H:%M:%S' if has_time else '%Y-%m-%d')
+    elif SCHEMA.get(column) == 'amount':
+        series = amounts_as_float(series)
+    series = series.astype(object)
+
+    raw_column = column + RAW_SUFFIX
+    if raw_column in df.columns:
+        raw = df[raw_column].astype(object)
+        series = series.where(raw.isna(), raw)
+    return series.where(series.notna(), None).tolist()
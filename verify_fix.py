@@ -1,6 +1,7 @@
 import pandas as pd
 from detectors import DetectionPipeline
 from utils.data_loader import DataLoader
+from utils.typed_frame import normalize_columns
 import os
 
 # Initialize
@@ -17,14 +18,8 @@ df = pd.read_csv(csv_path)
 print("Original Columns:", df.columns.tolist())
 
 # Normalize columns (mimicking app.py logic)
-rename_map = {}
-if 'vendor' in df.columns: rename_map['vendor'] = 'vendor_name'
-if 'date' in df.columns: rename_map['date'] = 'transaction_date' 
-if 'type' in df.columns: rename_map['type'] = 'transaction_type'
-
-if rename_map:
-    df = df.rename(columns=rename_map)
-    print("Renamed Columns:", df.columns.tolist())
+df = normalize_columns(df)
+print("Normalized Columns:", df.columns.tolist())
 
 # Ingest
 print("Ingesting...")